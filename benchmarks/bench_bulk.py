@@ -0,0 +1,42 @@
+"""Benchmark bulk add_nodes/add_edges against one add_node/add_edge call per cell."""
+
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+def main():
+    """Print the time to build the same chain of nodes both ways."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    client = DrawioAPIClient()
+    labels = [f"Node {i}" for i in range(count)]
+    xs = [(i % 100) * 150 for i in range(count)]
+    ys = [(i // 100) * 100 for i in range(count)]
+
+    diagram = client.create_diagram("Per call")
+    start = time.perf_counter()
+    for label, x, y in zip(labels, xs, ys):
+        client.add_node(diagram, label, x, y)
+    node_ids = [cell["id"] for cell in diagram["cells"]]
+    for source, target in zip(node_ids, node_ids[1:]):
+        client.add_edge(diagram, source, target)
+    per_call = time.perf_counter() - start
+
+    diagram = client.create_diagram("Bulk")
+    start = time.perf_counter()
+    node_ids = client.add_nodes(diagram, {"label": labels, "x": xs, "y": ys})
+    client.add_edges(diagram, {"source": node_ids[:-1], "target": node_ids[1:]})
+    bulk = time.perf_counter() - start
+
+    print(f"{count} nodes + {count - 1} edges")
+    print(f"per call: {per_call:.2f}s")
+    print(f"bulk:     {bulk:.2f}s ({per_call / bulk:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
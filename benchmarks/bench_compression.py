@@ -0,0 +1,63 @@
+"""Benchmark compressed vs. plain .drawio export: file size and encode/decode time."""
+
+import io
+import os
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+def build_diagram(client, node_count):
+    """Build a grid of nodes chained together with edges."""
+    diagram = client.create_diagram(title=f"Benchmark {node_count}")
+    styles = [
+        "rounded=1;whiteSpace=wrap;html=1;fillColor=#dae8fc;strokeColor=#6c8ebf;",
+        "ellipse;whiteSpace=wrap;html=1;fillColor=#d5e8d4;strokeColor=#82b366;",
+        "rhombus;whiteSpace=wrap;html=1;fillColor=#fff2cc;strokeColor=#d6b656;",
+    ]
+    for i in range(node_count):
+        client.add_node(diagram, f"Step {i}", (i % 50) * 160, (i // 50) * 100,
+                        style=styles[i % len(styles)])
+    for i in range(node_count - 1):
+        client.add_edge(diagram, f"node_{i + 1}", f"node_{i + 2}",
+                        style="edgeStyle=orthogonalEdgeStyle;rounded=0;html=1;")
+    return diagram
+
+
+def timed(func, repeat=3):
+    """Return the result and best wall time of ``func`` over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    """Print size and timing for plain and compressed exports."""
+    client = DrawioAPIClient()
+    print(f"{'nodes':>8} {'format':>10} {'bytes':>12} {'ratio':>7} "
+          f"{'encode s':>9} {'decode s':>9}")
+    for node_count in (1000, 10000, 50000):
+        diagram = build_diagram(client, node_count)
+        plain_size = None
+        for compressed in (False, True):
+            data, encode_time = timed(
+                lambda: client.export_diagram(diagram, format="drawio",
+                                              compressed=compressed))
+            payload = data.encode("utf-8")
+            _, decode_time = timed(lambda: client.load_diagram(io.BytesIO(payload)))
+            plain_size = plain_size or len(payload)
+            label = "compressed" if compressed else "plain"
+            print(f"{node_count:>8} {label:>10} {len(payload):>12} "
+                  f"{plain_size / len(payload):>6.1f}x {encode_time:>9.3f} "
+                  f"{decode_time:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark undo/redo of small edits against deep-copy snapshots."""
+
+import copy
+import os
+import pickle
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.client import DrawioAPIClient
+
+SIZES = [1000, 10000, 50000]
+EDITS = 50
+
+
+def build_diagram(client, nodes):
+    """A grid of ``nodes`` nodes, each connected to the next one."""
+    diagram = client.create_diagram("History")
+    node_ids = client.add_nodes(diagram, [(f"Node {i}", (i % 100) * 160,
+                                           (i // 100) * 100, 120, 60)
+                                          for i in range(nodes)])
+    client.add_edges(diagram, list(zip(node_ids, node_ids[1:])))
+    return diagram, node_ids
+
+
+def edit(client, diagram, node_ids, step):
+    """One editing step: move a node, relabel it and add a connected node."""
+    node_id = node_ids[(step * 7919) % len(node_ids)]
+    client.move_node(diagram, node_id, step * 3, step * 2)
+    client.update_cell(diagram, node_id, label=f"Edited {step}")
+    new_id = client.add_nodes(diagram, [("New", step * 5, -100, 120, 60)])[0]
+    client.add_edge(diagram, node_id, new_id)
+
+
+def main():
+    """Print per-step undo/redo time and retained memory for both approaches."""
+    client = DrawioAPIClient()
+    print(f"{EDITS} transactions of 4 edits each")
+    print(f"{'nodes':>7} {'snapshot ms':>12} {'undo ms':>9} {'redo ms':>9}"
+          f" {'snapshots MB':>13} {'history KB':>11}")
+    for size in SIZES:
+        diagram, node_ids = build_diagram(client, size)
+
+        # Deep-copy snapshot before every step
+        start = time.perf_counter()
+        snapshots = []
+        for step in range(EDITS):
+            snapshots.append(copy.deepcopy(diagram["cells"]))
+            edit(client, diagram, node_ids, step)
+        snapshot_ms = (time.perf_counter() - start) / EDITS * 1e3
+        snapshot_mb = len(pickle.dumps(snapshots)) / 1e6
+        del snapshots
+
+        diagram, node_ids = build_diagram(client, size)
+        history = diagram.enable_history(depth=EDITS)
+        for step in range(EDITS):
+            with history.transaction():
+                edit(client, diagram, node_ids, step)
+        history_kb = len(pickle.dumps([list(history._undo)])) / 1e3
+
+        start = time.perf_counter()
+        while history.undo():
+            pass
+        undo_ms = (time.perf_counter() - start) / EDITS * 1e3
+        start = time.perf_counter()
+        while history.redo():
+            pass
+        redo_ms = (time.perf_counter() - start) / EDITS * 1e3
+        print(f"{size:>7} {snapshot_ms:>12.2f} {undo_ms:>9.3f} {redo_ms:>9.3f}"
+              f" {snapshot_mb:>13.1f} {history_kb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
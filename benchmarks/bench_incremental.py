@@ -0,0 +1,59 @@
+"""Benchmark incremental re-export after single-node edits on a 10k-cell diagram."""
+
+import os
+import random
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.client import DrawioAPIClient
+
+NODES = 5000
+EDITS = 20
+
+
+def build_diagram(client):
+    """A grid of NODES nodes, each connected to the next one."""
+    diagram = client.create_diagram("Incremental")
+    node_ids = client.add_nodes(diagram, [(f"Node {i}", (i % 100) * 160,
+                                           (i // 100) * 100, 120, 60)
+                                          for i in range(NODES)])
+    client.add_edges(diagram, list(zip(node_ids, node_ids[1:])))
+    return diagram, node_ids
+
+
+def export(client, diagram, kind):
+    if kind == "svg":
+        return client.render_image(diagram, "svg")
+    return client.export_diagram(diagram, kind)
+
+
+def main():
+    """Print the median time to refresh each format after moving one node."""
+    rng = random.Random(0)
+    full = DrawioAPIClient()
+    patched = DrawioAPIClient(incremental=True)
+    diagram, node_ids = build_diagram(full)
+    print(f"{len(diagram['cells'])} cells, median of {EDITS} single-node edits")
+    print(f"{'format':>8} {'full ms':>9} {'incremental ms':>15} {'speedup':>8}")
+    for kind in ("json", "xml", "drawio", "svg"):
+        export(patched, diagram, kind)  # first export renders every cell
+        timings = {"full": [], "incremental": []}
+        for _ in range(EDITS):
+            node_id = rng.choice(node_ids)
+            node = diagram.get_node(node_id)
+            diagram.move_node(node_id, node["x"] + rng.randint(-20, 20), node["y"])
+            for name, client in (("full", full), ("incremental", patched)):
+                start = time.perf_counter()
+                export(client, diagram, kind)
+                timings[name].append(time.perf_counter() - start)
+        full_ms = sorted(timings["full"])[EDITS // 2] * 1e3
+        patched_ms = sorted(timings["incremental"])[EDITS // 2] * 1e3
+        print(f"{kind:>8} {full_ms:>9.2f} {patched_ms:>15.2f} "
+              f"{full_ms / patched_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark the layered layout on generated graphs of increasing size."""
+
+import os
+import random
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+def build_graph(client, node_count, seed=0):
+    """Build a random tree plus extra edges between nearby nodes, some cyclic."""
+    rng = random.Random(seed)
+    diagram = client.create_diagram(title=f"Layout {node_count}")
+    node_ids = client.add_nodes(diagram, [(f"Step {i}", 0, 0)
+                                          for i in range(node_count)])
+    edges = [(node_ids[rng.randrange(i)], node_ids[i]) for i in range(1, node_count)]
+    for _ in range(node_count // 2):
+        i = rng.randrange(node_count)
+        j = min(node_count - 1, max(0, i + rng.randint(-20, 50)))
+        edges.append((node_ids[i], node_ids[j]))
+    client.add_edges(diagram, edges)
+    return diagram
+
+
+def build_random_graph(client, node_count, edge_count, acyclic, seed=0):
+    """Build a sparse random graph; a DAG has long edges over a deep chain of nodes.
+
+    A random digraph gets a deep layering too: breaking its cycles leaves
+    long paths, so both have edges spanning hundreds of layers.
+    """
+    rng = random.Random(seed)
+    diagram = client.create_diagram(title=f"Random {node_count}")
+    node_ids = client.add_nodes(diagram, [(f"Step {i}", 0, 0)
+                                          for i in range(node_count)])
+    if acyclic:
+        edges = [(node_ids[rng.randrange(max(0, i - 5), i)], node_ids[i])
+                 for i in range(1, node_count)]
+        while len(edges) < edge_count:
+            i, j = sorted(rng.sample(range(node_count), 2))
+            edges.append((node_ids[i], node_ids[j]))
+    else:
+        edges = [tuple(rng.sample(node_ids, 2)) for _ in range(edge_count)]
+    client.add_edges(diagram, edges)
+    return diagram
+
+
+def time_layout(client, diagram, direction="TB"):
+    start = time.perf_counter()
+    client.layout(diagram, algorithm="layered", direction=direction)
+    return time.perf_counter() - start
+
+
+def main():
+    """Print layout time and time per node for each graph size."""
+    client = DrawioAPIClient()
+    print(f"{'nodes':>8} {'edges':>8} {'seconds':>9} {'us/node':>9}")
+    for node_count in (1000, 2500, 5000, 10000, 20000):
+        diagram = build_graph(client, node_count)
+        elapsed = time_layout(client, diagram)
+        print(f"{node_count:>8} {len(diagram.edges):>8} {elapsed:>9.3f} "
+              f"{elapsed / node_count * 1e6:>9.1f}")
+
+    print()
+    print(f"{'graph':>14} {'nodes':>8} {'edges':>8} {'TB s':>7} {'LR s':>7}")
+    for name, acyclic in (("random DAG", True), ("random digraph", False)):
+        for node_count in (1000, 4000, 10000):
+            diagram = build_random_graph(client, node_count, node_count * 3 // 2,
+                                         acyclic)
+            top_bottom = time_layout(client, diagram, "TB")
+            left_right = time_layout(client, diagram, "LR")
+            print(f"{name:>14} {node_count:>8} {len(diagram.edges):>8} "
+                  f"{top_bottom:>7.2f} {left_right:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
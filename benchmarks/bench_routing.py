@@ -0,0 +1,58 @@
+"""Benchmark orthogonal edge routing on dense grids of nodes."""
+
+import os
+import random
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.client import DrawioAPIClient
+
+ORTHOGONAL = "edgeStyle=orthogonalEdgeStyle;endArrow=classic;html=1;"
+
+
+def build_grid(client, node_count, seed=0):
+    """Build a jittered grid of nodes and as many edges, mostly between neighbours.
+
+    Edges that skip rows or jump across the grid cannot take a simple
+    Z-shaped path and exercise the grid search.
+    """
+    rng = random.Random(seed)
+    columns = int(node_count ** 0.5)
+    diagram = client.create_diagram(title=f"Routing {node_count}")
+    node_ids = client.add_nodes(diagram, [
+        (f"Node {i}", (i % columns) * 200 + rng.randint(0, 40),
+         (i // columns) * 140 + rng.randint(0, 30), 120, 60)
+        for i in range(node_count)
+    ])
+    edges = []
+    for _ in range(node_count):
+        i = rng.randrange(node_count)
+        step = rng.choice([1, -1, columns, -columns, columns + 3, 2 * columns - 5,
+                           rng.randrange(-5 * columns, 5 * columns)])
+        j = min(node_count - 1, max(0, i + step))
+        if i == j:
+            j = (i + 1) % node_count
+        edges.append((node_ids[i], node_ids[j]))
+    client.add_edges(diagram, edges, style=ORTHOGONAL)
+    return diagram
+
+
+def main():
+    """Print routing time and time per edge for each grid size."""
+    client = DrawioAPIClient()
+    print(f"{'nodes':>8} {'edges':>8} {'seconds':>9} {'ms/edge':>9}")
+    for node_count in (1000, 2500, 5000):
+        diagram = build_grid(client, node_count)
+        start = time.perf_counter()
+        client.route_edges(diagram)
+        elapsed = time.perf_counter() - start
+        edge_count = len(diagram.edges)
+        print(f"{node_count:>8} {edge_count:>8} {elapsed:>9.3f} "
+              f"{elapsed / edge_count * 1e3:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark the rendering service in requests per second per worker core."""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api import raster
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.server import RenderServer
+
+REQUESTS = 400
+
+
+def build_body(client, node_count):
+    """Serialize a chain of nodes as the JSON request body."""
+    diagram = client.create_diagram(f"Server {node_count}")
+    node_ids = client.add_nodes(diagram, [(f"Node {i}", (i % 10) * 160, (i // 10) * 100,
+                                           120, 60)
+                                          for i in range(node_count)])
+    client.add_edges(diagram, list(zip(node_ids, node_ids[1:])))
+    return client.export_diagram(diagram, "json").encode("utf-8")
+
+
+def run(url, body, format, concurrency):
+    """Send REQUESTS renders from ``concurrency`` keep-alive connections."""
+    local = threading.local()
+
+    def send(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        response = local.session.post(f"{url}render/{format}", data=body)
+        response.raise_for_status()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(send, range(REQUESTS)))
+        return time.perf_counter() - start
+
+
+def main():
+    """Print throughput for each format and diagram size."""
+    client = DrawioAPIClient()
+    workers = os.cpu_count() or 1
+    formats = ["svg"] + (["png"] if raster.CAIROSVG_AVAILABLE else [])
+    server = RenderServer(("127.0.0.1", 0), workers=workers, queue_size=64, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        print(f"{workers} worker(s), {REQUESTS} requests per run")
+        print(f"{'format':>6} {'nodes':>6} {'req/s':>9} {'req/s/core':>11} "
+              f"{'ms/req':>8}")
+        for format in formats:
+            for node_count in (10, 100, 1000):
+                body = build_body(client, node_count)
+                run(server.url, body, format, workers * 2)  # warm up connections
+                elapsed = run(server.url, body, format, workers * 2)
+                rate = REQUESTS / elapsed
+                print(f"{format:>6} {node_count:>6} {rate:>9.1f} "
+                      f"{rate / workers:>11.1f} {elapsed / REQUESTS * 1e3:>8.2f}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
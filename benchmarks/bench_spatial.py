@@ -0,0 +1,62 @@
+"""Benchmark spatial queries against a full scan on diagrams of up to 100k nodes."""
+
+import os
+import random
+import sys
+import time
+
+# Add the repository root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.drawio_api.diagram import Diagram
+
+QUERIES = 1000
+
+
+def build_diagram(node_count, seed=0):
+    """Scatter nodes uniformly with about one node per 300x300 area."""
+    rng = random.Random(seed)
+    extent = 300 * node_count ** 0.5
+    return Diagram(title=f"Spatial {node_count}", cells=[
+        {"id": f"node_{i}", "type": "node", "label": "", "x": rng.uniform(0, extent),
+         "y": rng.uniform(0, extent), "width": 120, "height": 60, "style": ""}
+        for i in range(node_count)
+    ]), extent
+
+
+def time_queries(query, points):
+    start = time.perf_counter()
+    for x, y in points:
+        query(x, y)
+    return (time.perf_counter() - start) / len(points) * 1e6
+
+
+def main():
+    """Print microseconds per query for each query type and diagram size."""
+    rng = random.Random(1)
+    print(f"{'nodes':>8} {'build ms':>9} {'point us':>9} {'rect us':>9} "
+          f"{'nearest us':>11} {'scan us':>9}")
+    for node_count in (1000, 10000, 100000):
+        diagram, extent = build_diagram(node_count)
+        points = [(rng.uniform(0, extent), rng.uniform(0, extent))
+                  for _ in range(QUERIES)]
+
+        start = time.perf_counter()
+        diagram.spatial
+        build = (time.perf_counter() - start) * 1e3
+
+        point = time_queries(diagram.query_point, points)
+        rect = time_queries(lambda x, y: diagram.query_rect(x, y, x + 1000, y + 800),
+                            points)
+        nearest = time_queries(lambda x, y: diagram.nearest(x, y, k=5), points)
+        # Plain scan over the node dicts, as a baseline
+        scan = time_queries(lambda x, y: [
+            cell for cell in diagram.nodes
+            if cell["x"] <= x <= cell["x"] + cell["width"]
+            and cell["y"] <= y <= cell["y"] + cell["height"]], points[:50])
+        print(f"{node_count:>8} {build:>9.1f} {point:>9.1f} {rect:>9.1f} "
+              f"{nearest:>11.1f} {scan:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,13 @@ setup(
         "requests>=2.28.0",
     ],
     extras_require={
+        "image": [
+            "cairosvg>=2.7.0",
+            "Pillow>=10.0.0",
+        ],
+        "geometry": [
+            "numpy>=1.21",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "black>=22.3.0", 
@@ -18,6 +25,11 @@ setup(
             "mypy>=0.950",
         ],
     },
+    entry_points={
+        "console_scripts": [
+            "drawio-api=drawio_api.cli:main",
+        ],
+    },
     python_requires=">=3.7",
     author="Your Name",
     author_email="your.email@example.com",
@@ -0,0 +1,217 @@
+"""Asyncio front end for the Draw.io API client, backed by thread pools."""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional, Union
+
+from .client import DrawioAPIClient
+from .diagram import Diagram
+
+
+class AsyncDrawioAPIClient:
+    """Coroutine versions of the ``DrawioAPIClient`` export methods.
+
+    Rendering (SVG generation, CairoSVG rasterization, XML serialization)
+    runs on a render thread pool, while file writes and export-server
+    requests run on a separate I/O thread pool, so the event loop is never
+    blocked. A semaphore caps the number of operations handed to the pools
+    at once; further requests wait on the loop without tying up threads.
+
+    Export-server requests use the blocking ``requests`` session of the
+    client's ``RemoteExporter`` on the I/O pool rather than an async HTTP
+    client, which would be a new dependency. The I/O pool has one thread
+    per concurrency slot, so they are limited by ``max_concurrency`` and
+    by the exporter's own ``max_concurrency``, whichever is lower.
+
+    The threads all call the one wrapped client, so its render cache, if
+    it has one, is shared by every export. Pure-Python SVG and XML
+    generation holds the GIL, so the render threads keep the loop
+    responsive rather than adding CPU parallelism; CairoSVG and file I/O
+    release it.
+
+    Diagram building is cheap and stays synchronous: use ``client`` (the
+    wrapped ``DrawioAPIClient``) for ``add_node``, ``add_edge`` etc.
+
+    Example:
+        async with AsyncDrawioAPIClient() as client:
+            await asyncio.gather(*(client.export_to_image(d, f"{i}.png")
+                                   for i, d in enumerate(diagrams)))
+    """
+
+    def __init__(self, client: Optional[DrawioAPIClient] = None,
+                 executor: Optional[Executor] = None,
+                 max_concurrency: int = 16):
+        """Initialize the client.
+
+        Args:
+            client: The synchronous client to delegate to (defaults to a
+                new ``DrawioAPIClient()``)
+            executor: Executor for rendering (defaults to a thread pool with
+                one thread per CPU). A ``ProcessPoolExecutor`` also works; each
+                call then sends the diagram and a pickled copy of ``client``
+                to a worker, so entries added to the in-memory render cache
+                are not shared between processes; only the disk tier of a
+                cache with a ``directory`` is.
+            max_concurrency: Maximum number of operations running at once;
+                also the number of threads for file writes and export-server
+                requests
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.client = client if client is not None else DrawioAPIClient()
+        self.max_concurrency = max_concurrency
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix="drawio-render")
+        self.io_executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                              thread_name_prefix="drawio-io")
+        self._semaphore = None  # type: Optional[asyncio.Semaphore]
+
+    async def __aenter__(self) -> "AsyncDrawioAPIClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the I/O pool, and the render pool if this client created it."""
+        self.io_executor.shutdown(wait=True)
+        if self._own_executor:
+            self.executor.shutdown(wait=True)
+
+    # ------------------------------------------------------------------
+    # Exports
+    # ------------------------------------------------------------------
+
+    async def export_diagram(self, diagram: Union[Diagram, Dict[str, Any]],
+                             format: str = "json", pretty: bool = False,
+                             compressed: bool = False) -> str:
+        """Export the diagram to JSON, XML or .drawio text off the event loop.
+
+        See ``DrawioAPIClient.export_diagram``.
+        """
+        return await self._run(self.executor, _call, self.client, "export_diagram",
+                               diagram, format, pretty, compressed)
+
+    async def render_image(self, diagram: Union[Diagram, Dict[str, Any]],
+                           format: str = "png",
+                           transparent: bool = False,
+                           scale: float = 1.0,
+                           bg: str = "") -> bytes:
+        """Render the diagram to image bytes off the event loop.
+
+        Export-server renders run on the I/O pool instead of the render
+        pool. See ``DrawioAPIClient.render_image``.
+        """
+        executor = self._executor_for([(format, transparent, scale, bg)])
+        return await self._run(executor, _call, self.client, "render_image",
+                               diagram, format, transparent, scale, bg)
+
+    async def export_to_image(self, diagram: Union[Diagram, Dict[str, Any]],
+                              output_path: Optional[str] = None,
+                              format: str = "png",
+                              transparent: bool = False,
+                              scale: float = 1.0,
+                              bg: str = "",
+                              stream: Optional[IO] = None) -> Optional[str]:
+        """Render the diagram and write it to a file or stream off the event loop.
+
+        Args:
+            diagram: The diagram to export
+            output_path: Path where the image will be saved (ignored when
+                ``stream`` is given)
+            format: Image format (png, jpg, svg, pdf)
+            transparent: Whether the background should be transparent (png only)
+            scale: Scale factor for the output image (1.0 = 100%)
+            bg: Background color (e.g. '#ffffff')
+            stream: Optional writable binary stream to write the image to
+
+        Returns:
+            Path to the saved image file, or None when writing to ``stream``
+
+        Raises:
+            ValueError: If neither ``output_path`` nor ``stream`` is given
+        """
+        if format.lower() != "svg" and not self.client._can_rasterize():
+            # No renderer: the synchronous client writes its HTML export helper
+            return await self._run(self.io_executor, self.client.export_to_image,
+                                   diagram, output_path, format, transparent, scale,
+                                   bg, stream)
+        image_data = await self.render_image(diagram, format, transparent, scale, bg)
+        if stream is not None:
+            await self._run(self.io_executor, stream.write, image_data)
+            return None
+        if output_path is None:
+            raise ValueError("Either output_path or stream must be given")
+        await self._run(self.io_executor, _write_file, output_path, image_data)
+        return os.path.abspath(output_path)
+
+    async def export_many(self, diagram: Union[Diagram, Dict[str, Any]],
+                          targets: Iterable[Dict[str, Any]]) -> List[Optional[str]]:
+        """Export the diagram to several images in one render pass, off the loop.
+
+        See ``DrawioAPIClient.export_many``.
+        """
+        targets = list(targets)
+        options = [(self.client._target_format(target),
+                    target.get("transparent", False),
+                    target.get("scale", 1.0), target.get("bg", ""))
+                   for target in targets]
+        if any(target.get("stream") is not None for target in targets):
+            # Streams can't be sent to another process
+            executor = self.io_executor  # type: Executor
+        else:
+            executor = self._executor_for(options)
+        return await self._run(executor, _call, self.client, "export_many",
+                               diagram, targets)
+
+    async def write_diagram(self, diagram: Union[Diagram, Dict[str, Any]],
+                            output_path: str, format: str = "drawio",
+                            pretty: bool = False, compressed: bool = False) -> str:
+        """Serialize the diagram and write it to a file without blocking the loop.
+
+        Args:
+            diagram: The diagram to export
+            output_path: Destination file
+            format: The export format (json, xml, drawio)
+            pretty: Indent the XML output
+            compressed: Deflate and base64-encode the page (drawio format only)
+
+        Returns:
+            Absolute path of the written file
+        """
+        document = await self.export_diagram(diagram, format, pretty, compressed)
+        await self._run(self.io_executor, _write_file, output_path,
+                        document.encode("utf-8"))
+        return os.path.abspath(output_path)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _executor_for(self, options: List[Any]) -> Executor:
+        """Export-server requests are I/O bound and go to the I/O pool."""
+        return self.io_executor if self.client._use_exporter(options) else self.executor
+
+    async def _run(self, executor: Executor, function: Callable[..., Any],
+                   *args: Any) -> Any:
+        """Run a blocking call on an executor once a concurrency slot is free."""
+        if self._semaphore is None:
+            # Created here so it belongs to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor,
+                                              functools.partial(function, *args))
+
+
+def _call(client: DrawioAPIClient, method: str, *args: Any) -> Any:
+    """Call a client method; module level, so process pools can pickle it."""
+    return getattr(client, method)(*args)
+
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
@@ -0,0 +1,162 @@
+"""Parallel batch export of many diagrams across a process pool."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import (Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple,
+                    Union)
+
+from .diagram import Diagram
+
+# A diagram flattened into tuples for cheap pickling:
+# (title, styles, nodes, edges), where each node is
+# (id, label, x, y, width, height, style_index) and each edge is
+# (id, source, target, label, style_index, points)
+Payload = Tuple[str, List[str], List[tuple], List[tuple]]
+
+Output = Union[str, Sequence[Dict[str, Any]]]
+
+# (position, payload, export_many targets) of one diagram
+Job = Tuple[int, Payload, List[Dict[str, Any]]]
+
+
+class BatchResult(NamedTuple):
+    """Outcome of exporting one diagram in a batch."""
+
+    position: int
+    paths: List[str]
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        """Whether every output of this diagram was written."""
+        return self.error is None
+
+
+def pack(diagram: Union[Diagram, Dict[str, Any]]) -> Payload:
+    """Flatten a diagram into a compact, quickly pickled payload.
+
+    Style strings are stored once and referenced by index, since diagrams
+    typically reuse a handful of styles across all of their cells.
+    """
+    styles = []  # type: List[str]
+    style_ids = {}  # type: Dict[str, int]
+    nodes = []
+    edges = []
+    for cell in diagram["cells"]:
+        style = cell["style"]
+        style_id = style_ids.get(style)
+        if style_id is None:
+            style_id = style_ids[style] = len(styles)
+            styles.append(style)
+        if cell["type"] == "node":
+            nodes.append((cell["id"], cell["label"], cell["x"], cell["y"],
+                          cell["width"], cell["height"], style_id))
+        elif cell["type"] == "edge":
+            edges.append((cell["id"], cell["source"], cell["target"],
+                          cell.get("label"), style_id, cell.get("points")))
+    return (diagram.get("title", "New Diagram"), styles, nodes, edges)
+
+
+def unpack(payload: Payload) -> Diagram:
+    """Rebuild a diagram from a payload created by ``pack``."""
+    title, styles, nodes, edges = payload
+    diagram = Diagram(title=title)
+    for cell_id, label, x, y, width, height, style_id in nodes:
+        diagram.add_cell({"id": cell_id, "type": "node", "label": label,
+                          "x": x, "y": y, "width": width, "height": height,
+                          "style": styles[style_id]})
+    for cell_id, source, target, label, style_id, points in edges:
+        edge = {"id": cell_id, "type": "edge", "source": source,
+                "target": target, "label": label, "style": styles[style_id]}
+        if points is not None:
+            edge["points"] = points
+        diagram.add_cell(edge)
+    return diagram
+
+
+def export_batch(client: Any,
+                 diagrams: Iterable[Union[Diagram, Dict[str, Any]]],
+                 outputs: Iterable[Output],
+                 workers: Optional[int] = None) -> List[BatchResult]:
+    """Export many diagrams in parallel.
+
+    Args:
+        client: The ``DrawioAPIClient`` whose settings the workers use
+        diagrams: The diagrams to export
+        outputs: For each diagram, an output path (format inferred from the
+            extension) or a list of ``export_many`` target dicts with paths
+        workers: Number of worker processes (defaults to the CPU count);
+            1 exports serially in the current process
+
+    Returns:
+        One ``BatchResult`` per diagram, in input order; a diagram that
+        can't be packed or has invalid outputs fails on its own, and the
+        diagrams of a worker process that dies fail with ``BrokenProcessPool``
+    """
+    jobs = []
+    results = []  # type: List[BatchResult]
+    for index, (diagram, output) in enumerate(zip(diagrams, outputs)):
+        try:
+            jobs.append((index, pack(diagram), _targets(output)))
+        except Exception as e:
+            results.append(_failure(index, e))
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(jobs) <= 1:
+        _init_worker(client)
+        results.extend(_export_job(job) for job in jobs)
+    else:
+        # Several jobs per task keep inter-process overhead low
+        chunksize = max(1, len(jobs) // (workers * 4))
+        chunks = [jobs[start:start + chunksize]
+                  for start in range(0, len(jobs), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(client,)) as executor:
+            futures = [executor.submit(_export_chunk, chunk) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                try:
+                    results.extend(future.result())
+                except BrokenProcessPool as e:
+                    # A worker died (e.g. killed for memory) and the pool
+                    # with it; its unfinished diagrams fail
+                    results.extend(_failure(index, e) for index, _, _ in chunk)
+    if len(results) > len(jobs):
+        results.sort(key=lambda result: result.position)
+    return results
+
+
+def _targets(output: Output) -> List[Dict[str, Any]]:
+    """Normalize an output specification to ``export_many`` targets."""
+    if isinstance(output, (str, os.PathLike)):
+        return [{"path": os.fspath(output)}]
+    targets = [dict(target) for target in output]
+    for target in targets:
+        if "path" not in target:
+            raise ValueError("Batch export targets need a 'path'")
+    return targets
+
+
+_worker_client = None  # type: Any
+
+
+def _init_worker(client: Any) -> None:
+    global _worker_client
+    _worker_client = client
+
+
+def _export_job(job: Job) -> BatchResult:
+    index, payload, targets = job
+    try:
+        paths = _worker_client.export_many(unpack(payload), targets)
+        return BatchResult(index, paths, None)
+    except Exception as e:
+        return _failure(index, e)
+
+
+def _export_chunk(jobs: List[Job]) -> List[BatchResult]:
+    return [_export_job(job) for job in jobs]
+
+
+def _failure(index: int, error: Exception) -> BatchResult:
+    return BatchResult(index, [], f"{type(error).__name__}: {error}")
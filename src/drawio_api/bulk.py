@@ -0,0 +1,163 @@
+"""Normalization of bulk node and edge records into cell dicts."""
+
+import gc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Sequence
+
+NODE_FIELDS = ("label", "x", "y", "width", "height", "style")
+EDGE_FIELDS = ("source", "target", "label", "style")
+
+Columns = Dict[str, List[Any]]
+
+
+def node_columns(records: Any, width: float = 120, height: float = 60,
+                 style: Any = None) -> Columns:
+    """Normalize node records to the ``NODE_FIELDS`` columns.
+
+    Args:
+        records: One of
+            - an iterable of dicts with those keys,
+            - an iterable of ``(label, x, y[, width, height[, style]])`` tuples,
+            - a mapping of column name to sequence or NumPy array,
+            - a pandas DataFrame or NumPy structured array with named columns,
+            - a 2-D NumPy array whose rows are tuples as above
+        width: Width of nodes without one
+        height: Height of nodes without one
+        style: Style of nodes without one
+
+    Returns:
+        Equal-length lists keyed by field name
+
+    Raises:
+        ValueError: If ``label``, ``x`` or ``y`` is missing or the columns
+            differ in length
+    """
+    return _columns(records, NODE_FIELDS, ("label", "x", "y"),
+                    {"width": width, "height": height, "style": style})
+
+
+def edge_columns(records: Any, style: Any = None) -> Columns:
+    """Normalize edge records to ``source``, ``target``, ``label`` and ``style``.
+
+    Accepts the same record shapes as ``node_columns``, with tuples of
+    ``(source, target[, label[, style]])``.
+
+    Raises:
+        ValueError: If ``source`` or ``target`` is missing or the columns differ
+            in length
+    """
+    return _columns(records, EDGE_FIELDS, ("source", "target"),
+                    {"label": None, "style": style})
+
+
+def make_nodes(ids: Sequence[str], columns: Columns,
+               default_style: str) -> List[Dict[str, Any]]:
+    """Build node cells from normalized columns."""
+    styles = columns["style"]
+    if not all(styles):
+        styles = [value or default_style for value in styles]
+    return [{"id": cell_id, "type": "node", "label": label, "x": x, "y": y,
+             "width": width, "height": height, "style": style}
+            for cell_id, label, x, y, width, height, style
+            in zip(ids, columns["label"], columns["x"], columns["y"],
+                   columns["width"], columns["height"], styles)]
+
+
+def make_edges(ids: Sequence[str], columns: Columns,
+               default_style: str) -> List[Dict[str, Any]]:
+    """Build edge cells from normalized columns."""
+    styles = columns["style"]
+    if not all(styles):
+        styles = [value or default_style for value in styles]
+    return [{"id": cell_id, "type": "edge", "source": source, "target": target,
+             "label": label, "style": style}
+            for cell_id, source, target, label, style
+            in zip(ids, columns["source"], columns["target"], columns["label"], styles)]
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """Suspend the cyclic garbage collector while allocating many cells.
+
+    Creating millions of dicts otherwise triggers repeated collections that
+    scan every cell already in the diagram.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _columns(records: Any, fields: Sequence[str], required: Sequence[str],
+             defaults: Mapping[str, Any]) -> Columns:
+    raw = _raw_columns(records, fields)
+    for name in required:
+        if name not in raw:
+            raise ValueError(f"Records are missing the '{name}' column")
+
+    count = len(raw[required[0]])
+    columns = {}
+    for name in fields:
+        if name in raw:
+            column = _to_list(raw[name])
+            if len(column) != count:
+                raise ValueError(f"Column '{name}' has {len(column)} values, "
+                                 f"expected {count}")
+            default = defaults.get(name)
+            if default is not None and None in column:
+                column = [default if value is None else value for value in column]
+        else:
+            column = [defaults[name]] * count
+        columns[name] = column
+    return columns
+
+
+def _raw_columns(records: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """Split records into columns without converting the values."""
+    if isinstance(records, Mapping):
+        return {name: records[name] for name in fields if name in records}
+
+    names = getattr(getattr(records, "dtype", None), "names", None)
+    if names:
+        # NumPy structured array
+        return {name: records[name] for name in fields if name in names}
+
+    if hasattr(records, "columns") and hasattr(records, "to_numpy"):
+        # pandas DataFrame
+        return {name: records[name] for name in fields if name in records.columns}
+
+    rows = records.tolist() if hasattr(records, "tolist") else list(records)
+    if not rows:
+        return {name: [] for name in fields}
+    if isinstance(rows[0], Mapping):
+        present = [name for name in fields
+                   if name in rows[0] or any(name in row for row in rows)]
+        return {name: [row.get(name) for row in rows] for name in present}
+
+    widths = set(map(len, rows))
+    if len(widths) != 1:
+        raise ValueError("Record tuples must all have the same length")
+    width = widths.pop()
+    if width > len(fields):
+        raise ValueError(f"Record tuples have at most {len(fields)} values, "
+                         f"got {width}")
+    return dict(zip(fields, zip(*rows)))
+
+
+def _to_list(column: Any) -> List[Any]:
+    """Convert a column to a list of plain Python values.
+
+    Float arrays holding only whole numbers become ints, so coordinates
+    read from a DataFrame are exported as ``100`` rather than ``100.0``.
+    """
+    if hasattr(column, "to_numpy"):
+        column = column.to_numpy()
+    if hasattr(column, "dtype") and hasattr(column, "tolist"):
+        if (column.dtype.kind == "f" and (column == column.round()).all()
+                and (abs(column) < 2 ** 53).all()):
+            column = column.astype("int64")
+        return column.tolist()
+    return list(column)
@@ -0,0 +1,257 @@
+"""Content-addressed render cache with a memory tier and a disk tier."""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+from . import __version__
+from .diagram import Diagram
+
+
+class RenderCache:
+    """Cache export results keyed by a hash of the diagram and export options.
+
+    Entries live in a size-bounded in-memory LRU and, when ``directory`` is
+    given, in a persistent on-disk tier that evicts the least recently used
+    files once it grows past ``max_disk_bytes``.
+
+    Example:
+        client = DrawioAPIClient(cache=RenderCache(directory=".render-cache"))
+    """
+
+    def __init__(self,
+                 max_memory_bytes: int = 64 * 1024 * 1024,
+                 directory: Optional[str] = None,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        """Initialize the cache.
+
+        Args:
+            max_memory_bytes: Size limit of the in-memory tier (0 disables it)
+            directory: Directory of the on-disk tier (None disables it)
+            max_disk_bytes: Size limit of the on-disk tier
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()  # type: OrderedDict[str, bytes]
+        self._memory_bytes = 0
+        self._disk_bytes = None  # type: Optional[int]
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes share the disk tier but start with an empty memory tier
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_memory"] = OrderedDict()
+        state["_memory_bytes"] = 0
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def digest(diagram: Union[Diagram, Dict[str, Any]]) -> str:
+        """Return a canonical hash of a diagram's title and cells."""
+        canonical = json.dumps([diagram.get("title"), diagram["cells"]],
+                               sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def key(digest: str, **params: Any) -> str:
+        """Combine a diagram digest and export parameters into a cache key.
+
+        The package version is part of the key, so a renderer change never
+        serves stale output.
+        """
+        canonical = json.dumps([__version__, digest, params], sort_keys=True,
+                               separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Lookup and storage
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached data for ``key``, or None on a miss."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+
+        path = self._path(key)
+        if path is not None:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = None
+            if data is not None:
+                self._touch(path)
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(key, data)
+                return data
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def copy_to(self, key: str, output_path: str) -> bool:
+        """Write the cached data for ``key`` to a file.
+
+        Disk entries are copied file-to-file without being read into memory.
+
+        Returns:
+            True on a hit, False on a miss (nothing is written)
+        """
+        with self._lock:
+            in_memory = key in self._memory
+        path = self._path(key)
+        if not in_memory and path is not None and os.path.exists(path):
+            try:
+                shutil.copyfile(path, output_path)
+            except FileNotFoundError:
+                pass  # Evicted in the meantime: fall through to a normal lookup
+            else:
+                self._touch(path)
+                with self._lock:
+                    self.disk_hits += 1
+                return True
+
+        data = self.get(key)
+        if data is None:
+            return False
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store data under ``key`` in every enabled tier."""
+        self._remember(key, data)
+        path = self._path(key)
+        if path is None:
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(data) - replaced
+            over_limit = self._disk_bytes > self.max_disk_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = 0
+        if self.directory:
+            for entry in self._disk_entries():
+                os.remove(entry[2])
+
+    @property
+    def hits(self) -> int:
+        """Number of lookups served from either tier."""
+        return self.memory_hits + self.disk_hits
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and tier sizes."""
+        with self._lock:
+            return {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _path(self, key: str) -> Optional[str]:
+        if not self.directory:
+            return None
+        return os.path.join(self.directory, key[:2], key)
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # The modification time doubles as the last-use time for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _disk_entries(self):
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, size, _ in self._disk_entries())
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the disk tier fits."""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% so a full cache is not rescanned on every put
+        target = self.max_disk_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
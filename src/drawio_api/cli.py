@@ -0,0 +1,358 @@
+"""Command-line interface: ``drawio-api convert``."""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import loader
+from .client import DrawioAPIClient
+from .diagram import Diagram
+
+INPUT_EXTENSIONS = (".json", ".drawio", ".xml")
+TEXT_FORMATS = ("drawio", "xml", "json")
+IMAGE_FORMATS = ("svg", "png", "jpg", "pdf")
+
+# Records, per output directory, the input hash each output was made from
+MANIFEST_NAME = ".drawio-api-manifest.json"
+
+
+class Output(NamedTuple):
+    """One file to produce from an input."""
+
+    path: str
+    format: str
+    options: Dict[str, Any]  # export options the output depends on
+
+    @property
+    def key(self) -> str:
+        """The format and options, as recorded in the manifest."""
+        return json.dumps([self.format, self.options], sort_keys=True)
+
+
+class ConvertResult(NamedTuple):
+    """Outcome of converting one input file."""
+
+    source: str
+    written: List[Tuple[str, str]]  # (output path, input hash)
+    skipped: int
+    bytes_read: int
+    error: Optional[str]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the command line; returns the exit status."""
+    parser = argparse.ArgumentParser(prog="drawio-api",
+                                     description="Draw.io API tools.")
+    commands = parser.add_subparsers(dest="command")
+    convert = commands.add_parser(
+        "convert", help="convert diagram files to other formats",
+        description="Convert .json/.drawio/.xml diagrams to images or other "
+                    "diagram formats. Outputs that are newer than their input, "
+                    "or whose input content is unchanged, are skipped.")
+    convert.add_argument("inputs", nargs="+", metavar="INPUT",
+                         help="input files, directories or glob patterns (** matches "
+                              "directories); outputs of earlier runs are not matched")
+    convert.add_argument("-f", "--format", default="svg",
+                         help="comma-separated output formats: "
+                              f"{', '.join(IMAGE_FORMATS + TEXT_FORMATS)} "
+                              "(default: svg)")
+    convert.add_argument("-o", "--output-dir",
+                         help="directory for outputs (default: next to each input)")
+    convert.add_argument("-j", "--jobs", type=int, default=None,
+                         help="parallel worker processes (default: CPU count)")
+    convert.add_argument("--force", action="store_true",
+                         help="rebuild outputs that are up to date")
+    convert.add_argument("--scale", type=float, default=1.0,
+                         help="scale factor for raster images")
+    convert.add_argument("--transparent", action="store_true",
+                         help="transparent PNG background")
+    convert.add_argument("--bg", default="", help="background color, e.g. '#ffffff'")
+    convert.add_argument("--pretty", action="store_true", help="indent XML outputs")
+    convert.add_argument("--compressed", action="store_true",
+                         help="compress .drawio pages")
+    convert.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        return _convert(parser, args)
+    parser.print_help()
+    return 2
+
+
+def _convert(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    formats = [format.strip().lower() for format in args.format.split(",")
+               if format.strip()]
+    formats = ["jpg" if format == "jpeg" else format for format in formats]
+    for format in formats:
+        if format not in IMAGE_FORMATS + TEXT_FORMATS:
+            parser.error(f"unsupported format: {format}")
+    try:
+        sources = expand_inputs(args.inputs)
+        jobs = plan(sources, formats, args.output_dir, args)
+    except ValueError as e:
+        parser.error(str(e))
+    if not jobs:
+        parser.error("no input files matched")
+
+    start = time.perf_counter()
+    results = convert_files(jobs, args.jobs, args.force)
+    elapsed = time.perf_counter() - start
+
+    written = skipped = failed = bytes_read = 0
+    for result in results:
+        if result.error:
+            failed += 1
+            print(f"error: {result.source}: {result.error}", file=sys.stderr)
+        elif not args.quiet:
+            for path, _ in result.written:
+                print(f"{result.source} -> {path}")
+        written += len(result.written)
+        skipped += result.skipped
+        bytes_read += result.bytes_read
+    if not args.quiet:
+        converted = sum(1 for result in results if result.written)
+        rate = converted / elapsed if elapsed > 0 else 0.0
+        throughput = bytes_read / 1e6 / elapsed if elapsed > 0 else 0.0
+        print(f"{len(results)} input(s): {written} output(s) written, "
+              f"{skipped} up to date, {failed} failed in {elapsed:.2f}s "
+              f"({rate:.1f} files/s, {throughput:.1f} MB/s read)")
+    return 1 if failed else 0
+
+
+def expand_inputs(patterns: Sequence[str]) -> List[str]:
+    """Expand glob patterns to diagram files, keeping the first occurrence of each.
+
+    Files that the manifest of their directory records as outputs of an
+    earlier conversion are left out of glob and directory matches, so that
+    running the same command again does not convert its own outputs.
+
+    Raises:
+        ValueError: If a pattern without wildcards names a missing file
+    """
+    sources = []  # type: List[str]
+    seen = set()
+    manifests = {}  # type: Dict[str, Dict[str, str]]
+    for pattern in patterns:
+        expanded = True
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        elif os.path.isdir(pattern):
+            matches = sorted(glob.glob(os.path.join(pattern, "**", "*"),
+                                       recursive=True))
+        elif os.path.exists(pattern):
+            matches = [pattern]
+            expanded = False
+        else:
+            raise ValueError(f"no such file: {pattern}")
+        for path in matches:
+            if not (os.path.isfile(path) and path.lower().endswith(INPUT_EXTENSIONS)):
+                continue
+            if not expanded or not _is_output(path, manifests):
+                real = os.path.realpath(path)
+                if real not in seen:
+                    seen.add(real)
+                    sources.append(path)
+    return sources
+
+
+def _is_output(path: str, manifests: Dict[str, Dict[str, str]]) -> bool:
+    """Whether the manifest of the file's directory records it as an output."""
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in manifests:
+        manifests[directory] = _read_manifest(directory)
+    return os.path.basename(path) in manifests[directory]
+
+
+def plan(sources: Sequence[str], formats: Sequence[str], output_dir: Optional[str],
+         args: argparse.Namespace) -> List[Tuple[str, List[Output]]]:
+    """Pair every input with the outputs to produce from it.
+
+    Raises:
+        ValueError: If two inputs would write the same output file
+    """
+    jobs = []
+    owners = {}  # type: Dict[str, str]
+    for source in sources:
+        stem = os.path.splitext(os.path.basename(source))[0]
+        directory = output_dir or os.path.dirname(source)
+        outputs = []
+        for format in formats:
+            path = os.path.join(directory, f"{stem}.{format}")
+            if os.path.realpath(path) == os.path.realpath(source):
+                continue
+            owner = owners.setdefault(os.path.realpath(path), source)
+            if owner != source:
+                raise ValueError(f"{owner} and {source} would both write {path}")
+            outputs.append(Output(path, format, _output_options(format, args)))
+        jobs.append((source, outputs))
+    return jobs
+
+
+def convert_files(jobs: Sequence[Tuple[str, List[Output]]],
+                  workers: Optional[int] = None,
+                  force: bool = False) -> List[ConvertResult]:
+    """Convert inputs in parallel, skipping outputs that are up to date.
+
+    An output is up to date when the manifest of its directory records it
+    for the same options and it is newer than its input, or when the input's
+    content hash matches the recorded one (e.g. after a fresh checkout
+    changed every mtime). The manifests are updated with the new outputs.
+
+    Args:
+        jobs: (input path, outputs) pairs as returned by ``plan``
+        workers: Number of worker processes (defaults to the CPU count);
+            1 converts serially in the current process
+        force: Rebuild every output
+
+    Returns:
+        One ``ConvertResult`` per input, in input order
+    """
+    manifests = {}  # type: Dict[str, Dict[str, str]]
+    tasks = []
+    for source, outputs in jobs:
+        recorded = {}
+        for output in outputs:
+            directory = os.path.dirname(os.path.abspath(output.path))
+            if directory not in manifests:
+                manifests[directory] = _read_manifest(directory)
+            entry = manifests[directory].get(os.path.basename(output.path))
+            if entry is not None and not force:
+                recorded[output.path] = entry
+        tasks.append((source, outputs, recorded))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        results = [_convert_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_convert_task, tasks,
+                                        chunksize=max(1, len(tasks) // (workers * 4))))
+
+    changed = set()
+    for result in results:
+        for path, digest in result.written:
+            directory = os.path.dirname(os.path.abspath(path))
+            manifests[directory][os.path.basename(path)] = digest
+            changed.add(directory)
+    for directory in changed:
+        _write_manifest(directory, manifests[directory])
+    return results
+
+
+def load(path: str) -> Diagram:
+    """Load a diagram from a JSON or .drawio/mxGraphModel XML file."""
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return Diagram.from_dict(json.load(f))
+    return loader.load_diagram(path)
+
+
+def _output_options(format: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """The command-line options an output of this format depends on."""
+    if format in ("png", "jpg"):
+        return {"scale": args.scale,
+                "transparent": args.transparent and format == "png",
+                "bg": args.bg}
+    if format == "pdf":
+        return {"scale": args.scale}
+    if format == "drawio":
+        return {"pretty": args.pretty, "compressed": args.compressed}
+    if format == "xml":
+        return {"pretty": args.pretty}
+    return {}
+
+
+def _convert_task(task: Tuple[str, List[Output], Dict[str, str]]) -> ConvertResult:
+    source, outputs, recorded = task
+    try:
+        source_mtime = os.stat(source).st_mtime
+        # Fast path: newer than the input and made with the same options
+        stale = [output for output in outputs
+                 if not _newer(output, recorded, source_mtime)]
+        if not stale:
+            return ConvertResult(source, [], len(outputs), 0, None)
+
+        with open(source, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        todo = []
+        for output in stale:
+            if (recorded.get(output.path) == _entry(output, digest)
+                    and os.path.exists(output.path)):
+                # Only the mtime changed; refresh it for the fast path
+                os.utime(output.path)
+            else:
+                todo.append(output)
+        if todo:
+            _write_outputs(source, todo)
+        written = [(output.path, _entry(output, digest)) for output in todo]
+        return ConvertResult(source, written, len(outputs) - len(todo), len(data), None)
+    except Exception as e:
+        return ConvertResult(source, [], 0, 0, f"{type(e).__name__}: {e}")
+
+
+def _newer(output: Output, recorded: Dict[str, str], source_mtime: float) -> bool:
+    entry = recorded.get(output.path)
+    if entry is None or entry.split(":", 1)[1] != output.key:
+        return False
+    try:
+        return os.stat(output.path).st_mtime >= source_mtime
+    except OSError:
+        return False
+
+
+def _entry(output: Output, digest: str) -> str:
+    return f"{digest}:{output.key}"
+
+
+_client = None  # type: Optional[DrawioAPIClient]
+
+
+def _write_outputs(source: str, outputs: List[Output]) -> None:
+    global _client
+    if _client is None:
+        _client = DrawioAPIClient()
+    diagram = load(source)
+    targets = []
+    for output in outputs:
+        directory = os.path.dirname(output.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if output.format in TEXT_FORMATS:
+            text = _client.export_diagram(diagram, output.format,
+                                          output.options.get("pretty", False),
+                                          output.options.get("compressed", False))
+            with open(output.path, "w", encoding="utf-8") as f:
+                f.write(text)
+        else:
+            targets.append(dict(output.options, path=output.path, format=output.format))
+    if targets:
+        # One SVG render shared by every image format
+        _client.export_many(diagram, targets)
+
+
+def _read_manifest(directory: str) -> Dict[str, str]:
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(directory: str, manifest: Dict[str, str]) -> None:
+    path = os.path.join(directory, MANIFEST_NAME)
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,57 +3,72 @@
 import json
 import base64
 import os
-import time
 import urllib.parse
-import xml.etree.ElementTree as ET
-import xml.dom.minidom
 import requests
-import tempfile
-from typing import Dict, Any, Optional, List, Union, Tuple
+from typing import (AbstractSet, Dict, Any, IO, Iterable, Optional, List, Set, Union,
+                    Tuple)
 
-# Optional imports - will be used if available
-try:
-    import cairosvg
-    CAIROSVG_AVAILABLE = True
-except ImportError:
-    CAIROSVG_AVAILABLE = False
+from . import (batch, bulk, incremental, layout, loader, raster, routing, serializer,
+               svg, tiles)
+from .cache import RenderCache
+from .diagram import Diagram
+from .document import Document
+from .remote import RemoteExporter
 
-try:
-    from PIL import Image
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
+DEFAULT_NODE_STYLE = "rounded=1;whiteSpace=wrap;html=1;"
+DEFAULT_EDGE_STYLE = "endArrow=classic;html=1;rounded=0;"
 
 
 class DrawioAPIClient:
     """Client for interacting with the Draw.io API."""
     
-    def __init__(self, base_url: str = "https://embed.diagrams.net"):
+    def __init__(self, base_url: str = "https://embed.diagrams.net",
+                 cache: Optional[RenderCache] = None,
+                 exporter: Optional[RemoteExporter] = None,
+                 incremental: bool = False):
         """Initialize the Draw.io API client.
         
         Args:
             base_url: The base URL for the Draw.io API
+            cache: Optional render cache reused across exports of unchanged
+                diagrams
+            exporter: Optional draw.io export server client, used for PNG,
+                JPEG and PDF export when CairoSVG is not installed
+            incremental: Keep the serialized cells of each exported
+                ``Diagram`` and re-serialize only the cells changed since
+                the previous export (see ``Diagram.changes_since``). Cell
+                dicts edited in place must then be reported with
+                ``Diagram.mark_updated`` or edited with ``update_cell``.
         """
         self.base_url = base_url
+        self.cache = cache
+        self.exporter = exporter
+        self.incremental = incremental
+        # IDs in use in the last plain-dict diagram: (cells, indexed count, ids)
+        self._plain_ids: Optional[Tuple[List[Dict[str, Any]], int, Set[str]]] = None
+        self._plain_last: Optional[Dict[str, Any]] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes get the settings, not the last diagram built
+        state = self.__dict__.copy()
+        state["_plain_ids"] = state["_plain_last"] = None
+        return state
         
-    def create_diagram(self, title: str = "New Diagram") -> Dict[str, Any]:
+    def create_diagram(self, title: str = "New Diagram") -> Diagram:
         """Create a new empty diagram.
         
         Args:
             title: The title of the new diagram
             
         Returns:
-            Dict containing diagram information
+            An indexed ``Diagram`` (a dict with ``title``, ``cells`` and
+            ``modified`` keys)
         """
         # For now, this is a placeholder that would return a local structure
         # In a real implementation, this might interact with a Draw.io server
-        return {
-            "title": title,
-            "cells": [],
-            "modified": False,
-        }
+        return Diagram(title=title)
         
-    def add_node(self, diagram: Dict[str, Any], 
+    def add_node(self, diagram: Union[Diagram, Dict[str, Any]],
                 label: str, 
                 x: float, 
                 y: float, 
@@ -75,7 +90,7 @@ class DrawioAPIClient:
             Updated diagram with the new node
         """
         # This is a simplified placeholder implementation
-        node_id = f"node_{len(diagram['cells']) + 1}"
+        node_id = self._next_id(diagram, "node")
         
         node = {
             "id": node_id,
@@ -85,15 +100,15 @@ class DrawioAPIClient:
             "y": y,
             "width": width,
             "height": height,
-            "style": style or "rounded=1;whiteSpace=wrap;html=1;"
+            "style": style or DEFAULT_NODE_STYLE
         }
         
-        diagram["cells"].append(node)
+        self._append_cell(diagram, node)
         diagram["modified"] = True
         
         return diagram
         
-    def add_edge(self, diagram: Dict[str, Any],
+    def add_edge(self, diagram: Union[Diagram, Dict[str, Any]],
                 source_id: str,
                 target_id: str,
                 label: Optional[str] = None,
@@ -111,7 +126,7 @@ class DrawioAPIClient:
             Updated diagram with the new edge
         """
         # This is a simplified placeholder implementation
-        edge_id = f"edge_{len(diagram['cells']) + 1}"
+        edge_id = self._next_id(diagram, "edge")
         
         edge = {
             "id": edge_id,
@@ -119,202 +134,416 @@ class DrawioAPIClient:
             "source": source_id,
             "target": target_id,
             "label": label,
-            "style": style or "endArrow=classic;html=1;rounded=0;"
+            "style": style or DEFAULT_EDGE_STYLE
         }
         
-        diagram["cells"].append(edge)
+        self._append_cell(diagram, edge)
         diagram["modified"] = True
         
         return diagram
+
+    def add_nodes(self, diagram: Union[Diagram, Dict[str, Any]],
+                  records: Any,
+                  width: float = 120,
+                  height: float = 60,
+                  style: Optional[str] = None) -> List[str]:
+        """Add many nodes to the diagram in one call.
+
+        Args:
+            diagram: The diagram to add the nodes to
+            records: The nodes, as an iterable of dicts with ``label``, ``x``,
+                ``y`` and optional ``width``, ``height`` and ``style`` keys, an
+                iterable of ``(label, x, y[, width, height[, style]])`` tuples, a
+                mapping of those column names to sequences or NumPy arrays, a
+                pandas DataFrame or a NumPy (structured) array
+            width: The width of nodes that don't specify one
+            height: The height of nodes that don't specify one
+            style: The style of nodes that don't specify one
+
+        Returns:
+            The IDs assigned to the new nodes, in record order
+        """
+        columns = bulk.node_columns(records, width=width, height=height, style=style)
+        node_ids = self._next_ids(diagram, "node", len(columns["x"]))
+        with bulk.gc_paused():
+            cells = bulk.make_nodes(node_ids, columns, DEFAULT_NODE_STYLE)
+            self._extend_cells(diagram, cells)
+        diagram["modified"] = True
+        return node_ids
+
+    def add_edges(self, diagram: Union[Diagram, Dict[str, Any]],
+                  records: Any,
+                  style: Optional[str] = None) -> List[str]:
+        """Add many edges to the diagram in one call.
+
+        Args:
+            diagram: The diagram to add the edges to
+            records: The edges, as an iterable of dicts with ``source``,
+                ``target`` and optional ``label`` and ``style`` keys, an iterable
+                of ``(source, target[, label[, style]])`` tuples, a mapping of
+                those column names to sequences or arrays, a pandas DataFrame
+                or a NumPy (structured) array
+            style: The style of edges that don't specify one
+
+        Returns:
+            The IDs assigned to the new edges, in record order
+        """
+        columns = bulk.edge_columns(records, style=style)
+        edge_ids = self._next_ids(diagram, "edge", len(columns["source"]))
+        with bulk.gc_paused():
+            cells = bulk.make_edges(edge_ids, columns, DEFAULT_EDGE_STYLE)
+            self._extend_cells(diagram, cells)
+        diagram["modified"] = True
+        return edge_ids
+
+    def layout(self, diagram: Union[Diagram, Dict[str, Any]],
+               algorithm: str = "layered",
+               **options: Any) -> Dict[str, Any]:
+        """Compute node positions automatically.
+
+        Args:
+            diagram: The diagram to lay out
+            algorithm: The layout algorithm (currently "layered")
+            **options: Options of the algorithm, e.g. ``direction="LR"`` for
+                the layered layout (see ``drawio_api.layout``)
+
+        Returns:
+            Updated diagram with the nodes moved
+        """
+        try:
+            layout_function = layout.LAYOUTS[algorithm]
+        except KeyError:
+            raise ValueError(f"Unsupported layout algorithm: {algorithm}") from None
+        layout_function(diagram, **options)
+        diagram["modified"] = True
+        return diagram
+
+    def route_edges(self, diagram: Union[Diagram, Dict[str, Any]],
+                    edge_ids: Optional[List[str]] = None,
+                    margin: float = 10) -> Dict[str, Any]:
+        """Route edges orthogonally around the nodes in their way.
+
+        The bend points are stored on each edge and exported as SVG paths
+        and as ``mxPoint`` waypoints in the XML formats.
+
+        Args:
+            diagram: The diagram whose edges to route
+            edge_ids: The edges to route (defaults to every orthogonal edge)
+            margin: Minimum clearance between an edge and the nodes it avoids
+
+        Returns:
+            Updated diagram with the edge waypoints set
+
+        Raises:
+            KeyError: If one of ``edge_ids`` is not an edge of the diagram
+        """
+        routing.route_edges(diagram, edge_ids, margin)
+        return diagram
+
+    def move_node(self, diagram: Union[Diagram, Dict[str, Any]],
+                  node_id: str,
+                  x: float,
+                  y: float) -> Dict[str, Any]:
+        """Move a node to a new position.
+
+        Args:
+            diagram: The diagram containing the node
+            node_id: The ID of the node to move
+            x: The new x-coordinate of the node
+            y: The new y-coordinate of the node
+
+        Returns:
+            Updated diagram with the node moved
+        """
+        Diagram.from_dict(diagram).move_node(node_id, x, y)
+        diagram["modified"] = True
+        return diagram
+
+    def update_cell(self, diagram: Union[Diagram, Dict[str, Any]],
+                    cell_id: str,
+                    **fields: Any) -> Dict[str, Any]:
+        """Change fields of a node or edge, e.g. its label, style or size.
+
+        Args:
+            diagram: The diagram containing the cell
+            cell_id: The ID of the cell to change
+            **fields: The new values, e.g. ``label="Done"``
+
+        Returns:
+            Updated diagram with the cell changed
+        """
+        Diagram.from_dict(diagram).update_cell(cell_id, **fields)
+        diagram["modified"] = True
+        return diagram
+
+    def remove_cell(self, diagram: Union[Diagram, Dict[str, Any]],
+                    cell_id: str) -> Dict[str, Any]:
+        """Remove a node or edge; removing a node also removes its edges.
+
+        Args:
+            diagram: The diagram containing the cell
+            cell_id: The ID of the cell to remove
+
+        Returns:
+            Updated diagram without the cell
+        """
+        Diagram.from_dict(diagram).remove_cell(cell_id)
+        diagram["modified"] = True
+        return diagram
+
+    def _next_id(self, diagram: Union[Diagram, Dict[str, Any]], prefix: str) -> str:
+        """Return ``<prefix>_<n>`` for the next cell, skipping IDs in use."""
+        return self._next_ids(diagram, prefix, 1)[0]
+
+    def _next_ids(self, diagram: Union[Diagram, Dict[str, Any]], prefix: str,
+                  count: int) -> List[str]:
+        """Return the IDs that ``count`` consecutive single additions would assign."""
+        start = len(diagram["cells"]) + 1
+        cell_ids = [f"{prefix}_{number}" for number in range(start, start + count)]
+        if not diagram["cells"]:
+            return cell_ids
+        used = self._used_ids(diagram)
+        if used.isdisjoint(cell_ids):
+            return cell_ids
+
+        cell_ids = []
+        number = start
+        while len(cell_ids) < count:
+            cell_id = f"{prefix}_{number}"
+            if cell_id not in used:
+                cell_ids.append(cell_id)
+            number += 1
+        return cell_ids
+
+    def _used_ids(self, diagram: Union[Diagram, Dict[str, Any]]) -> AbstractSet[str]:
+        """Return the cell IDs in use.
+
+        Plain dicts have no index, so the IDs of the last one seen are kept
+        and extended with the cells appended since. The set is rebuilt when
+        the cell list was replaced or a cell was removed from it, which
+        moves the last indexed cell away from its position.
+        """
+        if isinstance(diagram, Diagram):
+            return diagram.cell_ids()
+        cells = diagram["cells"]
+        start = 0
+        used: Set[str] = set()
+        if self._plain_ids is not None and self._plain_ids[0] is cells:
+            _, count, ids = self._plain_ids
+            if count <= len(cells) and cells[count - 1] is self._plain_last:
+                start, used = count, ids
+        used.update([cell.get("id") for cell in cells[start:]])
+        self._plain_ids = (cells, len(cells), used)
+        self._plain_last = cells[-1]
+        return used
+
+    @staticmethod
+    def _append_cell(diagram: Union[Diagram, Dict[str, Any]],
+                     cell: Dict[str, Any]) -> None:
+        """Append a cell, keeping the index of a ``Diagram`` up to date."""
+        if isinstance(diagram, Diagram):
+            diagram.add_cell(cell)
+        else:
+            diagram["cells"].append(cell)
+
+    @staticmethod
+    def _extend_cells(diagram: Union[Diagram, Dict[str, Any]],
+                      cells: List[Dict[str, Any]]) -> None:
+        """Append many cells, keeping the index of a ``Diagram`` up to date."""
+        if isinstance(diagram, Diagram):
+            diagram.add_cells(cells)
+        else:
+            diagram["cells"].extend(cells)
     
-    def export_diagram(self, diagram: Dict[str, Any], format: str = "json") -> str:
+    def export_diagram(self, diagram: Union[Diagram, Dict[str, Any]],
+                       format: str = "json", pretty: bool = False,
+                       compressed: bool = False) -> str:
         """Export the diagram to the specified format.
         
         Args:
             diagram: The diagram to export
             format: The export format (json, xml, drawio)
+            pretty: Indent XML output (xml and drawio formats only)
+            compressed: Store the page deflated and base64-encoded like
+                draw.io does (drawio format only)
             
         Returns:
             The exported diagram data
         """
-        # Create a copy of the diagram to avoid modifying the original
-        diagram_copy = diagram.copy()
-        
+        if compressed and format.lower() != "drawio":
+            raise ValueError("Compression is only supported for the drawio format")
+        if self.incremental and isinstance(diagram, Diagram):
+            # Cheaper than hashing the diagram for the render cache
+            return incremental.export(diagram, format, pretty, compressed)
         if format.lower() == "json":
-            return json.dumps(diagram_copy)
-        elif format.lower() == "xml":
-            return self._convert_to_xml(diagram_copy)
+            return json.dumps(diagram)
+        elif format.lower() not in ("xml", "drawio"):
+            raise ValueError(f"Unsupported format: {format}")
+
+        key = None
+        if self.cache is not None:
+            key = RenderCache.key(RenderCache.digest(diagram), kind="document",
+                                  format=format.lower(), pretty=pretty,
+                                  compressed=compressed)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached.decode("utf-8")
+
+        if format.lower() == "xml":
+            document = "".join(serializer.iter_xml(diagram, pretty))
+        else:
+            document = "".join(serializer.iter_drawio(diagram, pretty,
+                                                      compressed=compressed))
+        if self.cache is not None and key is not None:
+            self.cache.put(key, document.encode("utf-8"))
+        return document
+
+    def write_diagram(self, diagram: Union[Diagram, Dict[str, Any]], stream: IO,
+                      format: str = "drawio", pretty: bool = False,
+                      compressed: bool = False) -> None:
+        """Serialize the diagram directly to a writable stream.
+        
+        Args:
+            diagram: The diagram to export
+            stream: Destination text or binary stream
+            format: The export format (xml, drawio)
+            pretty: Indent the XML output
+            compressed: Deflate and base64-encode the page (drawio format only)
+        """
+        if compressed and format.lower() != "drawio":
+            raise ValueError("Compression is only supported for the drawio format")
+        if format.lower() == "xml":
+            serializer.write_xml(diagram, stream, pretty)
         elif format.lower() == "drawio":
-            # Mark this diagram for drawio format
-            diagram_copy["_format"] = "drawio"
-            # .drawio format is XML wrapped in a specific way for Draw.io
-            xml_content = self._convert_to_xml(diagram_copy)
-            return self._create_drawio_file(xml_content, diagram_copy.get("title", "Diagram"))
+            serializer.write_drawio(diagram, stream, pretty, compressed)
         else:
             raise ValueError(f"Unsupported format: {format}")
     
-    def _create_drawio_file(self, xml_content: str, title: str) -> str:
-        """Create a .drawio file format from XML content.
-        
+    def load_diagram(self, source: Union[str, "os.PathLike[str]", IO],
+                     title: Optional[str] = None) -> Diagram:
+        """Load a diagram from a .drawio file or mxGraphModel XML document.
+
+        The file is parsed incrementally, so large exports can be loaded
+        without building the whole XML tree in memory. Compressed pages are
+        decompressed transparently.
+
         Args:
-            xml_content: The diagram content in XML format
-            title: The diagram title
-            
+            source: A file path or a readable stream
+            title: Optional title (defaults to the page name or file name)
+
         Returns:
-            The diagram in .drawio format
+            The loaded diagram
         """
-        # Strip XML declaration as it will be included in the mxfile
-        xml_content = xml_content.replace('<?xml version="1.0" encoding="UTF-8"?>\n', '')
-        
-        # In Draw.io format, the diagram content is stored as uncompressed XML
-        # (No URL-safe Base64 encoding as originally implemented)
-        
-        # Create the mxfile structure used by Draw.io
-        drawio_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<mxfile host="app.diagrams.net" modified="{int(time.time())}" agent="Draw.io API Client" version="21.1.2" type="device">
-  <diagram id="diagram-id" name="{title}">
-    <mxGraphModel dx="1326" dy="798" grid="1" gridSize="10" guides="1" tooltips="1" connect="1" arrows="1" fold="1" page="1" pageScale="1" pageWidth="850" pageHeight="1100">
-      {xml_content.strip()}
-    </mxGraphModel>
-  </diagram>
-</mxfile>"""
-        
-        return drawio_content
-    
-    def _convert_to_xml(self, diagram: Dict[str, Any]) -> str:
-        """Convert a diagram from JSON to XML format compatible with Draw.io."""
-        # For the drawio format, we'll just create the inner cells part
-        # as the mxGraphModel wrapper will be added by _create_drawio_file
-        
-        # Create the root cell
-        root = ET.Element("root")
-        
-        # Create the parent cell (cell 0)
-        cell0 = ET.SubElement(root, "mxCell")
-        cell0.set("id", "0")
-        
-        # Create the layer cell (cell 1)
-        cell1 = ET.SubElement(root, "mxCell")
-        cell1.set("id", "1")
-        cell1.set("parent", "0")
-        
-        # Add the cells from the diagram
-        for cell in diagram["cells"]:
-            if cell["type"] == "node":
-                mx_cell = ET.SubElement(root, "mxCell")
-                mx_cell.set("id", cell["id"])
-                mx_cell.set("value", cell["label"])
-                mx_cell.set("style", cell["style"])
-                mx_cell.set("parent", "1")
-                mx_cell.set("vertex", "1")
-                
-                geometry = ET.SubElement(mx_cell, "mxGeometry")
-                geometry.set("x", str(cell["x"]))
-                geometry.set("y", str(cell["y"]))
-                geometry.set("width", str(cell["width"]))
-                geometry.set("height", str(cell["height"]))
-                geometry.set("as", "geometry")
-                
-            elif cell["type"] == "edge":
-                mx_cell = ET.SubElement(root, "mxCell")
-                mx_cell.set("id", cell["id"])
-                if cell.get("label"):
-                    mx_cell.set("value", cell["label"])
-                mx_cell.set("style", cell["style"])
-                mx_cell.set("parent", "1")
-                mx_cell.set("source", cell["source"])
-                mx_cell.set("target", cell["target"])
-                mx_cell.set("edge", "1")
-                
-                geometry = ET.SubElement(mx_cell, "mxGeometry")
-                geometry.set("relative", "1")
-                geometry.set("as", "geometry")
-        
-        # Convert to string with XML declaration for standard XML format
-        rough_string = ET.tostring(root, encoding="utf-8")
-        reparsed = xml.dom.minidom.parseString(rough_string)
-        
-        # For non-drawio format (just XML), we'll wrap it in mxGraphModel
-        if diagram.get("_format", "") != "drawio":
-            # Wrap in mxGraphModel for standard XML output
-            full_xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-            full_xml += '<mxGraphModel dx="1326" dy="798" grid="1" gridSize="10" guides="1" '
-            full_xml += 'tooltips="1" connect="1" arrows="1" fold="1" page="1" pageScale="1" '
-            full_xml += 'pageWidth="850" pageHeight="1100">\n'
-            full_xml += reparsed.toprettyxml(indent="  ").replace('<?xml version="1.0" ?>\n', '')
-            full_xml += '</mxGraphModel>'
-            return full_xml
-        
-        # For drawio format, just return the inner XML
-        return reparsed.toprettyxml(indent="  ").replace('<?xml version="1.0" ?>\n', '')
-    
-    def export_to_image(self, diagram: Dict[str, Any], 
-                      output_path: str, 
-                      format: str = "png", 
-                      transparent: bool = False,
-                      scale: float = 1.0,
-                      bg: str = "") -> str:
+        return loader.load_diagram(source, title)
+
+    def create_document(self, *titles: str) -> Document:
+        """Create a multi-page document.
+
+        Args:
+            *titles: Names of the empty pages to start with
+
+        Returns:
+            The document; add content through ``document["Name"].diagram``
+        """
+        document = Document()
+        for title in titles:
+            document.add_page(title)
+        return document
+
+    def load_document(self,
+                      source: Union[str, "os.PathLike[str]", IO, bytes]) -> Document:
+        """Load every page of a .drawio file, parsing each page on first access.
+
+        Args:
+            source: A file path, a readable stream or the document bytes
+
+        Returns:
+            The document; ``page.diagram`` parses a page on first access
+        """
+        return loader.load_document(source)
+
+    def export_document(self, document: Document, pretty: bool = False,
+                        compressed: bool = False) -> str:
+        """Export a multi-page document to .drawio XML.
+
+        Pages that were loaded from a file but never accessed are copied
+        without being parsed; their content is only decompressed or
+        compressed to match ``compressed``.
+
+        Args:
+            document: The document to export
+            pretty: Indent the XML of loaded and new pages (copied pages keep
+                their own layout)
+            compressed: Deflate and base64-encode every page
+
+        Returns:
+            The .drawio document
+        """
+        return "".join(serializer.iter_document(document, pretty,
+                                                compressed=compressed))
+
+    def write_document(self, document: Document, stream: IO, pretty: bool = False,
+                       compressed: bool = False) -> None:
+        """Serialize a multi-page document directly to a writable stream.
+
+        Args:
+            document: The document to export
+            stream: Destination text or binary stream
+            pretty: Indent the XML of loaded and new pages (copied pages keep
+                their own layout)
+            compressed: Deflate and base64-encode every page
+        """
+        serializer.write_document(document, stream, pretty, compressed)
+
+    def export_to_image(self, diagram: Union[Diagram, Dict[str, Any]],
+                        output_path: Optional[str] = None,
+                        format: str = "png",
+                        transparent: bool = False,
+                        scale: float = 1.0,
+                        bg: str = "",
+                        stream: Optional[IO] = None) -> Optional[str]:
         """Export the diagram to an image file.
         
         Args:
             diagram: The diagram to export
-            output_path: Path where the image will be saved
+            output_path: Path where the image will be saved (ignored when
+                ``stream`` is given)
             format: Image format (png, jpg, svg, pdf)
             transparent: Whether the background should be transparent (png only)
             scale: Scale factor for the output image (1.0 = 100%)
             bg: Background color (e.g. '#ffffff')
+            stream: Optional writable stream to write the image to instead of
+                a file (binary, or text for svg)
             
         Returns:
-            Path to the saved image file
+            Path to the saved image file, or None when writing to ``stream``
+
+        Raises:
+            ValueError: If neither ``output_path`` nor ``stream`` is given
         """
+        if stream is not None:
+            if format.lower() == 'svg':
+                self.write_svg(diagram, stream)
+            else:
+                stream.write(self.render_image(diagram, format, transparent, scale, bg))
+            return None
+        if output_path is None:
+            raise ValueError("Either output_path or stream must be given")
+
         # For SVG format, we'll use our own implementation
         if format.lower() == 'svg':
+            if self.cache is not None or self.incremental:
+                self._write_image_file(diagram, output_path, format, transparent,
+                                       scale, bg)
+                return os.path.abspath(output_path)
             return self._create_svg_from_diagram(diagram, output_path)
             
-        # For PNG, JPG and PDF formats, we'll use CairoSVG if available
-        if format.lower() in ['png', 'jpg', 'jpeg', 'pdf'] and CAIROSVG_AVAILABLE:
-            # First create an SVG file
-            with tempfile.NamedTemporaryFile(suffix='.svg', delete=False) as temp_svg:
-                svg_path = temp_svg.name
-            
-            # Generate SVG file
-            self._create_svg_from_diagram(diagram, svg_path)
-            
-            # Convert to the target format using CairoSVG
+        # For PNG, JPG and PDF formats, we'll use CairoSVG or the export server
+        if format.lower() in raster.RASTER_FORMATS and self._can_rasterize():
+            # Convert in memory, then write the result in one go
             try:
-                if format.lower() == 'png':
-                    # Handle transparency
-                    if transparent:
-                        cairosvg.svg2png(url=svg_path, write_to=output_path, 
-                                        scale=scale, background_color="transparent")
-                    else:
-                        background_color = bg if bg else "#ffffff"
-                        cairosvg.svg2png(url=svg_path, write_to=output_path, 
-                                        scale=scale, background_color=background_color)
-                elif format.lower() in ['jpg', 'jpeg']:
-                    # JPEG doesn't support transparency
-                    background_color = bg if bg else "#ffffff"
-                    cairosvg.svg2png(url=svg_path, write_to=output_path + ".png", 
-                                    scale=scale, background_color=background_color)
-                    
-                    # Convert PNG to JPEG using Pillow
-                    if PILLOW_AVAILABLE:
-                        with Image.open(output_path + ".png") as img:
-                            # Save as JPEG with white background
-                            rgb_img = img.convert('RGB')
-                            rgb_img.save(output_path, quality=95)
-                        # Remove temporary PNG
-                        os.remove(output_path + ".png")
-                    else:
-                        # If Pillow is not available, just keep the PNG
-                        os.rename(output_path + ".png", output_path)
-                        print("Warning: Pillow not available. Saved as PNG instead of JPEG.")
-                        
-                elif format.lower() == 'pdf':
-                    cairosvg.svg2pdf(url=svg_path, write_to=output_path, scale=scale)
-                
-                # Clean up temporary SVG file
-                os.remove(svg_path)
+                self._write_image_file(diagram, output_path, format, transparent,
+                                       scale, bg)
                 
                 print(f"Successfully exported diagram to {os.path.basename(output_path)}")
                 return os.path.abspath(output_path)
@@ -322,8 +551,6 @@ class DrawioAPIClient:
             except Exception as e:
                 print(f"Error converting SVG to {format.upper()}: {str(e)}")
                 print("Falling back to HTML export helper method...")
-                # If conversion fails, fall back to the original method
-                os.remove(svg_path)
         
         # If we get here, either:
         # 1. The format is not supported for direct conversion
@@ -331,7 +558,7 @@ class DrawioAPIClient:
         # 3. The conversion failed
         
         # First convert the diagram to XML
-        xml_data = self._convert_to_xml(diagram)
+        xml_data = self.export_diagram(diagram, format="xml")
         bounds = self.calculate_diagram_size(diagram)
         encoded_xml = urllib.parse.quote(xml_data)
         
@@ -376,7 +603,7 @@ class DrawioAPIClient:
             f.write(html_content)
         
         library_advice = ""
-        if not CAIROSVG_AVAILABLE:
+        if not raster.CAIROSVG_AVAILABLE:
             library_advice = f"""
 NOTE: For automatic {format.upper()} generation, install CairoSVG and Pillow:
     pip install cairosvg Pillow
@@ -404,7 +631,275 @@ Use the SVG format instead, which can be generated directly:
             
         return os.path.abspath(output_path)
         
-    def _create_svg_from_diagram(self, diagram: Dict[str, Any], output_path: str) -> str:
+    def render_image(self, diagram: Union[Diagram, Dict[str, Any]],
+                     format: str = "png",
+                     transparent: bool = False,
+                     scale: float = 1.0,
+                     bg: str = "") -> bytes:
+        """Render the diagram to image bytes entirely in memory.
+
+        Args:
+            diagram: The diagram to render
+            format: Image format (png, jpg, svg, pdf)
+            transparent: Whether the background should be transparent (png only)
+            scale: Scale factor for the output image (1.0 = 100%)
+            bg: Background color (e.g. '#ffffff')
+
+        Returns:
+            The encoded image
+
+        Raises:
+            ImportError: If CairoSVG is needed for the format but neither it
+                nor an export server is available
+            ValueError: If the format is not supported
+            ExportServerError: If the export server fails
+        """
+        key = self._image_cache_key(diagram, None, format, transparent, scale, bg)
+        if self.cache is not None and key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        image_data = self._render_image_data(diagram, format, transparent, scale, bg)
+        if self.cache is not None and key is not None:
+            self.cache.put(key, image_data)
+        return image_data
+
+    def _render_image_data(self, diagram: Union[Diagram, Dict[str, Any]],
+                           format: str, transparent: bool, scale: float,
+                           bg: str) -> bytes:
+        """Render image bytes without consulting the cache."""
+        return self._render_many(diagram, [(format, transparent, scale, bg)])[0]
+
+    def _render_many(self, diagram: Union[Diagram, Dict[str, Any]],
+                     options: List[Tuple[str, bool, float, str]]) -> List[bytes]:
+        """Render several images of a diagram, locally or on the export server."""
+        exporter = self.exporter
+        if exporter is not None and self._use_exporter(options):
+            xml = "".join(serializer.iter_drawio(diagram))
+            svg_data = None
+            images = []
+            for format, transparent, scale, bg in options:
+                if format.lower() == 'svg':
+                    svg_data = svg_data or self._render_svg_bytes(diagram)
+                    images.append(svg_data)
+                else:
+                    images.append(exporter.export(xml, format, scale, transparent, bg))
+            return images
+        return raster.render_many(self._render_svg_bytes(diagram), options)
+
+    def _can_rasterize(self) -> bool:
+        """Whether PNG, JPEG and PDF images can be produced."""
+        return raster.CAIROSVG_AVAILABLE or self.exporter is not None
+
+    def _use_exporter(self, options: List[Tuple[str, bool, float, str]]) -> bool:
+        """Whether raster images go to the export server instead of CairoSVG."""
+        return (self.exporter is not None and not raster.CAIROSVG_AVAILABLE and
+                any(format.lower() != 'svg' for format, _, _, _ in options))
+
+    def _render_svg_bytes(self, diagram: Union[Diagram, Dict[str, Any]]) -> bytes:
+        """Render the diagram to an in-memory SVG document."""
+        bounds = self.calculate_diagram_size(diagram)
+        if self.incremental and isinstance(diagram, Diagram):
+            return incremental.render_svg(diagram, bounds).encode("utf-8")
+        diagram = Diagram.from_dict(diagram)
+        return "".join(svg.iter_svg(diagram, bounds)).encode("utf-8")
+
+    def _write_image_file(self, diagram: Union[Diagram, Dict[str, Any]],
+                          output_path: str, format: str, transparent: bool,
+                          scale: float, bg: str) -> None:
+        """Render an image to a file, copying it from the cache when possible."""
+        key = self._image_cache_key(diagram, None, format, transparent, scale, bg)
+        if (self.cache is not None and key is not None
+                and self.cache.copy_to(key, output_path)):
+            return
+        image_data = self._render_image_data(diagram, format, transparent, scale, bg)
+        if self.cache is not None and key is not None:
+            self.cache.put(key, image_data)
+        with open(output_path, 'wb') as f:
+            f.write(image_data)
+
+    def _image_cache_key(self, diagram: Union[Diagram, Dict[str, Any]],
+                         digest: Optional[str], format: str, transparent: bool,
+                         scale: float, bg: str) -> Optional[str]:
+        """Return the cache key of an image export, or None without a cache.
+
+        Only the options that affect the output of a format are part of the
+        key, so e.g. an SVG is shared regardless of ``scale``.
+        """
+        if self.cache is None:
+            return None
+        format = format.lower()
+        if format == 'jpeg':
+            format = 'jpg'
+        params = {"format": format}  # type: Dict[str, Any]
+        if format in ('png', 'jpg', 'pdf'):
+            params["scale"] = scale
+        if format == 'png' and transparent:
+            params["transparent"] = True
+        elif format in ('png', 'jpg'):
+            params["bg"] = bg or "#ffffff"
+        if digest is None:
+            digest = RenderCache.digest(diagram)
+        return RenderCache.key(digest, kind="image", **params)
+
+    def export_many(self, diagram: Union[Diagram, Dict[str, Any]],
+                    targets: Iterable[Dict[str, Any]]) -> List[Optional[str]]:
+        """Export the diagram to several images from a single render pass.
+
+        The SVG and the diagram bounds are computed once and fanned out to
+        every target; raster targets share one parsed SVG tree.
+
+        Args:
+            diagram: The diagram to export
+            targets: One dict per output with a ``path`` or ``stream`` key and
+                optional ``format`` (inferred from the path extension,
+                default png), ``transparent``, ``scale`` and ``bg`` keys
+
+        Returns:
+            Absolute path of each written file (None for stream targets)
+
+        Example:
+            client.export_many(diagram, [
+                {"path": "flowchart.svg"},
+                {"path": "flowchart.png", "transparent": True},
+                {"path": "flowchart_large.png", "scale": 2.0},
+                {"path": "flowchart.pdf"},
+            ])
+        """
+        targets = list(targets)
+        formats = [self._target_format(target) for target in targets]
+        options = [(format,
+                    target.get("transparent", False),
+                    target.get("scale", 1.0),
+                    target.get("bg", ""))
+                   for format, target in zip(formats, targets)]
+        digest = RenderCache.digest(diagram) if self.cache is not None else None
+        keys = [self._image_cache_key(diagram, digest, *option) for option in options]
+
+        # Serve what we can from the cache and render everything else at once
+        results = [None] * len(targets)  # type: List[Optional[str]]
+        pending = []
+        cache = self.cache
+        for i, (target, key) in enumerate(zip(targets, keys)):
+            if cache is None or key is None:
+                pending.append(i)
+                continue
+            if target.get("stream") is None and cache.copy_to(key, target["path"]):
+                results[i] = os.path.abspath(target["path"])
+                continue
+            cached = cache.get(key) if target.get("stream") is not None else None
+            if cached is not None:
+                target["stream"].write(cached)
+                continue
+            pending.append(i)
+
+        if pending:
+            images = self._render_many(diagram, [options[i] for i in pending])
+            for i, image_data in zip(pending, images):
+                key = keys[i]
+                if cache is not None and key is not None:
+                    cache.put(key, image_data)
+                target = targets[i]
+                if target.get("stream") is not None:
+                    target["stream"].write(image_data)
+                else:
+                    with open(target["path"], 'wb') as f:
+                        f.write(image_data)
+                    results[i] = os.path.abspath(target["path"])
+        return results
+
+    def export_batch(self, diagrams: Iterable[Union[Diagram, Dict[str, Any]]],
+                     outputs: Iterable[Union[str, List[Dict[str, Any]]]],
+                     workers: Optional[int] = None) -> List["batch.BatchResult"]:
+        """Export many diagrams in parallel across a process pool.
+
+        Diagrams are sent to the workers as compact tuple payloads; SVG
+        generation and rasterization both run in the workers.
+
+        Args:
+            diagrams: The diagrams to export
+            outputs: For each diagram, an output path (format inferred from
+                the extension) or a list of ``export_many`` targets
+            workers: Number of worker processes (defaults to the CPU count)
+
+        Returns:
+            One ``BatchResult(position, paths, error)`` per diagram; failures,
+            including worker processes that die, are reported in ``error``
+            instead of aborting the batch
+        """
+        return batch.export_batch(self, diagrams, outputs, workers)
+
+    def render_viewport(self, diagram: Union[Diagram, Dict[str, Any]],
+                        viewport: Tuple[float, float, float, float],
+                        format: str = "png",
+                        scale: float = 1.0,
+                        transparent: bool = False,
+                        bg: str = "") -> bytes:
+        """Render only the part of the diagram inside a viewport.
+
+        Cells outside the viewport are skipped, so rendering one corner of
+        a huge diagram costs about as much as the cells visible there.
+
+        Args:
+            diagram: The diagram to render
+            viewport: The (min_x, min_y, max_x, max_y) area to render
+            format: Image format (png, jpg, svg, pdf)
+            scale: Scale factor for the output image (1.0 = 100%)
+            transparent: Whether the background should be transparent (png only)
+            bg: Background color (e.g. '#ffffff')
+
+        Returns:
+            The encoded image
+        """
+        return tiles.render_viewport(diagram, viewport, format, scale, transparent, bg)
+
+    def export_tiles(self, diagram: Union[Diagram, Dict[str, Any]],
+                     output: str,
+                     format: str = "png",
+                     tile_size: int = 256,
+                     min_zoom: int = 0,
+                     max_zoom: Optional[int] = None,
+                     transparent: bool = False,
+                     bg: str = "",
+                     workers: Optional[int] = None) -> Dict[str, Any]:
+        """Export the diagram as a pyramid of fixed-size tiles for map-style viewers.
+
+        At zoom level ``z`` the longer side of the diagram spans ``2 ** z``
+        tiles. Each tile renders only the cells overlapping it, tiles are
+        rendered in parallel across a process pool, and empty tiles are
+        not written.
+
+        Args:
+            diagram: The diagram to export
+            output: A directory (tiles are written to ``{z}/{x}/{y}.png``
+                next to a ``metadata.json``) or a ``.mbtiles`` file
+            format: Tile format (png, jpg, svg)
+            tile_size: Width and height of a tile in pixels
+            min_zoom: The most zoomed-out level to render
+            max_zoom: The most zoomed-in level (defaults to the first level
+                showing the diagram at 100% or more)
+            transparent: Whether the background should be transparent (png only)
+            bg: Background color (e.g. '#ffffff')
+            workers: Number of worker processes (defaults to the CPU count)
+
+        Returns:
+            The pyramid metadata (zoom range, bounds, tile size and the
+            number of tiles written)
+        """
+        return tiles.render_tiles(diagram, output, format, tile_size, min_zoom,
+                                  max_zoom, transparent, bg, workers)
+
+    @staticmethod
+    def _target_format(target: Dict[str, Any]) -> str:
+        """Return the export format of a target, inferring it from its path."""
+        if target.get("format"):
+            return target["format"]
+        extension = os.path.splitext(target.get("path") or "")[1]
+        return extension[1:].lower() or "png"
+
+    def _create_svg_from_diagram(self, diagram: Union[Diagram, Dict[str, Any]],
+                                 output_path: str) -> str:
         """Create an SVG file from a diagram.
         
         Args:
@@ -414,191 +909,33 @@ Use the SVG format instead, which can be generated directly:
         Returns:
             Absolute path to the saved SVG file
         """
-        # Calculate diagram bounds
-        bounds = self.calculate_diagram_size(diagram)
-        min_x, min_y, max_x, max_y = bounds
-        width = max_x - min_x
-        height = max_y - min_y
-        
-        # Start SVG file with the right size and arrow marker definition - simplified modern format
-        svg_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<svg xmlns="http://www.w3.org/2000/svg" 
-     xmlns:xlink="http://www.w3.org/1999/xlink"
-     width="{width}" height="{height}" 
-     viewBox="{min_x} {min_y} {width} {height}">
-     
-    <defs>
-        <marker id="arrow" markerWidth="10" markerHeight="10" refX="9" refY="3" orient="auto" markerUnits="strokeWidth">
-            <path d="M0,0 L0,6 L9,3 z" fill="#000"/>
-        </marker>
-    </defs>
-    
-    <!-- White background -->
-    <rect x="{min_x}" y="{min_y}" width="{width}" height="{height}" fill="white"/>
-"""
-        
-        # For each node in the diagram, create an SVG element
-        for cell in diagram["cells"]:
-            if cell["type"] == "node":
-                x, y = cell["x"], cell["y"]
-                w, h = cell["width"], cell["height"]
-                label = cell["label"]
-                
-                # Parse the style to get fill, stroke, etc.
-                style = cell["style"]
-                fill_color = "#dae8fc"  # Default blue fill
-                stroke_color = "#6c8ebf"  # Default blue stroke
-                
-                # Extract style properties
-                style_props = dict(prop.split("=") for prop in style.split(";") if "=" in prop)
-                
-                if "fillColor" in style_props:
-                    fill_color = style_props["fillColor"]
-                if "strokeColor" in style_props:
-                    stroke_color = style_props["strokeColor"]
-                
-                # Determine shape type from style
-                shape_type = "rect"
-                rx = 6  # Default rounded corners
-                if "rounded=0" in style:
-                    rx = 0
-                if "rhombus" in style:
-                    shape_type = "polygon"
-                    points = f"{x},{y+h/2} {x+w/2},{y} {x+w},{y+h/2} {x+w/2},{y+h}"
-                elif "ellipse" in style:
-                    shape_type = "ellipse"
-                    cx, cy = x + w/2, y + h/2
-                    rx, ry = w/2, h/2
-                elif "cylinder" in style:
-                    shape_type = "cylinder"
-                    cylinder_height = min(h * 0.3, 20)  # Height of the cylinder top part (proportional to height)
-                    
-                # Create the shape element
-                if shape_type == "rect":
-                    svg_content += f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{rx}" fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                elif shape_type == "ellipse":
-                    svg_content += f'<ellipse cx="{cx}" cy="{cy}" rx="{rx}" ry="{ry}" fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                elif shape_type == "polygon":
-                    svg_content += f'<polygon points="{points}" fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                elif shape_type == "cylinder":
-                    # Draw the cylinder (database) shape using a group for better organization
-                    ellipse_rx = w / 2
-                    ellipse_ry = cylinder_height / 2
-                    
-                    # Create a simpler but more reliable cylinder representation
-                    svg_content += f'<g class="database-cylinder">\n'
-                    
-                    # Body of the cylinder
-                    svg_content += f'  <rect x="{x}" y="{y + ellipse_ry}" width="{w}" height="{h - 2*ellipse_ry}" fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                    
-                    # Top ellipse (cap) of cylinder
-                    svg_content += f'  <ellipse cx="{x + ellipse_rx}" cy="{y + ellipse_ry}" rx="{ellipse_rx}" ry="{ellipse_ry}" fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                    
-                    # Bottom visible part - just the visible arc, no complete ellipse
-                    # This is the front-facing half of the bottom ellipse
-                    svg_content += f'  <path d="M {x} {y + h - ellipse_ry} Q {x + w/2} {y + h + ellipse_ry}, {x + w} {y + h - ellipse_ry}" fill="none" stroke="{stroke_color}" stroke-width="1"/>\n'
-                    
-                    # Sides of the cylinder - vertical lines connecting ellipses
-                    svg_content += f'  <line x1="{x}" y1="{y + ellipse_ry}" x2="{x}" y2="{y + h - ellipse_ry}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                    svg_content += f'  <line x1="{x + w}" y1="{y + ellipse_ry}" x2="{x + w}" y2="{y + h - ellipse_ry}" stroke="{stroke_color}" stroke-width="1"/>\n'
-                    
-                    # Close the group
-                    svg_content += f'</g>\n'
-                
-                # Add text label
-                if "\n" in label:
-                    lines = label.split("\n")
-                    line_height = 16
-                    y_offset = y + (h - (len(lines) * line_height)) / 2
-                    
-                    for i, line in enumerate(lines):
-                        text_y = y_offset + (i + 0.7) * line_height
-                        svg_content += f'<text x="{x + w/2}" y="{text_y}" text-anchor="middle" font-family="Arial" font-size="12">{line}</text>\n'
-                else:
-                    svg_content += f'<text x="{x + w/2}" y="{y + h/2 + 5}" text-anchor="middle" font-family="Arial" font-size="12">{label}</text>\n'
-        
-        # For each edge
-        for cell in diagram["cells"]:
-            if cell["type"] == "edge":
-                # Find source and target nodes
-                source_id = cell["source"]
-                target_id = cell["target"]
-                
-                source_node = None
-                target_node = None
-                
-                for node in diagram["cells"]:
-                    if node["type"] == "node":
-                        if node["id"] == source_id:
-                            source_node = node
-                        elif node["id"] == target_id:
-                            target_node = node
-                
-                if source_node and target_node:
-                    # Calculate start and end points
-                    source_x = source_node["x"] + source_node["width"] / 2
-                    source_y = source_node["y"] + source_node["height"]
-                    
-                    target_x = target_node["x"] + target_node["width"] / 2
-                    target_y = target_node["y"]
-                    
-                    # For orthogonal edges with bends
-                    if "edgeStyle=orthogonalEdgeStyle" in cell.get("style", ""):
-                        # Draw orthogonal line with intermediate point
-                        mid_y = (source_y + target_y) / 2
-                        
-                        # Path for orthogonal line
-                        path = f"M {source_x} {source_y} L {source_x} {mid_y} L {target_x} {mid_y} L {target_x} {target_y}"
-                        
-                        # Determine arrow style
-                        arrow_end = "url(#arrow)"  # Always use arrow by default
-                        
-                        stroke_color = "#000000"  # Default black
-                        style_props = dict(prop.split("=") for prop in cell.get("style", "").split(";") if "=" in prop)
-                        if "strokeColor" in style_props:
-                            stroke_color = style_props["strokeColor"]
-                            
-                        # Draw the path
-                        svg_content += f'<path d="{path}" fill="none" stroke="{stroke_color}" stroke-width="1" marker-end="{arrow_end}"/>\n'
-                        
-                        # Add label if present
-                        if cell.get("label"):
-                            # Position label at middle segment
-                            label_x = (source_x + target_x) / 2
-                            label_y = mid_y - 10
-                            
-                            # Determine text color
-                            text_color = "#000000"  # Default black
-                            if "fontColor" in style_props:
-                                text_color = style_props["fontColor"]
-                                
-                            svg_content += f'<text x="{label_x}" y="{label_y}" text-anchor="middle" font-family="Arial" font-size="12" fill="{text_color}">{cell["label"]}</text>\n'
-                            
-                    else:
-                        # Draw a straight line with an arrow
-                        svg_content += f'<line x1="{source_x}" y1="{source_y}" x2="{target_x}" y2="{target_y}" stroke="black" stroke-width="1" marker-end="url(#arrow)"/>\n'
-                        
-                        # Add label if present
-                        if cell.get("label"):
-                            # Position label along the line
-                            label_x = (source_x + target_x) / 2
-                            label_y = (source_y + target_y) / 2 - 10
-                            svg_content += f'<text x="{label_x}" y="{label_y}" text-anchor="middle" font-family="Arial" font-size="12">{cell["label"]}</text>\n'
-        
-        # Close the SVG
-        svg_content += "</svg>"
-        
-        # Save to file
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(svg_content)
+            self.write_svg(diagram, f)
             
         return os.path.abspath(output_path)
+
+    def write_svg(self, diagram: Union[Diagram, Dict[str, Any]], stream: IO) -> None:
+        """Stream the diagram as SVG to a writable text or binary stream.
+
+        The document is written incrementally in bounded chunks, so it is
+        never held in memory as a whole.
+
+        Args:
+            diagram: The diagram to render
+            stream: Destination stream (file, ``socket.makefile()``, ``io.BytesIO``...)
+        """
+        diagram = Diagram.from_dict(diagram)
+        svg.write_svg(diagram, self.calculate_diagram_size(diagram), stream)
             
-    def calculate_diagram_size(self, diagram: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    def calculate_diagram_size(
+            self, diagram: Union[Diagram, Dict[str, Any]],
+            rescan: bool = False) -> Tuple[float, float, float, float]:
         """Calculate the bounds of the diagram (min_x, min_y, max_x, max_y).
         
         Args:
             diagram: The diagram to calculate bounds for
+            rescan: Recompute the bounds from the node dicts, for geometry
+                edited in place without ``Diagram.refresh_geometry``
             
         Returns:
             Tuple of (min_x, min_y, max_x, max_y) coordinates
@@ -606,21 +943,16 @@ Use the SVG format instead, which can be generated directly:
         if not diagram["cells"]:
             return (0, 0, 800, 600)  # Default size for empty diagrams
         
-        min_x, min_y = float('inf'), float('inf')
-        max_x, max_y = float('-inf'), float('-inf')
-        
-        for cell in diagram["cells"]:
-            if cell["type"] == "node":
-                x, y = cell["x"], cell["y"]
-                width, height = cell["width"], cell["height"]
-                
-                min_x = min(min_x, x)
-                min_y = min(min_y, y)
-                max_x = max(max_x, x + width)
-                max_y = max(max_y, y + height)
+        diagram = Diagram.from_dict(diagram)
+        if rescan:
+            diagram.refresh_geometry()
+        bounds = diagram.bounds()
+        if bounds is None:
+            return (0, 0, 800, 600)  # Edges alone have no extent
+        min_x, min_y, max_x, max_y = bounds
         
         # Add some padding
-        padding = 50
+        padding = svg.PADDING
         min_x = min_x - padding  # Allow negative coordinates
         min_y = min_y - padding
         max_x = max_x + padding
@@ -0,0 +1,79 @@
+"""Encoding and decoding of compressed draw.io diagram pages.
+
+draw.io stores a compressed page as the text of its ``<diagram>`` element:
+the ``<mxGraphModel>`` XML is URI-encoded (like ``encodeURIComponent``),
+raw-deflated and then base64-encoded.
+"""
+
+import base64
+import urllib.parse
+import zlib
+from typing import Iterable, Iterator
+
+from .streams import iter_chunks
+
+# Bytes encodeURIComponent leaves alone
+_URI_SAFE = frozenset(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.!~*'()"
+)
+
+
+def uri_encode(text: str) -> str:
+    """Percent-encode text exactly like JavaScript's ``encodeURIComponent``.
+
+    Equivalent to ``urllib.parse.quote(text, safe="!*'()")`` but about twice
+    as fast on XML: each distinct unsafe byte is replaced in a single pass.
+    """
+    data = text.encode("utf-8")
+    present = set(data)
+    if 0x25 in present:
+        data = data.replace(b"%", b"%25")
+    for byte in present - _URI_SAFE:
+        if byte != 0x25:
+            data = data.replace(bytes((byte,)), b"%%%02X" % byte)
+    return data.decode("ascii")
+
+
+def compress_fragments(fragments: Iterable[str], level: int = 6) -> Iterator[str]:
+    """Compress an XML document given as fragments into a draw.io payload.
+
+    The payload is produced incrementally, so the uncompressed document is
+    never held in memory as a whole.
+
+    Args:
+        fragments: The ``<mxGraphModel>`` XML, piece by piece
+        level: zlib compression level
+
+    Yields:
+        Consecutive pieces of the base64 payload
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    pending = b""
+    for chunk in iter_chunks(fragments):
+        pending += compressor.compress(uri_encode(chunk).encode("ascii"))
+        # base64 works on 3-byte groups, so only complete groups can be emitted
+        usable = len(pending) - len(pending) % 3
+        if usable:
+            yield base64.b64encode(pending[:usable]).decode("ascii")
+            pending = pending[usable:]
+    pending += compressor.flush()
+    yield base64.b64encode(pending).decode("ascii")
+
+
+def compress(xml: str, level: int = 6) -> str:
+    """Compress an ``<mxGraphModel>`` XML string into a draw.io payload."""
+    return "".join(compress_fragments([xml], level))
+
+
+def decompress(payload: str) -> str:
+    """Decode a compressed draw.io page payload back into XML.
+
+    Args:
+        payload: The base64 text of a ``<diagram>`` element
+
+    Returns:
+        The ``<mxGraphModel>`` XML
+    """
+    data = base64.b64decode(payload.strip())
+    xml = zlib.decompress(data, -zlib.MAX_WBITS).decode("utf-8")
+    return urllib.parse.unquote(xml)
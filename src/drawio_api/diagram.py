@@ -0,0 +1,877 @@
+"""Indexed diagram model used by the Draw.io API client."""
+
+from typing import (TYPE_CHECKING, Any, Dict, Iterable, KeysView, List, Mapping,
+                    Optional, Tuple, ValuesView)
+
+from . import geometry
+from .history import (DELETE, HISTORY_DEPTH, INSERT, MISSING, SET, History,
+                      changed_fields)
+from .spatial import SpatialIndex
+
+if TYPE_CHECKING:
+    from .geometry import GeometryStore
+
+# Edge cells keyed by the ID of the node at one of their ends
+Adjacency = Dict[str, List[Dict[str, Any]]]
+# (node, values of some of its fields) pairs saved before a geometry edit
+Snapshot = List[Tuple[Dict[str, Any], Dict[str, Any]]]
+
+# Kinds of change reported by ``Diagram.changes_since``
+ADDED = "added"
+REMOVED = "removed"
+UPDATED = "updated"
+
+# Journal entries kept beyond one per cell; past that, replaying the journal
+# costs about as much as a full re-export and it is dropped
+JOURNAL_SLACK = 1024
+
+
+class Diagram(dict):
+    """A diagram that indexes its cells for constant-time lookup.
+
+    ``Diagram`` is a ``dict`` with the same ``title``, ``cells`` and
+    ``modified`` keys that ``DrawioAPIClient.create_diagram`` has always
+    returned, so code that reads ``diagram["cells"]`` keeps working. Alongside
+    the cell list it maintains an id -> cell index, separate node and edge
+    collections and per-node adjacency lists.
+
+    Cells appended directly to ``diagram["cells"]`` are picked up lazily the
+    next time the index is consulted. Node geometry is mirrored in a columnar
+    ``GeometryStore`` when NumPy is available and in a ``SpatialIndex`` for
+    region queries, both built on first use; move nodes through
+    ``move_node``, ``translate`` and ``scale`` (or call ``refresh_geometry``
+    after editing ``x``/``y``/``width``/``height`` of cell dicts directly).
+    ``bounds``, which the client's exports use, is cached the same way.
+
+    Every change made through these methods is also recorded in a change
+    journal, from which ``changes_since`` reports the cells added, removed
+    and updated since a given ``version``; incremental exports use it to
+    re-serialize only those cells. Report other in-place edits of cell
+    dicts with ``mark_updated``, or make them with ``update_cell``.
+
+    Once ``enable_history`` was called, the same changes are also recorded
+    as compact deltas that ``History.undo`` and ``History.redo`` revert and
+    apply again.
+    """
+
+    def __init__(self, title: str = "New Diagram",
+                 cells: Optional[Iterable[Dict[str, Any]]] = None,
+                 modified: bool = False,
+                 **extra: Any):
+        """Initialize the diagram.
+
+        Args:
+            title: The title of the diagram
+            cells: Optional initial cells
+            modified: Initial value of the ``modified`` flag
+            **extra: Additional keys stored on the diagram dict
+        """
+        super().__init__(title=title, cells=[], modified=modified, **extra)
+        self._version = 0
+        self._journal = []  # type: List[Tuple[str, str]]
+        self._journal_start = 0
+        # Per-cell output fragments of incremental exports, by export options
+        self._fragment_caches = {}  # type: Dict[Any, Any]
+        self._history = None  # type: Optional[History]
+        self._reset_index()
+        if cells is not None:
+            for cell in cells:
+                self.add_cell(cell)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Diagram":
+        """Return ``data`` as a ``Diagram``.
+
+        A ``Diagram`` is returned unchanged. For a plain diagram dict the new
+        ``Diagram`` shares the original ``cells`` list rather than copying it.
+
+        Args:
+            data: A diagram dict as returned by ``create_diagram``
+
+        Returns:
+            An indexed view of the diagram
+        """
+        if isinstance(data, cls):
+            return data
+        extra = {k: v for k, v in data.items()
+                 if k not in ("title", "cells", "modified")}
+        diagram = cls(title=data.get("title", "New Diagram"),
+                      modified=data.get("modified", False), **extra)
+        diagram["cells"] = data.get("cells", [])
+        return diagram
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a plain dict copy of the diagram (cells are shared)."""
+        return dict(self)
+
+    def __reduce__(self):
+        return (self.__class__.from_dict, (dict(self),))
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        super().__setitem__(key, value)
+        if key == "cells":
+            self._reset_index()
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _reset_index(self) -> None:
+        self._index = {}  # type: Dict[str, Dict[str, Any]]
+        self._nodes = {}  # type: Dict[str, Dict[str, Any]]
+        self._edges = {}  # type: Dict[str, Dict[str, Any]]
+        # Adjacency lists, built on first use
+        self._outgoing = None  # type: Optional[Dict[str, List[Dict[str, Any]]]]
+        self._incoming = None  # type: Optional[Dict[str, List[Dict[str, Any]]]]
+        self._indexed_cells = None  # type: Optional[List[Dict[str, Any]]]
+        self._indexed_count = 0
+        self._geometry = None  # type: Optional[GeometryStore]
+        self._spatial = None  # type: Optional[SpatialIndex]
+        # Cached node bounds, maintained incrementally while not stale
+        self._bounds = None  # type: Optional[Tuple[float, float, float, float]]
+        self._bounds_stale = True
+        # The cell list was replaced; its changes are unknown
+        self._forget_changes()
+        if self._history is not None:
+            self._history.clear()
+
+    def _sync(self) -> None:
+        """Bring the index up to date with ``self["cells"]``."""
+        cells = dict.__getitem__(self, "cells")  # type: List[Dict[str, Any]]
+        reset = cells is not self._indexed_cells or len(cells) < self._indexed_count
+        if reset:
+            self._reset_index()
+            self._indexed_cells = cells
+        if len(cells) > self._indexed_count:
+            start = self._indexed_count
+            added = cells[start:]
+            self._index_cells(added)
+            if not reset:
+                self._record([cell["id"] for cell in added], ADDED)
+                self._remember(INSERT, list(enumerate(added, start)))
+        self._indexed_count = len(cells)
+
+    def _record(self, cell_ids: List[str], kind: str) -> None:
+        """Append changes to the journal."""
+        journal = self._journal
+        if len(cell_ids) == 1:
+            journal.append((cell_ids[0], kind))
+        else:
+            journal.extend([(cell_id, kind) for cell_id in cell_ids])
+        self._version = self._journal_start + len(journal)
+        if len(journal) > len(self._index) + JOURNAL_SLACK:
+            self._forget_changes()
+
+    def _forget_changes(self) -> None:
+        """Start a new version that earlier versions can't be patched to."""
+        self._version += 1
+        self._journal_start = self._version
+        self._journal = []
+
+    def _remember(self, kind: str, changes: List[Tuple[Any, ...]]) -> None:
+        """Record an operation in the undo history, if there is one."""
+        if self._history is not None:
+            self._history.record((kind, changes))
+
+    def _index_cell(self, cell: Dict[str, Any]) -> None:
+        cell_id = cell["id"]
+        self._index[cell_id] = cell
+        if cell.get("type") == "node":
+            self._nodes[cell_id] = cell
+            if self._geometry is not None:
+                self._geometry.add(cell_id, cell["x"], cell["y"],
+                                   cell["width"], cell["height"])
+            if self._spatial is not None:
+                self._spatial.insert(cell_id, cell["x"], cell["y"],
+                                     cell["width"], cell["height"])
+            self._expand_node_bounds(cell)
+        elif cell.get("type") == "edge":
+            self._edges[cell_id] = cell
+            if self._outgoing is not None and self._incoming is not None:
+                self._outgoing.setdefault(cell["source"], []).append(cell)
+                self._incoming.setdefault(cell["target"], []).append(cell)
+
+    def _index_cells(self, cells: List[Dict[str, Any]]) -> None:
+        """Index many cells, merging whole batches into the lookup tables."""
+        batch = dict(zip([cell["id"] for cell in cells], cells))
+        self._index.update(batch)
+        types = [cell.get("type") for cell in cells]
+        # Batches of a single kind (the common case) merge the batch dict as is
+        if types.count("node") == len(cells):
+            self._nodes.update(batch)
+            nodes = cells
+        elif types.count("edge") == len(cells):
+            self._edges.update(batch)
+            if self._outgoing is not None:
+                self._add_adjacency(cells)
+            return
+        else:
+            nodes = [cell for cell, kind in zip(cells, types) if kind == "node"]
+            self._nodes.update([(cell["id"], cell) for cell in nodes])
+            edges = [cell for cell, kind in zip(cells, types) if kind == "edge"]
+            self._edges.update([(cell["id"], cell) for cell in edges])
+            if self._outgoing is not None:
+                self._add_adjacency(edges)
+
+        if not nodes:
+            return
+        if self._geometry is not None:
+            self._geometry.extend([cell["id"] for cell in nodes],
+                                  [(cell["x"], cell["y"], cell["width"], cell["height"])
+                                   for cell in nodes])
+        if self._spatial is not None:
+            insert = self._spatial.insert
+            for cell in nodes:
+                insert(cell["id"], cell["x"], cell["y"], cell["width"], cell["height"])
+        if not self._bounds_stale:
+            self._expand_bounds(min(cell["x"] for cell in nodes),
+                                min(cell["y"] for cell in nodes),
+                                max(cell["x"] + cell["width"] for cell in nodes),
+                                max(cell["y"] + cell["height"] for cell in nodes))
+
+    def _unindex_cell(self, cell: Dict[str, Any]) -> None:
+        cell_id = cell["id"]
+        del self._index[cell_id]
+        if cell.get("type") == "node":
+            del self._nodes[cell_id]
+            if self._geometry is not None:
+                self._geometry.remove(cell_id)
+            if self._spatial is not None:
+                self._spatial.remove(cell_id)
+            if self._on_boundary(cell):
+                self._bounds_stale = True
+        elif cell.get("type") == "edge":
+            del self._edges[cell_id]
+            if self._outgoing is None or self._incoming is None:
+                return
+            for adjacency, end in ((self._outgoing, "source"),
+                                   (self._incoming, "target")):
+                edges = adjacency.get(cell[end])
+                if edges is not None:
+                    edges[:] = [edge for edge in edges if edge is not cell]
+
+    def _adjacency(self) -> Tuple[Adjacency, Adjacency]:
+        """Return the (outgoing, incoming) adjacency lists, building them if needed."""
+        self._sync()
+        if self._outgoing is None or self._incoming is None:
+            self._outgoing = {}
+            self._incoming = {}
+            self._add_adjacency(self._edges.values())
+        return self._outgoing, self._incoming
+
+    def _add_adjacency(self, edges: Iterable[Dict[str, Any]]) -> None:
+        outgoing = self._outgoing
+        incoming = self._incoming
+        if outgoing is None or incoming is None:
+            return
+        for edge in edges:
+            outgoing.setdefault(edge["source"], []).append(edge)
+            incoming.setdefault(edge["target"], []).append(edge)
+
+    def _expand_node_bounds(self, cell: Dict[str, Any]) -> None:
+        if self._bounds_stale:
+            return
+        x, y = cell["x"], cell["y"]
+        self._expand_bounds(x, y, x + cell["width"], y + cell["height"])
+
+    def _expand_bounds(self, x: float, y: float, right: float, bottom: float) -> None:
+        """Grow the cached bounds to include a rectangle, in O(1)."""
+        if self._bounds_stale:
+            return
+        if self._bounds is None:
+            self._bounds = (x, y, right, bottom)
+        else:
+            min_x, min_y, max_x, max_y = self._bounds
+            self._bounds = (min(min_x, x), min(min_y, y),
+                            max(max_x, right), max(max_y, bottom))
+
+    def _on_boundary(self, cell: Dict[str, Any]) -> bool:
+        """Whether removing or moving a node may shrink the cached bounds."""
+        if self._bounds_stale or self._bounds is None:
+            return False
+        min_x, min_y, max_x, max_y = self._bounds
+        x, y = cell["x"], cell["y"]
+        return (x <= min_x or y <= min_y or
+                x + cell["width"] >= max_x or y + cell["height"] >= max_y)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add_cell(self, cell: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a cell to the diagram and index it.
+
+        Args:
+            cell: The node or edge cell dict
+
+        Returns:
+            The added cell
+        """
+        self._sync()
+        self._remember(INSERT, [(self._indexed_count, cell)])
+        dict.__getitem__(self, "cells").append(cell)
+        self._index_cell(cell)
+        self._indexed_count += 1
+        self._record([cell["id"]], ADDED)
+        return cell
+
+    def add_cells(self, cells: List[Dict[str, Any]]) -> None:
+        """Append many cells at once, updating the index in bulk.
+
+        Args:
+            cells: The node and edge cell dicts, in insertion order
+        """
+        self._sync()
+        self._remember(INSERT, list(enumerate(cells, self._indexed_count)))
+        dict.__getitem__(self, "cells").extend(cells)
+        self._index_cells(cells)
+        self._indexed_count += len(cells)
+        self._record([cell["id"] for cell in cells], ADDED)
+
+    def cell_ids(self) -> KeysView:
+        """The IDs of all cells, as a set-like view."""
+        self._sync()
+        return self._index.keys()
+
+    def remove_cell(self, cell_id: str) -> List[Dict[str, Any]]:
+        """Remove a cell, and for a node every edge connected to it.
+
+        Args:
+            cell_id: ID of the cell to remove
+
+        Returns:
+            The removed cells, the requested cell first
+
+        Raises:
+            KeyError: If there is no cell with this ID
+        """
+        self._sync()
+        cell = self._index[cell_id]
+        removed = [cell]
+        if cell.get("type") == "node":
+            outgoing, incoming = self._adjacency()
+            connected = outgoing.get(cell_id, []) + incoming.get(cell_id, [])
+            removed.extend({id(edge): edge for edge in connected}.values())
+
+        for item in removed:
+            self._unindex_cell(item)
+        removed_ids = {id(item) for item in removed}
+        cells = dict.__getitem__(self, "cells")
+        if self._history is not None:
+            self._remember(DELETE, [(index, item) for index, item in enumerate(cells)
+                                    if id(item) in removed_ids])
+        cells[:] = [item for item in cells if id(item) not in removed_ids]
+        self._indexed_count = len(cells)
+        self._record([item["id"] for item in removed], REMOVED)
+        self["modified"] = True
+        return removed
+
+    def update_cell(self, cell_id: str, **fields: Any) -> Dict[str, Any]:
+        """Change fields of a cell, keeping the indexes and the journal up to date.
+
+        Args:
+            cell_id: ID of the cell to change
+            **fields: The new values, e.g. ``label="Done"`` or ``width=200``
+
+        Returns:
+            The updated cell
+
+        Raises:
+            KeyError: If there is no cell with this ID
+            ValueError: If ``id`` or ``type`` is to be changed
+        """
+        self.update_cells({cell_id: fields})
+        return self._index[cell_id]
+
+    def update_cells(self, changes: Mapping[str, Mapping[str, Any]]) -> None:
+        """Change fields of many cells as a single edit.
+
+        Args:
+            changes: The new field values of each cell, by cell ID
+
+        Raises:
+            KeyError: If one of the IDs is not a cell
+            ValueError: If ``id`` or ``type`` is to be changed
+        """
+        if any("id" in fields or "type" in fields for fields in changes.values()):
+            raise ValueError("The id and type of a cell can't be changed")
+        self._sync()
+        cells = [self._index[cell_id] for cell_id in changes]
+        if self._history is not None:
+            old = [changed_fields(cell, fields)
+                   for cell, fields in zip(cells, changes.values())]
+        for cell, fields in zip(cells, changes.values()):
+            self._set_fields(cell, fields)
+        if self._history is not None:
+            self._remember(SET, [(cell_id, previous, dict(fields))
+                                 for (cell_id, fields), previous
+                                 in zip(changes.items(), old)])
+        self["modified"] = True
+
+    def _set_fields(self, cell: Dict[str, Any], fields: Mapping[str, Any]) -> None:
+        """Change fields of an indexed cell; ``MISSING`` values delete the field."""
+        cell_id = cell["id"]
+        if cell.get("type") == "node" and not _GEOMETRY_KEYS.isdisjoint(fields):
+            if self._on_boundary(cell):
+                self._bounds_stale = True
+            cell.update(fields)
+            x, y, width, height = cell["x"], cell["y"], cell["width"], cell["height"]
+            if self._geometry is not None:
+                self._geometry.add(cell_id, x, y, width, height)
+            if self._spatial is not None:
+                self._spatial.insert(cell_id, x, y, width, height)
+            self._expand_node_bounds(cell)
+        else:
+            if (cell.get("type") == "edge"
+                    and ("source" in fields or "target" in fields)):
+                # Rebuilt on next use
+                self._outgoing = self._incoming = None
+            cell.update(fields)
+        for key, value in fields.items():
+            if value is MISSING:
+                del cell[key]
+        self._record([cell_id], UPDATED)
+
+    def mark_updated(self, *cell_ids: str) -> None:
+        """Record cells whose dicts were edited in place in the change journal.
+
+        Geometry edits also need ``refresh_geometry``; ``update_cell`` does
+        both.
+        """
+        self._sync()
+        if cell_ids:
+            self._record(list(cell_ids), UPDATED)
+
+    @property
+    def version(self) -> int:
+        """A number that grows with every change to the diagram."""
+        self._sync()
+        return self._version
+
+    def changes_since(self, version: int) -> Optional[Dict[str, str]]:
+        """Return the cells changed since ``version``, by cell ID.
+
+        Args:
+            version: A value of ``version`` read earlier
+
+        Returns:
+            ``ADDED`` ("added"), ``REMOVED`` ("removed") or ``UPDATED``
+            ("updated") for each changed cell, relative to the cells the
+            diagram had at ``version``; or None if the changes are not known
+            (the journal was dropped, the cell list was replaced, or nodes
+            were moved by ``translate``, ``scale`` or edited directly)
+        """
+        self._sync()
+        if version < self._journal_start or version > self._version:
+            return None
+        changes = {}  # type: Dict[str, str]
+        for cell_id, kind in self._journal[version - self._journal_start:]:
+            previous = changes.get(cell_id)
+            if previous is None:
+                changes[cell_id] = kind
+            elif kind == REMOVED:
+                if previous == ADDED:
+                    del changes[cell_id]
+                else:
+                    changes[cell_id] = REMOVED
+            elif kind == ADDED:
+                # Removed and added again
+                changes[cell_id] = UPDATED
+        return changes
+
+    def get_cell(self, cell_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cell with the given ID, or None."""
+        self._sync()
+        return self._index.get(cell_id)
+
+    def get_node(self, cell_id: str) -> Optional[Dict[str, Any]]:
+        """Return the node with the given ID, or None if it is not a node."""
+        self._sync()
+        return self._nodes.get(cell_id)
+
+    @property
+    def nodes(self) -> ValuesView:
+        """All node cells in insertion order."""
+        self._sync()
+        return self._nodes.values()
+
+    @property
+    def edges(self) -> ValuesView:
+        """All edge cells in insertion order."""
+        self._sync()
+        return self._edges.values()
+
+    def outgoing(self, node_id: str) -> List[Dict[str, Any]]:
+        """Return the edges whose source is ``node_id``."""
+        outgoing, _ = self._adjacency()
+        return list(outgoing.get(node_id, ()))
+
+    def incoming(self, node_id: str) -> List[Dict[str, Any]]:
+        """Return the edges whose target is ``node_id``."""
+        _, incoming = self._adjacency()
+        return list(incoming.get(node_id, ()))
+
+    def neighbors(self, node_id: str) -> List[str]:
+        """Return the IDs of nodes connected to ``node_id`` by any edge."""
+        outgoing, incoming = self._adjacency()
+        seen = {}  # type: Dict[str, None]
+        for edge in outgoing.get(node_id, ()):
+            seen[edge["target"]] = None
+        for edge in incoming.get(node_id, ()):
+            seen[edge["source"]] = None
+        return list(seen)
+
+    # ------------------------------------------------------------------
+    # Undo history
+    # ------------------------------------------------------------------
+
+    @property
+    def history(self) -> Optional[History]:
+        """The undo history, or None until ``enable_history`` is called."""
+        return self._history
+
+    def enable_history(self, depth: int = HISTORY_DEPTH) -> History:
+        """Start recording changes so they can be undone and redone.
+
+        Args:
+            depth: Number of transactions that can be undone; an enabled
+                history keeps its transactions and only changes its depth
+
+        Returns:
+            The diagram's ``History``
+        """
+        if self._history is None:
+            self._history = History(self, depth)
+        else:
+            self._history.depth = depth
+        return self._history
+
+    def disable_history(self) -> None:
+        """Stop recording changes and drop the undo history."""
+        self._history = None
+
+    def _apply(self, operations: List[Tuple[str, List[Tuple[Any, ...]]]],
+               undo: bool) -> None:
+        """Apply the operations of a transaction again, or revert them."""
+        self._sync()
+        for kind, changes in (reversed(operations) if undo else operations):
+            if kind == SET:
+                if undo:
+                    updates = [(cell_id, old) for cell_id, old, _ in reversed(changes)]
+                else:
+                    updates = [(cell_id, new) for cell_id, _, new in changes]
+                self._apply_fields(updates)
+            elif (kind == INSERT) != undo:
+                self._insert_cells(changes)
+            else:
+                self._delete_cells(changes)
+        self["modified"] = True
+
+    def _apply_fields(self, updates: List[Tuple[str, Dict[str, Any]]]) -> None:
+        if len(updates) <= _BULK_UPDATE:
+            for cell_id, fields in updates:
+                self._set_fields(self._index[cell_id], fields)
+            return
+        # Like move_nodes: update the dicts, rebuild the geometry on next use
+        index = self._index
+        for cell_id, fields in updates:
+            cell = index[cell_id]
+            cell.update(fields)
+            for key, value in fields.items():
+                if value is MISSING:
+                    del cell[key]
+        self._invalidate_geometry()
+        self._outgoing = self._incoming = None
+        self._record([cell_id for cell_id, _ in updates], UPDATED)
+
+    def _insert_cells(self, changes: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Insert cells at their list positions, given in ascending order."""
+        cells = dict.__getitem__(self, "cells")
+        added = [cell for _, cell in changes]
+        start = len(cells)
+        if all(index == start + offset for offset, (index, _) in enumerate(changes)):
+            cells.extend(added)
+            self._index_cells(added)
+        else:
+            for index, cell in changes:
+                cells.insert(index, cell)
+            self._index_cells(added)
+            self._reorder()
+        self._indexed_count = len(cells)
+        self._record([cell["id"] for cell in added], ADDED)
+
+    def _delete_cells(self, changes: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """Remove cells that sit at the given list positions."""
+        cells = dict.__getitem__(self, "cells")
+        removed = [cell for _, cell in changes]
+        for cell in removed:
+            self._unindex_cell(cell)
+        start = len(cells) - len(removed)
+        if start >= 0 and all(cells[start + offset] is cell
+                              for offset, cell in enumerate(removed)):
+            del cells[start:]
+        else:
+            removed_ids = {id(cell) for cell in removed}
+            cells[:] = [cell for cell in cells if id(cell) not in removed_ids]
+        self._indexed_count = len(cells)
+        self._record([cell["id"] for cell in removed], REMOVED)
+
+    def _reorder(self) -> None:
+        """Put the lookup tables back in cell list order after a non-tail insert."""
+        cells = dict.__getitem__(self, "cells")
+        self._index = {cell["id"]: cell for cell in cells}
+        self._nodes = {cell["id"]: cell for cell in cells if cell.get("type") == "node"}
+        self._edges = {cell["id"]: cell for cell in cells if cell.get("type") == "edge"}
+        self._outgoing = self._incoming = None
+
+    # ------------------------------------------------------------------
+    # Geometry
+    # ------------------------------------------------------------------
+
+    @property
+    def geometry(self) -> "GeometryStore":
+        """Columnar store of node rectangles, built on first access.
+
+        Raises:
+            ImportError: If NumPy is not available
+        """
+        self._sync()
+        if self._geometry is None:
+            store = geometry.GeometryStore(capacity=len(self._nodes))
+            store.extend(self._nodes,
+                         [(cell["x"], cell["y"], cell["width"], cell["height"])
+                          for cell in self._nodes.values()])
+            self._geometry = store
+        return self._geometry
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        """Grid index of node rectangles by node ID, built on first access."""
+        self._sync()
+        if self._spatial is None:
+            self._spatial = SpatialIndex.from_nodes(self._nodes.values())
+        return self._spatial
+
+    def refresh_geometry(self) -> None:
+        """Discard the geometry store, spatial index and bounds.
+
+        Call this after editing the x, y, width or height of node dicts in
+        place, which the caches cannot see.
+        """
+        self._invalidate_geometry()
+        self._forget_changes()
+
+    def _invalidate_geometry(self) -> None:
+        self._geometry = None
+        self._spatial = None
+        self._bounds_stale = True
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """Return (min_x, min_y, max_x, max_y) over all nodes, or None if empty.
+
+        The result is cached and kept up to date as nodes are added, moved
+        and removed; it is only recomputed after a node on the boundary was
+        moved inwards or removed.
+        """
+        self._sync()
+        if self._bounds_stale:
+            self._bounds = self._compute_bounds()
+            self._bounds_stale = False
+        return self._bounds
+
+    def _compute_bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        if geometry.NUMPY_AVAILABLE:
+            return self.geometry.bounds()
+        return self._scan_nodes()
+
+    def _scan_nodes(self) -> Optional[Tuple[float, float, float, float]]:
+        nodes = self._nodes.values()
+        if not nodes:
+            return None
+        return (min([cell["x"] for cell in nodes]),
+                min([cell["y"] for cell in nodes]),
+                max([cell["x"] + cell["width"] for cell in nodes]),
+                max([cell["y"] + cell["height"] for cell in nodes]))
+
+    def move_node(self, node_id: str, x: float, y: float) -> Dict[str, Any]:
+        """Move a node to a new position.
+
+        Args:
+            node_id: ID of the node to move
+            x: New X coordinate
+            y: New Y coordinate
+
+        Returns:
+            The moved node
+
+        Raises:
+            KeyError: If there is no node with this ID
+        """
+        self._sync()
+        cell = self._nodes[node_id]
+        self._remember(SET, [(node_id, {"x": cell["x"], "y": cell["y"]},
+                              {"x": x, "y": y})])
+        if self._on_boundary(cell):
+            self._bounds_stale = True
+        cell["x"] = x
+        cell["y"] = y
+        if self._geometry is not None:
+            self._geometry.add(node_id, x, y, cell["width"], cell["height"])
+        if self._spatial is not None:
+            self._spatial.insert(node_id, x, y, cell["width"], cell["height"])
+        self._expand_node_bounds(cell)
+        self._record([node_id], UPDATED)
+        self["modified"] = True
+        return cell
+
+    def move_nodes(self, positions: Mapping[str, Tuple[float, float]]) -> None:
+        """Move many nodes at once, e.g. to apply a computed layout.
+
+        Args:
+            positions: New (x, y) of each node to move, by node ID
+
+        Raises:
+            KeyError: If one of the IDs is not a node
+        """
+        self._sync()
+        nodes = self._nodes
+        if self._history is not None:
+            old = self._snapshot([nodes[node_id] for node_id in positions], ("x", "y"))
+        for node_id, (x, y) in positions.items():
+            cell = nodes[node_id]
+            cell["x"] = x
+            cell["y"] = y
+        if self._history is not None:
+            self._remember_geometry(old)
+        self._invalidate_geometry()
+        self._record(list(positions), UPDATED)
+        self["modified"] = True
+
+    def translate(self, dx: float, dy: float) -> None:
+        """Move every node by (dx, dy)."""
+        old = self._snapshot(None, ("x", "y"))
+        if not geometry.NUMPY_AVAILABLE:
+            self._sync()
+            for cell in self._nodes.values():
+                cell["x"] += dx
+                cell["y"] += dy
+        else:
+            store = self.geometry
+            store.translate(dx, dy)
+            self._write_back(store, geometry.X, geometry.Y)
+        self._spatial = None
+        if not self._bounds_stale and self._bounds is not None:
+            min_x, min_y, max_x, max_y = self._bounds
+            self._bounds = (min_x + dx, min_y + dy, max_x + dx, max_y + dy)
+        self._remember_geometry(old)
+        # Every node changed
+        self._forget_changes()
+        self["modified"] = True
+
+    def scale(self, factor_x: float, factor_y: Optional[float] = None,
+              origin: Tuple[float, float] = (0, 0)) -> None:
+        """Scale node positions and sizes about ``origin``.
+
+        Args:
+            factor_x: Horizontal scale factor
+            factor_y: Vertical scale factor (defaults to ``factor_x``)
+            origin: The fixed point of the scaling
+        """
+        if factor_y is None:
+            factor_y = factor_x
+        old = self._snapshot(None, _COLUMN_KEYS)
+        if not geometry.NUMPY_AVAILABLE:
+            self._sync()
+            ox, oy = origin
+            for cell in self._nodes.values():
+                cell["x"] = ox + (cell["x"] - ox) * factor_x
+                cell["y"] = oy + (cell["y"] - oy) * factor_y
+                cell["width"] *= factor_x
+                cell["height"] *= factor_y
+        else:
+            store = self.geometry
+            store.scale(factor_x, factor_y, origin)
+            self._write_back(store, geometry.X, geometry.Y,
+                             geometry.WIDTH, geometry.HEIGHT)
+        self._spatial = None
+        self._bounds_stale = True
+        self._remember_geometry(old)
+        self._forget_changes()
+        self["modified"] = True
+
+    def hit_test(self, x: float, y: float) -> List[Dict[str, Any]]:
+        """Return the nodes whose rectangle contains the point (x, y)."""
+        if geometry.NUMPY_AVAILABLE:
+            found = self.geometry.hit_test(x, y)
+            nodes = self._nodes
+            return [nodes[node_id] for node_id in found]
+        return [cell for cell in self.nodes
+                if cell["x"] <= x <= cell["x"] + cell["width"]
+                and cell["y"] <= y <= cell["y"] + cell["height"]]
+
+    def query_rect(self, min_x: float, min_y: float,
+                   max_x: float, max_y: float) -> List[Dict[str, Any]]:
+        """Return the nodes intersecting a rectangle, borders included."""
+        found = self.spatial.query_rect(min_x, min_y, max_x, max_y)
+        nodes = self._nodes
+        return [nodes[node_id] for node_id in found]
+
+    def query_point(self, x: float, y: float) -> List[Dict[str, Any]]:
+        """Return the nodes whose rectangle contains the point (x, y).
+
+        Unlike ``hit_test`` this only looks at the nodes in one grid cell of
+        the spatial index, so it stays fast on very large diagrams.
+        """
+        found = self.spatial.query_point(x, y)
+        nodes = self._nodes
+        return [nodes[node_id] for node_id in found]
+
+    def nearest(self, x: float, y: float, k: int = 1,
+                max_distance: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Return the ``k`` nodes closest to the point (x, y), closest first.
+
+        Args:
+            x: X coordinate of the point
+            y: Y coordinate of the point
+            k: Number of nodes to return
+            max_distance: Ignore nodes whose rectangle is farther away than this
+
+        Returns:
+            Up to ``k`` nodes; nodes containing the point come first
+        """
+        found = self.spatial.nearest(x, y, k, max_distance)
+        nodes = self._nodes
+        return [nodes[node_id] for _, node_id in found]
+
+    def _snapshot(self, nodes: Optional[List[Dict[str, Any]]],
+                  keys: Tuple[str, ...]) -> Optional[Snapshot]:
+        """Return the current ``keys`` of nodes (default: all) if history is on."""
+        if self._history is None:
+            return None
+        if nodes is None:
+            self._sync()
+            nodes = list(self._nodes.values())
+        return [(cell, {key: cell[key] for key in keys}) for cell in nodes]
+
+    def _remember_geometry(self, old: Optional[Snapshot]) -> None:
+        """Record the geometry change of nodes captured by ``_snapshot``."""
+        if old is not None:
+            self._remember(SET, [(cell["id"], fields,
+                                  {key: cell[key] for key in fields})
+                                 for cell, fields in old])
+
+    def _write_back(self, store: "GeometryStore", *columns: int) -> None:
+        """Copy columns of the geometry store back into the node dicts."""
+        nodes = [self._nodes[node_id] for node_id in store.ids]
+        for column in columns:
+            key = _COLUMN_KEYS[column]
+            for cell, value in zip(nodes, store.column_values(column)):
+                cell[key] = value
+
+
+_COLUMN_KEYS = ("x", "y", "width", "height")
+_GEOMETRY_KEYS = frozenset(_COLUMN_KEYS)
+
+# Undo/redo field changes of more cells than this drop the geometry indexes
+# instead of updating them cell by cell
+_BULK_UPDATE = 64
@@ -0,0 +1,132 @@
+"""Multi-page draw.io documents with pages loaded on demand."""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from .diagram import Diagram
+
+
+class Page:
+    """One page (``<diagram>`` element) of a document.
+
+    A page read from a file keeps the raw content of its ``<diagram>``
+    element and only parses it into a ``Diagram`` when ``diagram`` is first
+    accessed. Until then, exporting the document copies the raw content
+    unchanged.
+    """
+
+    def __init__(self, name: str, page_id: str,
+                 diagram: Optional[Diagram] = None,
+                 source: Optional[bytes] = None,
+                 parse: Optional[Callable[[bytes, Diagram], None]] = None):
+        """Initialize the page.
+
+        Args:
+            name: The page name shown on the draw.io page tab
+            page_id: The ``id`` attribute of the ``<diagram>`` element
+            diagram: The page's diagram, for pages created in memory
+            source: The raw content of the ``<diagram>`` element, for pages
+                read from a file
+            parse: Adds the cells of ``source`` to a diagram
+        """
+        self.name = name
+        self.id = page_id
+        self._diagram = diagram
+        self._source = source
+        self._parse = parse
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<Page {self.id!r} {self.name!r} ({state})>"
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the page's cells have been parsed."""
+        return self._diagram is not None
+
+    @property
+    def source(self) -> Optional[bytes]:
+        """The raw ``<diagram>`` content of a page that has not been loaded yet."""
+        return None if self.loaded else self._source
+
+    @property
+    def diagram(self) -> Diagram:
+        """The page's diagram, parsed on first access."""
+        if self._diagram is None:
+            diagram = Diagram(title=self.name)
+            if self._source and self._parse is not None:
+                self._parse(self._source, diagram)
+            self._diagram = diagram
+            self._source = None
+        return self._diagram
+
+
+class Document:
+    """An ordered collection of named pages, saved as one ``.drawio`` file."""
+
+    def __init__(self, pages: Optional[List[Page]] = None):
+        """Initialize the document.
+
+        Args:
+            pages: Initial pages, in tab order
+        """
+        self.pages = list(pages or [])
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def __iter__(self) -> Iterator[Page]:
+        return iter(self.pages)
+
+    def __getitem__(self, key: Union[int, str]) -> Page:
+        """Return a page by position or by name.
+
+        Raises:
+            IndexError: If there is no page at this position
+            KeyError: If there is no page with this name
+        """
+        if isinstance(key, int):
+            return self.pages[key]
+        for page in self.pages:
+            if page.name == key:
+                return page
+        raise KeyError(key)
+
+    def page_names(self) -> List[str]:
+        """The names of all pages in tab order, without loading any page."""
+        return [page.name for page in self.pages]
+
+    def add_page(self, name: Optional[str] = None,
+                 diagram: Optional[Union[Diagram, Dict[str, Any]]] = None) -> Page:
+        """Append a page.
+
+        Args:
+            name: The page name (defaults to the diagram title, then
+                ``Page-N``)
+            diagram: The page content (defaults to a new empty diagram)
+
+        Returns:
+            The new page
+        """
+        if diagram is not None:
+            diagram = Diagram.from_dict(diagram)
+        if name is None:
+            name = diagram.get("title") if diagram is not None else None
+            name = name or f"Page-{len(self.pages) + 1}"
+        if diagram is None:
+            diagram = Diagram(title=name)
+        page = Page(name, self._next_page_id(), diagram=diagram)
+        self.pages.append(page)
+        return page
+
+    def remove_page(self, key: Union[int, str]) -> Page:
+        """Remove a page by position or by name and return it."""
+        page = self[key]
+        self.pages.remove(page)
+        return page
+
+    def _next_page_id(self) -> str:
+        used = {page.id for page in self.pages}
+        number = len(self.pages) + 1
+        while f"page-{number}" in used:
+            number += 1
+        return f"page-{number}"
@@ -0,0 +1,196 @@
+"""Columnar storage of node geometry for vectorized operations."""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# Optional imports - will be used if available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+X, Y, WIDTH, HEIGHT = range(4)
+
+
+def plain(value: float) -> float:
+    """Return an integral float as an int, so ``100.0`` is exported as ``100``."""
+    return int(value) if value.is_integer() else value
+
+
+class GeometryStore:
+    """Node rectangles (x, y, width, height) in one contiguous NumPy array.
+
+    Each node occupies one row of an ``(n, 4)`` float64 array, so bounds,
+    translations, scaling and hit tests run as vectorized operations instead
+    of Python loops over cell dicts. Rows are appended with amortized growth
+    and removed by moving the last row into the gap.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """Initialize an empty store.
+
+        Args:
+            capacity: Number of rows to preallocate
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for the geometry store: "
+                              "pip install numpy")
+        self._data = np.empty((max(capacity, 1), 4), dtype=np.float64)
+        self._size = 0
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self.rows
+
+    @property
+    def data(self) -> "np.ndarray":
+        """View of the used rows as an ``(n, 4)`` array of x, y, width, height."""
+        return self._data[:self._size]
+
+    @property
+    def x(self) -> "np.ndarray":
+        return self._data[:self._size, X]
+
+    @property
+    def y(self) -> "np.ndarray":
+        return self._data[:self._size, Y]
+
+    @property
+    def width(self) -> "np.ndarray":
+        return self._data[:self._size, WIDTH]
+
+    @property
+    def height(self) -> "np.ndarray":
+        return self._data[:self._size, HEIGHT]
+
+    # ------------------------------------------------------------------
+    # Row maintenance
+    # ------------------------------------------------------------------
+
+    def add(self, node_id: str, x: float, y: float, width: float, height: float) -> int:
+        """Append a node rectangle (or overwrite it if the ID exists).
+
+        Returns:
+            The row index of the node
+        """
+        row = self.rows.get(node_id)
+        if row is None:
+            if self._size == len(self._data):
+                self._grow(self._size + 1)
+            row = self._size
+            self._size += 1
+            self.rows[node_id] = row
+            self.ids.append(node_id)
+        self._data[row] = (x, y, width, height)
+        return row
+
+    def extend(self, node_ids: Iterable[str],
+               rects: Union["np.ndarray",
+                            Iterable[Tuple[float, float, float, float]]]) -> None:
+        """Append many new node rectangles at once.
+
+        Args:
+            node_ids: IDs of the new nodes (must not be present yet)
+            rects: ``(n, 4)`` array-like of x, y, width, height
+        """
+        node_ids = list(node_ids)
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        start = self._size
+        end = start + len(node_ids)
+        if end > len(self._data):
+            self._grow(end)
+        self._data[start:end] = rects
+        self.rows.update(zip(node_ids, range(start, end)))
+        self.ids.extend(node_ids)
+        self._size = end
+
+    def get(self, node_id: str) -> Tuple[float, float, float, float]:
+        """Return the rectangle of a node as (x, y, width, height)."""
+        x, y, width, height = self._data[self.rows[node_id]].tolist()
+        return x, y, width, height
+
+    def remove(self, node_id: str) -> None:
+        """Remove a node in O(1) by moving the last row into its place."""
+        row = self.rows.pop(node_id)
+        last = self._size - 1
+        if row != last:
+            moved_id = self.ids[last]
+            self._data[row] = self._data[last]
+            self.ids[row] = moved_id
+            self.rows[moved_id] = row
+        self.ids.pop()
+        self._size = last
+
+    def _grow(self, minimum: int) -> None:
+        capacity = max(minimum, len(self._data) * 2)
+        data = np.empty((capacity, 4), dtype=np.float64)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    # ------------------------------------------------------------------
+    # Vectorized operations
+    # ------------------------------------------------------------------
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """Return (min_x, min_y, max_x, max_y) over all nodes, or None if empty."""
+        if not self._size:
+            return None
+        data = self.data
+        min_x, min_y = data[:, :2].min(axis=0).tolist()
+        max_x = (data[:, X] + data[:, WIDTH]).max().item()
+        max_y = (data[:, Y] + data[:, HEIGHT]).max().item()
+        return plain(min_x), plain(min_y), plain(max_x), plain(max_y)
+
+    def translate(self, dx: float, dy: float,
+                  rows: Optional["np.ndarray"] = None) -> None:
+        """Move all nodes (or the given rows) by (dx, dy)."""
+        target = self.data if rows is None else self._data[rows]
+        target[:, X] += dx
+        target[:, Y] += dy
+        if rows is not None:
+            self._data[rows] = target
+
+    def scale(self, factor_x: float, factor_y: Optional[float] = None,
+              origin: Tuple[float, float] = (0.0, 0.0)) -> None:
+        """Scale positions and sizes of all nodes about ``origin``."""
+        if factor_y is None:
+            factor_y = factor_x
+        data = self.data
+        data[:, X] = origin[0] + (data[:, X] - origin[0]) * factor_x
+        data[:, Y] = origin[1] + (data[:, Y] - origin[1]) * factor_y
+        data[:, WIDTH] *= factor_x
+        data[:, HEIGHT] *= factor_y
+
+    def hit_mask(self, x: float, y: float) -> "np.ndarray":
+        """Return a boolean mask of the rows whose rectangle contains (x, y)."""
+        data = self.data
+        return ((data[:, X] <= x) & (x <= data[:, X] + data[:, WIDTH]) &
+                (data[:, Y] <= y) & (y <= data[:, Y] + data[:, HEIGHT]))
+
+    def hit_test(self, x: float, y: float) -> List[str]:
+        """Return the IDs of nodes whose rectangle contains the point (x, y)."""
+        rows = np.flatnonzero(self.hit_mask(x, y)).tolist()
+        return [self.ids[row] for row in rows]
+
+    def rect_mask(self, min_x: float, min_y: float,
+                  max_x: float, max_y: float) -> "np.ndarray":
+        """Return a boolean mask of the rows intersecting a rectangle."""
+        data = self.data
+        return ((data[:, X] <= max_x) & (min_x <= data[:, X] + data[:, WIDTH]) &
+                (data[:, Y] <= max_y) & (min_y <= data[:, Y] + data[:, HEIGHT]))
+
+    def column_values(self, column: int) -> list:
+        """Return a column as Python numbers, using ints when all are integral.
+
+        Used when writing positions back to cell dicts, so coordinates that
+        started as ints are not exported as ``100.0``.
+        """
+        values = self._data[:self._size, column]
+        if (np.array_equal(values, np.round(values))
+                and np.all(np.abs(values) < 2 ** 53)):
+            return values.astype(np.int64).tolist()
+        return values.tolist()
@@ -0,0 +1,201 @@
+"""Undo and redo of diagram edits, recorded as compact deltas."""
+
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Mapping, Optional, Tuple
+
+# Operations of a transaction. Each is (kind, changes):
+#   (INSERT, [(index, cell), ...]) - cells inserted at these list positions
+#   (DELETE, [(index, cell), ...]) - cells removed from these list positions
+#   (SET, [(cell_id, old_fields, new_fields), ...]) - fields of cells changed
+# Undo applies the inverse of each operation in reverse order, redo applies
+# them again; an operation's size is that of the change, not the diagram.
+INSERT = "insert"
+DELETE = "delete"
+SET = "set"
+
+Operation = Tuple[str, List[Tuple[Any, ...]]]
+
+# Stands for a field a cell did not have in SET operations
+MISSING = object()
+
+HISTORY_DEPTH = 100
+
+
+class History:
+    """The undo and redo stacks of one diagram.
+
+    Every edit made through ``Diagram`` methods (and so through the client's
+    ``add_node``, ``move_node``, ``layout``... ) while the history is
+    enabled is recorded. Edits between ``begin`` and ``commit`` form one
+    transaction that is undone and redone as a whole; edits made outside a
+    transaction are transactions of their own. Only the last ``depth``
+    transactions are kept, so memory use depends on the size of recent
+    edits rather than on the size of the diagram.
+
+    Cell dicts edited in place are not recorded; use
+    ``Diagram.update_cell`` for edits that should be undoable. Replacing
+    ``diagram["cells"]`` clears the history.
+
+    Example:
+        history = diagram.enable_history(depth=50)
+        with history.transaction():
+            client.add_node(diagram, "A", 0, 0)
+            client.add_node(diagram, "B", 200, 0)
+        history.undo()  # removes both nodes
+    """
+
+    def __init__(self, diagram: Any, depth: int = HISTORY_DEPTH):
+        """Initialize the history.
+
+        Args:
+            diagram: The ``Diagram`` whose edits are recorded
+            depth: Number of transactions that can be undone
+        """
+        if depth < 1:
+            raise ValueError("History depth must be at least 1")
+        self._diagram = diagram
+        self._undo: Deque[List[Operation]] = deque(maxlen=depth)
+        self._redo: List[List[Operation]] = []
+        self._current: Optional[List[Operation]] = None
+        self._nesting = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of transactions that can be undone."""
+        return self._undo.maxlen or HISTORY_DEPTH
+
+    @depth.setter
+    def depth(self, depth: int) -> None:
+        if depth < 1:
+            raise ValueError("History depth must be at least 1")
+        self._undo = deque(self._undo, maxlen=depth)
+        del self._redo[:-depth]
+
+    @property
+    def can_undo(self) -> bool:
+        """Whether there is a transaction to undo."""
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        """Whether there is an undone transaction to redo."""
+        return bool(self._redo)
+
+    @property
+    def in_transaction(self) -> bool:
+        """Whether a transaction is open."""
+        return self._current is not None
+
+    def begin(self) -> None:
+        """Open a transaction; nested ``begin``/``commit`` pairs join the outer one."""
+        if self._current is None:
+            self._current = []
+        self._nesting += 1
+
+    def commit(self) -> None:
+        """Close the transaction opened by the matching ``begin``.
+
+        Raises:
+            RuntimeError: If no transaction is open
+        """
+        if self._current is None:
+            raise RuntimeError("No transaction to commit")
+        self._nesting -= 1
+        if self._nesting == 0:
+            # Cells appended to the list directly belong to the transaction
+            self._diagram._sync()
+            operations, self._current = self._current, None
+            self._push(operations)
+
+    def rollback(self) -> None:
+        """Undo and discard everything recorded since the outermost ``begin``.
+
+        Raises:
+            RuntimeError: If no transaction is open
+        """
+        if self._current is None:
+            raise RuntimeError("No transaction to roll back")
+        self._diagram._sync()
+        operations, self._current = self._current, None
+        self._nesting = 0
+        self._diagram._apply(operations, undo=True)
+
+    @contextmanager
+    def transaction(self) -> Iterator["History"]:
+        """Run a block as one transaction, rolled back if it raises."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            if self._nesting == 1:
+                self.rollback()
+            else:
+                self._nesting -= 1
+            raise
+        self.commit()
+
+    def undo(self) -> bool:
+        """Revert the last transaction.
+
+        Returns:
+            False if there was nothing to undo
+
+        Raises:
+            RuntimeError: If a transaction is open
+        """
+        self._check_closed()
+        # Cells appended to the list directly are undone first
+        self._diagram._sync()
+        if not self._undo:
+            return False
+        operations = self._undo.pop()
+        self._diagram._apply(operations, undo=True)
+        self._redo.append(operations)
+        return True
+
+    def redo(self) -> bool:
+        """Apply the last undone transaction again.
+
+        Returns:
+            False if there was nothing to redo
+
+        Raises:
+            RuntimeError: If a transaction is open
+        """
+        self._check_closed()
+        self._diagram._sync()
+        if not self._redo:
+            return False
+        operations = self._redo.pop()
+        self._diagram._apply(operations, undo=False)
+        self._undo.append(operations)
+        return True
+
+    def clear(self) -> None:
+        """Forget every recorded transaction, including an open one."""
+        self._undo.clear()
+        self._redo.clear()
+        self._current = None
+        self._nesting = 0
+
+    def record(self, operation: Operation) -> None:
+        """Add an operation to the open transaction, or commit it as its own."""
+        if self._current is not None:
+            self._current.append(operation)
+        else:
+            self._push([operation])
+
+    def _push(self, operations: List[Operation]) -> None:
+        if operations:
+            self._undo.append(operations)
+            self._redo.clear()
+
+    def _check_closed(self) -> None:
+        if self._current is not None:
+            raise RuntimeError("Commit or roll back the open transaction first")
+
+
+def changed_fields(cell: Dict[str, Any], fields: Mapping[str, Any]) -> Dict[str, Any]:
+    """Return the current values of ``fields`` in ``cell`` (``MISSING`` if absent)."""
+    return {key: cell.get(key, MISSING) for key in fields}
@@ -0,0 +1,157 @@
+"""Incremental re-export of diagrams from their change journal."""
+
+import json
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from . import serializer, svg
+from .diagram import REMOVED, Diagram
+
+Render = Callable[[Dict[str, Any], Diagram], str]
+Dependents = Callable[[Diagram, str], Iterable[Dict[str, Any]]]
+
+
+class FragmentCache:
+    """The output fragment of every cell of a diagram in one export format.
+
+    The first ``refresh`` renders every cell. Later calls render only the
+    cells that ``Diagram.changes_since`` reports, plus the cells whose
+    output depends on them, and reuse every other fragment; the full
+    journal-less rebuild only happens when the changes are not known.
+    """
+
+    def __init__(self, render: Render, dependents: Optional[Dependents] = None):
+        """Initialize the cache.
+
+        Args:
+            render: Returns the fragment of a cell
+            dependents: Returns the cells whose fragments must be rendered
+                again when the cell with the given ID changes
+        """
+        self.render = render
+        self.dependents = dependents
+        self.version = None  # type: Optional[int]
+        self.fragments = {}  # type: Dict[str, str]
+
+    def refresh(self, diagram: Diagram) -> Dict[str, str]:
+        """Bring the fragments up to date with the diagram.
+
+        Returns:
+            The fragment of each cell, by cell ID
+        """
+        render = self.render
+        changes = None if self.version is None else diagram.changes_since(self.version)
+        if changes is None:
+            self.fragments = {cell["id"]: render(cell, diagram)
+                              for cell in diagram["cells"]}
+        elif changes:
+            fragments = self.fragments
+            dirty = {}  # type: Dict[str, Optional[Dict[str, Any]]]
+            for cell_id, kind in changes.items():
+                dirty[cell_id] = None if kind == REMOVED else diagram.get_cell(cell_id)
+                if self.dependents is not None:
+                    for dependent in self.dependents(diagram, cell_id):
+                        dirty[dependent["id"]] = dependent
+            for cell_id, cell in dirty.items():
+                if cell is None:
+                    fragments.pop(cell_id, None)
+                else:
+                    fragments[cell_id] = render(cell, diagram)
+        self.version = diagram.version
+        return self.fragments
+
+
+def export_json(diagram: Diagram) -> str:
+    """Return ``json.dumps(diagram)``, re-encoding only the changed cells."""
+    if any(not isinstance(key, str) for key in diagram):
+        return json.dumps(diagram)
+    fragments = _refresh(diagram, ("json",), _json_cell)
+    cells = "[" + ", ".join([fragments[cell["id"]] for cell in diagram["cells"]]) + "]"
+    return "{" + ", ".join([f"{json.dumps(key)}: {cells}" if key == "cells"
+                            else f"{json.dumps(key)}: {json.dumps(value)}"
+                            for key, value in diagram.items()]) + "}"
+
+
+def export_xml(diagram: Diagram, pretty: bool = False) -> str:
+    """Return the ``serializer.iter_xml`` document, re-serializing changed cells."""
+    fragments = _cell_xml(diagram, pretty, 2)
+    return "".join(serializer.iter_xml(diagram, pretty, fragments))
+
+
+def export_drawio(diagram: Diagram, pretty: bool = False, compressed: bool = False,
+                  modified: Optional[int] = None) -> str:
+    """Return the ``serializer.iter_drawio`` document, re-serializing changed cells.
+
+    Compressed pages are deflated again as a whole.
+    """
+    indent = pretty and not compressed
+    fragments = _cell_xml(diagram, indent, 4)
+    return "".join(serializer.iter_drawio(diagram, pretty, modified, compressed,
+                                          fragments))
+
+
+def export(diagram: Diagram, format: str, pretty: bool = False,
+           compressed: bool = False) -> str:
+    """Export a diagram to json, xml or drawio text.
+
+    The output matches ``DrawioAPIClient.export_diagram``.
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    format = format.lower()
+    if format == "json":
+        return export_json(diagram)
+    if format == "xml":
+        return export_xml(diagram, pretty)
+    if format == "drawio":
+        return export_drawio(diagram, pretty, compressed)
+    raise ValueError(f"Unsupported format: {format}")
+
+
+def render_svg(diagram: Diagram, bounds: Tuple[float, float, float, float]) -> str:
+    """Return the ``svg.iter_svg`` document, re-rendering only the changed cells.
+
+    Edges are rendered again when one of their end nodes changes.
+    """
+    fragments = _refresh(diagram, ("svg",), _svg_cell, _connected_edges)
+    body = ([fragments[cell["id"]] for cell in diagram.nodes]
+            + [fragments[cell["id"]] for cell in diagram.edges])
+    return "".join(svg.iter_svg(diagram, bounds, body))
+
+
+def _refresh(diagram: Diagram, key: Hashable, render: Render,
+             dependents: Optional[Dependents] = None) -> Dict[str, str]:
+    caches = diagram._fragment_caches
+    cache = caches.get(key)
+    if cache is None:
+        cache = caches[key] = FragmentCache(render, dependents)
+    return cache.refresh(diagram)
+
+
+def _cell_xml(diagram: Diagram, pretty: bool, level: int) -> List[str]:
+    if not pretty:
+        level = 0
+
+    def render(cell: Dict[str, Any], diagram: Diagram) -> str:
+        return serializer.cell_fragment(cell, pretty, level)
+
+    fragments = _refresh(diagram, ("xml", pretty, level), render)
+    return [fragments[cell["id"]] for cell in diagram["cells"]]
+
+
+def _json_cell(cell: Dict[str, Any], diagram: Diagram) -> str:
+    return json.dumps(cell)
+
+
+def _svg_cell(cell: Dict[str, Any], diagram: Diagram) -> str:
+    if cell.get("type") == "node":
+        return svg.node_fragment(cell)
+    if cell.get("type") == "edge":
+        return svg.edge_fragment(cell, diagram)
+    return ""
+
+
+def _connected_edges(diagram: Diagram, cell_id: str) -> List[Dict[str, Any]]:
+    if diagram.get_node(cell_id) is None:
+        return []
+    return diagram.outgoing(cell_id) + diagram.incoming(cell_id)
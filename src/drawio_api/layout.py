@@ -0,0 +1,476 @@
+"""Automatic layout of diagram nodes."""
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Union
+
+from .diagram import Diagram
+
+# Optional imports - will be used if available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+DIRECTIONS = ("TB", "BT", "LR", "RL")
+
+# Edges crossing more layers than this get a virtual node next to each end
+# only, instead of one in every layer, to bound the number of virtual nodes
+MAX_CHAIN = 8
+
+
+def layered(diagram: Union[Diagram, Dict[str, Any]],
+            direction: str = "TB",
+            layer_spacing: float = 60,
+            node_spacing: float = 40,
+            sweeps: int = 4) -> None:
+    """Arrange nodes in layers so that edges point in one direction (Sugiyama style).
+
+    The layout runs in four phases, each linear or ``n log n`` in the size
+    of the graph:
+
+    1. Cycle removal: edges closing a cycle in a depth-first search are
+       reversed for the purpose of the layout.
+    2. Layer assignment: longest-path layering, with sources pulled down
+       next to their successors. Edges spanning several layers get a chain
+       of virtual nodes so they take part in the next phases; edges longer
+       than ``MAX_CHAIN`` layers only get one next to each end, so the
+       number of virtual nodes stays linear in the number of edges.
+    3. Crossing minimization: alternating down and up sweeps ordering each
+       layer by the barycenter of its neighbors in the previous layer.
+    4. Coordinate assignment: each node is placed at the mean position of
+       its neighbors, subject to keeping the layer order and spacing.
+
+    Args:
+        diagram: The diagram to lay out; node ``x``/``y`` are updated in place
+        direction: Direction edges point in: TB (top to bottom), BT, LR or RL
+        layer_spacing: Gap between consecutive layers
+        node_spacing: Gap between neighboring nodes of a layer
+        sweeps: Number of down/up crossing-minimization sweeps
+
+    Raises:
+        ValueError: If the direction is not supported
+    """
+    if direction not in DIRECTIONS:
+        raise ValueError(f"Unsupported layout direction: {direction}")
+    diagram = Diagram.from_dict(diagram)
+    nodes = list(diagram.nodes)
+    if not nodes:
+        return
+
+    node_count = len(nodes)
+    positions = {cell["id"]: i for i, cell in enumerate(nodes)}
+    horizontal = direction in ("LR", "RL")
+    # Extent of each node along its layer ("breadth") and across it ("depth")
+    widths = [cell["width"] for cell in nodes]
+    heights = [cell["height"] for cell in nodes]
+    breadth = heights if horizontal else widths
+    depth = widths if horizontal else heights
+
+    successors = [[] for _ in range(node_count)]  # type: List[List[int]]
+    for edge in diagram.edges:
+        source = positions.get(edge["source"])
+        target = positions.get(edge["target"])
+        if source is not None and target is not None and source != target:
+            successors[source].append(target)
+
+    successors = _remove_cycles(successors)
+    ranks = _assign_layers(successors)
+    layers, upper, lower, breadth = _split_long_edges(successors, ranks, breadth)
+    _order_layers(layers, upper, lower, sweeps)
+    along = _assign_positions(layers, upper, lower, breadth, node_spacing)
+
+    # Position of each layer across the flow direction
+    layer_depth = [0.0] * len(layers)
+    for node, rank in enumerate(ranks):
+        layer_depth[rank] = max(layer_depth[rank], depth[node])
+    across = []
+    offset = 0.0
+    for extent in layer_depth:
+        across.append(offset + extent / 2)
+        offset += extent + layer_spacing
+
+    centers = []
+    for node in range(node_count):
+        u, v = along[node], across[ranks[node]]
+        if direction in ("BT", "RL"):
+            v = -v
+        centers.append((v, u) if horizontal else (u, v))
+    min_x = min(x - width / 2 for (x, _), width in zip(centers, widths))
+    min_y = min(y - height / 2 for (_, y), height in zip(centers, heights))
+
+    diagram.move_nodes({
+        cell["id"]: (round(x - width / 2 - min_x), round(y - height / 2 - min_y))
+        for cell, (x, y), width, height in zip(nodes, centers, widths, heights)
+    })
+
+
+def _remove_cycles(successors: List[List[int]]) -> List[List[int]]:
+    """Return an acyclic copy of the graph with DFS back edges reversed."""
+    count = len(successors)
+    NEW, ACTIVE, DONE = 0, 1, 2
+    state = [NEW] * count
+    result = [[] for _ in range(count)]  # type: List[List[int]]
+    for root in range(count):
+        if state[root] != NEW:
+            continue
+        state[root] = ACTIVE
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state[child] == NEW:
+                    result[node].append(child)
+                    state[child] = ACTIVE
+                    stack.append((child, iter(successors[child])))
+                    break
+                if state[child] == ACTIVE:
+                    result[child].append(node)  # Back edge: reverse it
+                else:
+                    result[node].append(child)
+            else:
+                state[node] = DONE
+                stack.pop()
+    # Reversing can duplicate an existing edge
+    return [list(dict.fromkeys(children)) for children in result]
+
+
+def _assign_layers(successors: List[List[int]]) -> List[int]:
+    """Assign each node of an acyclic graph to a layer (longest path)."""
+    count = len(successors)
+    in_degree = [0] * count
+    for children in successors:
+        for child in children:
+            in_degree[child] += 1
+
+    order = [node for node in range(count) if not in_degree[node]]
+    ranks = [0] * count
+    for node in order:  # Kahn's algorithm; ``order`` grows while iterating
+        rank = ranks[node] + 1
+        for child in successors[node]:
+            if ranks[child] < rank:
+                ranks[child] = rank
+            in_degree[child] -= 1
+            if not in_degree[child]:
+                order.append(child)
+
+    # Sources sit right above their closest successor instead of in layer 0
+    has_parent = [False] * count
+    for children in successors:
+        for child in children:
+            has_parent[child] = True
+    for node in reversed(order):
+        if not has_parent[node] and successors[node]:
+            ranks[node] = min(ranks[child] for child in successors[node]) - 1
+    return ranks
+
+
+def _split_long_edges(successors: List[List[int]], ranks: List[int],
+                      breadth: Sequence[float]):
+    """Insert virtual nodes so every edge connects consecutive layers.
+
+    Edges crossing more than ``MAX_CHAIN`` layers get a virtual node in the
+    layer below their source and in the layer above their target, joined
+    directly across the layers in between.
+
+    Returns:
+        The nodes of each layer, the upper and lower neighbors of every
+        (real or virtual) node and the breadth of every node
+    """
+    breadth = list(breadth)
+    upper = [[] for _ in range(len(successors))]  # type: List[List[int]]
+    lower = [[] for _ in range(len(successors))]  # type: List[List[int]]
+    node_ranks = list(ranks)
+
+    for node, children in enumerate(successors):
+        for child in children:
+            previous = node
+            crossed = range(ranks[node] + 1, ranks[child])  # type: Sequence[int]
+            if len(crossed) > MAX_CHAIN:
+                crossed = (crossed[0], crossed[-1])
+            for rank in crossed:
+                virtual = len(breadth)
+                breadth.append(0)
+                node_ranks.append(rank)
+                upper.append([previous])
+                lower.append([])
+                lower[previous].append(virtual)
+                previous = virtual
+            lower[previous].append(child)
+            upper[child].append(previous)
+
+    layers = [[] for _ in range(max(node_ranks) + 1)]  # type: List[List[int]]
+    for node, rank in enumerate(node_ranks):
+        layers[rank].append(node)
+    return layers, upper, lower, breadth
+
+
+def _order_layers(layers: List[List[int]], upper: List[List[int]],
+                  lower: List[List[int]], sweeps: int) -> None:
+    """Reorder layers in place with the barycenter heuristic."""
+    index = [0] * len(upper)
+
+    def renumber(layer: List[int]) -> None:
+        for i, node in enumerate(layer):
+            index[node] = i
+
+    def sort_layer(layer: List[int], neighbors: List[List[int]]) -> None:
+        keys = {}
+        for node in layer:
+            adjacent = neighbors[node]
+            if adjacent:
+                keys[node] = sum(index[other] for other in adjacent) / len(adjacent)
+            else:
+                keys[node] = index[node]  # Unconnected nodes keep their place
+        layer.sort(key=keys.__getitem__)
+        renumber(layer)
+
+    for layer in layers:
+        renumber(layer)
+    for _ in range(sweeps):
+        for layer in layers[1:]:
+            sort_layer(layer, upper)
+        for layer in reversed(layers[:-1]):
+            sort_layer(layer, lower)
+
+
+def _assign_positions(layers: List[List[int]], upper: List[List[int]],
+                      lower: List[List[int]], breadth: Sequence[float],
+                      spacing: float, passes: int = 2) -> List[float]:
+    """Return the center of every node along its layer."""
+    along = [0.0] * len(breadth)
+    for layer in layers:
+        offset = 0.0
+        for node in layer:
+            along[node] = offset + breadth[node] / 2
+            offset += breadth[node] + spacing
+
+    for _ in range(passes):
+        for layer in layers[1:]:
+            _place_layer(layer, upper, along, breadth, spacing)
+        for layer in reversed(layers[:-1]):
+            _place_layer(layer, lower, along, breadth, spacing)
+    return along
+
+
+def _place_layer(layer: List[int], neighbors: List[List[int]], along: List[float],
+                 breadth: Sequence[float], spacing: float) -> None:
+    """Move each node towards the mean of its neighbors, keeping order and gaps."""
+    desired = []
+    for node in layer:
+        adjacent = neighbors[node]
+        if adjacent:
+            desired.append(sum(along[other] for other in adjacent) / len(adjacent))
+        else:
+            desired.append(along[node])
+
+    gaps = [(breadth[left] + breadth[right]) / 2 + spacing
+            for left, right in zip(layer, layer[1:])]
+
+    # Resolve overlaps by pushing right, then by pushing left, and average
+    # the two; both satisfy the spacing constraints, so their mean does too
+    pushed_right = desired[:]
+    for i, gap in enumerate(gaps):
+        pushed_right[i + 1] = max(pushed_right[i + 1], pushed_right[i] + gap)
+    pushed_left = desired[:]
+    for i in range(len(gaps) - 1, -1, -1):
+        pushed_left[i] = min(pushed_left[i], pushed_left[i + 1] - gaps[i])
+
+    for node, right, left in zip(layer, pushed_right, pushed_left):
+        along[node] = (right + left) / 2
+
+
+def force(diagram: Union[Diagram, Dict[str, Any]],
+          iterations: int = 100,
+          seed: int = 0,
+          pinned: Iterable[str] = (),
+          spacing: float = 0,
+          theta: float = 0.8,
+          gravity: float = 2.0) -> None:
+    """Arrange nodes with a force-directed (Fruchterman-Reingold) simulation.
+
+    Suited to undirected topologies such as network maps: every pair of
+    nodes repels and every edge pulls its ends together. Forces are
+    computed with NumPy over all nodes at once, and repulsion uses a
+    Barnes-Hut quadtree, so an iteration costs O(N log N) rather than
+    O(N^2). Nodes are treated as points, so spacing them well apart (the
+    default) is what keeps their rectangles from overlapping.
+
+    Args:
+        diagram: The diagram to lay out; node ``x``/``y`` are updated in place
+        iterations: Number of simulation steps (the step size cools linearly)
+        seed: Seed of the random initial placement; equal seeds give equal layouts
+        pinned: IDs of nodes that keep their current position
+        spacing: Ideal edge length (defaults to twice the mean node size)
+        theta: Barnes-Hut opening angle; smaller is more accurate and slower
+        gravity: Strength of the pull towards the centroid; higher values
+            give a more compact layout (0 lets the graph spread out freely)
+
+    Raises:
+        ImportError: If NumPy is not available
+        KeyError: If one of ``pinned`` is not a node of the diagram
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("NumPy is required for the force layout: pip install numpy")
+    diagram = Diagram.from_dict(diagram)
+    pinned = list(pinned)
+    for node_id in pinned:
+        if diagram.get_node(node_id) is None:
+            raise KeyError(f"No node with ID {node_id!r} to pin")
+    nodes = list(diagram.nodes)
+    if not nodes:
+        return
+
+    count = len(nodes)
+    positions = {cell["id"]: i for i, cell in enumerate(nodes)}
+    sizes = np.array([(cell["width"], cell["height"]) for cell in nodes],
+                     dtype=np.float64)
+    fixed = np.zeros(count, dtype=bool)
+    for node_id in pinned:
+        fixed[positions[node_id]] = True
+    ideal = spacing or 2 * float(sizes.max(axis=1).mean())
+
+    # Random start in a square that fits the nodes at the ideal spacing;
+    # pinned nodes start (and stay) at their current centers
+    side = ideal * math.sqrt(count)
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, side, size=(count, 2))
+    if fixed.any():
+        corners = np.array([(cell["x"], cell["y"]) for cell in nodes],
+                           dtype=np.float64)
+        current = corners + sizes / 2
+        points += current[fixed].mean(axis=0) - side / 2
+        points[fixed] = current[fixed]
+
+    pairs = set()
+    for edge in diagram.edges:
+        source = positions.get(edge["source"])
+        target = positions.get(edge["target"])
+        if source is not None and target is not None and source != target:
+            pairs.add((min(source, target), max(source, target)))
+    edges = np.array(sorted(pairs), dtype=np.int64).reshape(-1, 2)
+
+    temperature = side / 10
+    for step in range(iterations):
+        displacement = _repulsion(points, ideal * ideal, theta)
+        if len(edges):
+            delta = points[edges[:, 0]] - points[edges[:, 1]]
+            pull = delta * (np.hypot(delta[:, 0], delta[:, 1]) / ideal)[:, None]
+            for axis in range(2):
+                displacement[:, axis] -= np.bincount(edges[:, 0], pull[:, axis],
+                                                     minlength=count)
+                displacement[:, axis] += np.bincount(edges[:, 1], pull[:, axis],
+                                                     minlength=count)
+
+        if gravity:
+            # A spring towards the centroid balances the repulsion of the whole
+            # graph at a radius of about spacing * sqrt(N / gravity)
+            displacement -= gravity * (points - points.mean(axis=0))
+
+        # Move along the net force, by at most the current temperature
+        length = np.hypot(displacement[:, 0], displacement[:, 1])
+        limit = temperature * (1 - step / iterations)
+        scale = np.minimum(length, limit) / np.maximum(length, 1e-9)
+        scale[fixed] = 0
+        points += displacement * scale[:, None]
+
+    corners = points - sizes / 2
+    if not fixed.any():
+        corners -= corners.min(axis=0)
+    diagram.move_nodes({
+        cell["id"]: (round(x), round(y))
+        for cell, (x, y) in zip(nodes, corners.tolist())
+    })
+
+
+def _repulsion(points: "np.ndarray", strength: float, theta: float) -> "np.ndarray":
+    """Return the repulsive force on every point, approximated with Barnes-Hut.
+
+    The quadtree is built from Morton codes: sorting the points by code
+    makes every quadtree cell a contiguous run at every level. All points
+    then descend the tree together, as an array of (point, cell) pairs;
+    pairs whose cell is small and far enough away (``size / distance <
+    theta``) are approximated by the cell's center of mass, the others are
+    replaced by the cell's children.
+    """
+    count = len(points)
+    depth = max(1, min(16, int(math.log2(count) / 2) + 3))
+    origin = points.min(axis=0)
+    side = max(float((points.max(axis=0) - origin).max()), 1e-9)
+    cells = 1 << depth
+    grid = np.minimum((points - origin) / side * cells, cells - 1).astype(np.int64)
+    codes = _spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << 1)
+
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    sorted_points = points[order]
+    levels = []
+    for level in range(depth + 1):
+        keys = sorted_codes >> (2 * (depth - level))
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        mass = np.diff(np.r_[starts, count])
+        center = np.add.reduceat(sorted_points, starts, axis=0) / mass[:, None]
+        owner = np.empty(count, dtype=np.int64)
+        owner[order] = np.repeat(np.arange(len(starts)), mass)
+        levels.append((keys[starts], starts, mass, center, owner))
+
+    force = np.zeros_like(points)
+
+    def push(point: "np.ndarray", delta: "np.ndarray", weight: "np.ndarray") -> None:
+        distance2 = np.maximum(np.einsum("ij,ij->i", delta, delta), 1e-2)
+        pushes = delta * (strength * weight / distance2)[:, None]
+        for axis in range(2):
+            force[:, axis] += np.bincount(point, pushes[:, axis], minlength=count)
+
+    point = np.arange(count)
+    cell = np.zeros(count, dtype=np.int64)
+    for level, (keys, starts, mass, center, owner) in enumerate(levels):
+        delta = points[point] - center[cell]
+        size = side / (1 << level)
+        distance2 = np.einsum("ij,ij->i", delta, delta)
+        own = owner[point] == cell
+        accept = ~own & (size * size < theta * theta * distance2)
+        if level == depth:
+            # Leaf cells holding a single point are exact
+            accept |= ~own & (mass[cell] == 1)
+        push(point[accept], delta[accept], mass[cell[accept]])
+
+        opened = ~accept
+        point, cell = point[opened], cell[opened]
+        if level == depth:
+            break
+        # Replace each opened cell by its children (a contiguous run one level down)
+        child_keys = levels[level + 1][0] >> 2
+        first = np.searchsorted(child_keys, keys[cell], side="left")
+        counts = np.searchsorted(child_keys, keys[cell], side="right") - first
+        point, cell = _expand(point, first, counts)
+
+    # Close leaves with several points (and each point's own leaf) are
+    # summed exactly over their members
+    _, starts, mass, _, _ = levels[depth]
+    point, member = _expand(point, starts[cell], mass[cell])
+    other = order[member]
+    keep = other != point
+    point, other = point[keep], other[keep]
+    push(point, points[point] - points[other], np.ones(len(point)))
+    return force
+
+
+def _expand(point: "np.ndarray", first: "np.ndarray", counts: "np.ndarray"):
+    """Pair each point with every index of its run ``first[i]:first[i] + counts[i]``."""
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(point, counts), np.repeat(first, counts) + offsets
+
+
+def _spread_bits(values: "np.ndarray") -> "np.ndarray":
+    """Interleave zeros between the low 16 bits of each value (for Morton codes)."""
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+
+LAYOUTS: Dict[str, Callable[..., None]] = {
+    "layered": layered,
+    "force": force,
+}
@@ -0,0 +1,215 @@
+"""Streaming loader for .drawio and mxGraphModel XML files."""
+
+import io
+import os
+import re
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, IO, Optional, Union
+
+from . import compression
+from .diagram import Diagram
+from .document import Document, Page
+
+# Elements draw.io wraps around an mxCell to attach custom properties
+_WRAPPER_TAGS = ("UserObject", "object")
+
+_DIAGRAM_TAG = re.compile(rb"<diagram\b[^>]*>")
+
+
+def load_diagram(source: Union[str, "os.PathLike[str]", IO],
+                 title: Optional[str] = None) -> Diagram:
+    """Load the first page of a .drawio file or an mxGraphModel XML document.
+
+    The document is parsed incrementally with ``iterparse`` and every element
+    is discarded as soon as its cell has been read, so memory use is bounded
+    by the resulting diagram rather than by the XML tree. Compressed pages
+    are decompressed transparently.
+
+    Args:
+        source: A file path or a readable (preferably binary) stream
+        title: Title for the diagram; defaults to the page name, then the
+            file name
+
+    Returns:
+        The loaded diagram with node and edge cells
+    """
+    diagram = Diagram(title=title or _default_title(source))
+    _read_cells(source, diagram, use_page_name=title is None)
+    return diagram
+
+
+def load_document(source: Union[str, "os.PathLike[str]", IO, bytes]) -> Document:
+    """Load every page of a .drawio file without parsing the pages' cells.
+
+    The file is scanned for its ``<diagram>`` elements and each page keeps
+    its raw content; the cells of a page are only parsed when its
+    ``diagram`` is first accessed. Listing the pages of a large file or
+    rendering one of them therefore costs little more than reading it.
+
+    Args:
+        source: A file path, a readable stream or the document bytes
+
+    Returns:
+        The document, with one page per ``<diagram>`` element; a plain
+        mxGraphModel document becomes a single page
+    """
+    if isinstance(source, bytes):
+        data = source
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            data = f.read()
+    else:
+        data = source.read()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+    document = Document()
+    position = 0
+    for number, match in enumerate(_DIAGRAM_TAG.finditer(data), 1):
+        if match.start() < position:
+            continue  # a "<diagram" inside the previous page's content
+        tag = match.group()
+        if tag.endswith(b"/>"):
+            attrib = ET.fromstring(tag).attrib
+            content = b""
+            position = match.end()
+        else:
+            attrib = ET.fromstring(tag + b"</diagram>").attrib
+            end = data.find(b"</diagram>", match.end())
+            if end < 0:
+                raise ValueError("Unterminated <diagram> element")
+            content = data[match.end():end]
+            position = end + len(b"</diagram>")
+        document.pages.append(Page(attrib.get("name") or f"Page-{number}",
+                                   attrib.get("id") or f"page-{number}",
+                                   source=content, parse=_read_page))
+
+    if not document.pages:
+        # A standalone mxGraphModel document
+        name = getattr(source, "name", source)
+        if isinstance(name, (str, os.PathLike)):
+            title = _default_title(name)
+        else:
+            title = "Page-1"
+        document.pages.append(Page(title, "page-1", source=data, parse=_read_page))
+    return document
+
+
+def _read_page(content: bytes, diagram: Diagram) -> None:
+    """Add the cells of a page's raw ``<diagram>`` content to ``diagram``."""
+    content = content.strip()
+    if content and not content.startswith(b"<"):
+        # Compressed page
+        content = compression.decompress(content.decode("ascii")).encode("utf-8")
+    if content:
+        _read_cells(io.BytesIO(content), diagram, use_page_name=False)
+
+
+def _read_cells(source: Union[str, "os.PathLike[str]", IO], diagram: Diagram,
+                use_page_name: bool) -> None:
+    """Add the cells of the first page in ``source`` to ``diagram``."""
+    stack = []
+    offsets = {}  # type: Dict[str, tuple]
+    edges = {}  # type: Dict[str, Dict[str, Any]]
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "diagram" and use_page_name and elem.get("name"):
+                diagram["title"] = elem.get("name")
+            continue
+
+        stack.pop()
+        if elem.tag == "mxCell":
+            wrapper = stack[-1] if stack and stack[-1].tag in _WRAPPER_TAGS else None
+            cell = _read_cell(elem, wrapper, offsets, edges)
+            if cell is not None:
+                diagram.add_cell(cell)
+        elif elem.tag == "diagram":
+            if elem.text and elem.text.strip() and not len(elem):
+                # Compressed page: the text is a deflated mxGraphModel document
+                model = compression.decompress(elem.text)
+                _read_cells(io.BytesIO(model.encode("utf-8")), diagram, False)
+            break
+
+        if elem.tag == "mxCell" or elem.tag in _WRAPPER_TAGS:
+            # Drop finished cells (and their geometry) so the tree never grows
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+def _read_cell(elem: ET.Element, wrapper: Optional[ET.Element],
+               offsets: Dict[str, tuple],
+               edges: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Map an ``mxCell`` element to a node or edge cell dict.
+
+    Edge labels stored as vertex children of the edge, with relative
+    geometry, are folded into the label of the edge instead.
+    """
+    attrib = wrapper.attrib if wrapper is not None else elem.attrib
+    cell_id = attrib.get("id", elem.get("id", ""))
+    if wrapper is not None:
+        label = attrib.get("label", attrib.get("value"))
+    else:
+        label = elem.get("value")
+    style = elem.get("style", "")
+    parent = elem.get("parent")
+    geometry = elem.find("mxGeometry")
+
+    if elem.get("vertex") == "1":
+        if parent in edges and geometry is not None and geometry.get("relative") == "1":
+            edge = edges[parent]
+            if label:
+                edge["label"] = f"{edge['label']}\n{label}" if edge["label"] else label
+            return None
+        x = _number(geometry, "x")
+        y = _number(geometry, "y")
+        # Children of a group are positioned relative to their parent
+        if parent in offsets:
+            parent_x, parent_y = offsets[parent]
+            x, y = x + parent_x, y + parent_y
+        offsets[cell_id] = (x, y)
+        return {
+            "id": cell_id,
+            "type": "node",
+            "label": label or "",
+            "x": x,
+            "y": y,
+            "width": _number(geometry, "width"),
+            "height": _number(geometry, "height"),
+            "style": style,
+        }
+
+    if elem.get("edge") == "1":
+        cell = {
+            "id": cell_id,
+            "type": "edge",
+            "source": elem.get("source"),
+            "target": elem.get("target"),
+            "label": label or None,
+            "style": style,
+        }  # type: Dict[str, Any]
+        points = geometry.find("Array[@as='points']") if geometry is not None else None
+        if points is not None:
+            cell["points"] = [[_number(point, "x"), _number(point, "y")]
+                              for point in points.iter("mxPoint")]
+        edges[cell_id] = cell
+        return cell
+
+    return None
+
+
+def _number(geometry: Optional[ET.Element], name: str) -> Union[int, float]:
+    """Read a numeric geometry attribute, keeping integral values as ints."""
+    if geometry is None:
+        return 0
+    value = float(geometry.get(name, 0))
+    return int(value) if value.is_integer() else value
+
+
+def _default_title(source: Union[str, "os.PathLike[str]", IO]) -> str:
+    name = getattr(source, "name", source)
+    if isinstance(name, (str, os.PathLike)):
+        return os.path.splitext(os.path.basename(os.fspath(name)))[0]
+    return "New Diagram"
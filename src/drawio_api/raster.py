@@ -0,0 +1,141 @@
+"""In-memory conversion of SVG documents to raster and PDF images."""
+
+import io
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Optional imports - will be used if available
+try:
+    import cairosvg
+    CAIROSVG_AVAILABLE = True
+except (ImportError, OSError):
+    # OSError: the package is installed but the cairo library is missing
+    CAIROSVG_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+RASTER_FORMATS = ("png", "jpg", "jpeg", "pdf")
+
+
+def render(svg_data: bytes,
+           format: str = "png",
+           transparent: bool = False,
+           scale: float = 1.0,
+           bg: str = "") -> bytes:
+    """Convert an SVG document to PNG, JPEG or PDF bytes without temp files.
+
+    Args:
+        svg_data: The UTF-8 encoded SVG document
+        format: Output format (png, jpg, jpeg, pdf)
+        transparent: Whether the background should be transparent (png only)
+        scale: Scale factor for the output image (1.0 = 100%)
+        bg: Background color (e.g. '#ffffff'); defaults to white
+
+    Returns:
+        The encoded image
+
+    Raises:
+        ImportError: If CairoSVG is not available
+        ValueError: If the format is not supported
+    """
+    return render_many(svg_data, [(format, transparent, scale, bg)])[0]
+
+
+def render_many(svg_data: bytes,
+                targets: Iterable[Tuple[str, bool, float, str]]) -> List[bytes]:
+    """Convert one SVG document to several images.
+
+    The SVG is parsed once and the parsed tree is shared by every target
+    when CairoSVG exposes its surface API. Targets that need the same
+    rendering (e.g. a PNG and a JPEG with the same scale and background)
+    share a single rasterization.
+
+    Args:
+        svg_data: The UTF-8 encoded SVG document
+        targets: ``(format, transparent, scale, bg)`` tuples; ``svg`` is
+            accepted as a format and returns ``svg_data`` unchanged
+
+    Returns:
+        The encoded images, in the order of ``targets``
+
+    Raises:
+        ImportError: If a raster format is requested and CairoSVG is missing
+        ValueError: If a format is not supported
+    """
+    targets = [(format.lower(), transparent, scale, bg)
+               for format, transparent, scale, bg in targets]
+    for format, _, _, _ in targets:
+        if format != "svg" and format not in RASTER_FORMATS:
+            raise ValueError(f"Unsupported image format: {format}")
+    rasterized = any(format != "svg" for format, _, _, _ in targets)
+    if rasterized and not CAIROSVG_AVAILABLE:
+        raise ImportError("CairoSVG is required for raster export: "
+                          "pip install cairosvg")
+
+    tree = None
+    rendered: Dict[Tuple[str, float, Optional[str]], bytes] = {}
+    results = []
+    for format, transparent, scale, bg in targets:
+        if format == "svg":
+            results.append(svg_data)
+            continue
+
+        background_color: Optional[str] = bg if bg else "#ffffff"
+        if format == "png" and transparent:
+            background_color = "transparent"
+        elif format == "pdf":
+            background_color = None
+        kind = "pdf" if format == "pdf" else "png"
+
+        key = (kind, scale, background_color)
+        if key not in rendered:
+            if tree is None:
+                tree = _parse_svg(svg_data)
+            rendered[key] = _convert(tree, svg_data, kind, scale, background_color)
+
+        if format in ("jpg", "jpeg"):
+            # JPEG doesn't support transparency: re-encode the opaque PNG
+            results.append(png_to_jpeg(rendered[key]))
+        else:
+            results.append(rendered[key])
+    return results
+
+
+def _parse_svg(svg_data: bytes) -> Any:
+    """Parse the SVG once with CairoSVG, or return False if not supported."""
+    try:
+        return cairosvg.parser.Tree(bytestring=svg_data)
+    except AttributeError:
+        return False
+
+
+def _convert(tree: Any, svg_data: bytes, kind: str, scale: float,
+             background_color: Optional[str]) -> bytes:
+    """Rasterize a parsed tree, falling back to the one-shot converters."""
+    if tree:
+        if kind == "pdf":
+            surface_class = cairosvg.surface.PDFSurface
+        else:
+            surface_class = cairosvg.surface.PNGSurface
+        output = io.BytesIO()
+        surface_class(tree, output, 96, scale=scale,
+                      background_color=background_color).finish()
+        return output.getvalue()
+    if kind == "pdf":
+        return cairosvg.svg2pdf(bytestring=svg_data, scale=scale)
+    return cairosvg.svg2png(bytestring=svg_data, scale=scale,
+                            background_color=background_color)
+
+
+def png_to_jpeg(png_data: bytes, quality: int = 95) -> bytes:
+    """Re-encode PNG bytes as JPEG, or return them unchanged without Pillow."""
+    if not PILLOW_AVAILABLE:
+        print("Warning: Pillow not available. Saved as PNG instead of JPEG.")
+        return png_data
+    with Image.open(io.BytesIO(png_data)) as img:
+        output = io.BytesIO()
+        img.convert("RGB").save(output, format="JPEG", quality=quality)
+    return output.getvalue()
@@ -0,0 +1,179 @@
+"""Image export through a remote draw.io export server."""
+
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+EXPORT_FORMATS = ("png", "jpg", "jpeg", "pdf", "svg")
+
+# Responses worth another attempt: throttling and transient server errors
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class ExportServerError(RuntimeError):
+    """The export server failed or could not be reached."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class RemoteExporter:
+    """Renders diagrams by POSTing their XML to a draw.io export server.
+
+    The server is expected to follow the form API of draw.io's export
+    server (``format``, ``xml``, ``scale``, ``bg``, ``transparent`` fields),
+    answering with the encoded image.
+
+    Requests go through one ``requests.Session`` whose connection pool is
+    sized to ``max_concurrency``, so connections are kept alive and reused
+    across exports. At most ``max_concurrency`` requests are in flight at a
+    time, whichever thread sends them. Connection errors, timeouts and 429
+    or 5xx responses are retried with exponential backoff, waiting longer
+    when the server asks to with ``Retry-After``, but never more than
+    ``max_backoff`` seconds between attempts.
+    """
+
+    def __init__(self, url: str,
+                 timeout: Union[float, Tuple[float, float]] = (5.0, 60.0),
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 max_concurrency: int = 4,
+                 headers: Optional[Dict[str, str]] = None,
+                 max_backoff: float = 30.0):
+        """Initialize the exporter.
+
+        Args:
+            url: The export endpoint, e.g. ``http://localhost:8000/``
+            timeout: Seconds to wait for the server, as a single value or a
+                (connect, read) pair
+            retries: Attempts after the first one for failed requests
+            backoff: Delay before the first retry in seconds; it doubles
+                with every further retry
+            max_concurrency: Maximum number of requests in flight at once
+            headers: Extra HTTP headers sent with every request
+            max_backoff: Longest wait before a retry in seconds, whatever
+                the backoff or a ``Retry-After`` header asks for
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.headers = dict(headers or {})
+        self._open()
+
+    def _open(self) -> None:
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sessions and semaphores don't pickle; worker processes open their own
+        state = self.__dict__.copy()
+        del state["session"], state["_slots"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._open()
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self.session.close()
+
+    def __enter__(self) -> "RemoteExporter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def export(self, xml: str, format: str = "png", scale: float = 1.0,
+               transparent: bool = False, bg: str = "") -> bytes:
+        """Render a diagram on the server.
+
+        Args:
+            xml: The .drawio or mxGraphModel XML of the diagram
+            format: Image format (png, jpg, pdf, svg)
+            scale: Scale factor for the output image (1.0 = 100%)
+            transparent: Whether the background should be transparent (png only)
+            bg: Background color (e.g. '#ffffff')
+
+        Returns:
+            The encoded image
+
+        Raises:
+            ValueError: If the format is not supported
+            ExportServerError: If the server still fails after all retries
+        """
+        format = format.lower()
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported image format: {format}")
+        fields = {"format": "jpg" if format == "jpeg" else format, "xml": xml,
+                  "scale": str(scale)}
+        if transparent and format == "png":
+            fields["transparent"] = "1"
+        elif bg:
+            fields["bg"] = bg
+        return self._post(fields)
+
+    def export_many(self, xmls: Iterable[str], format: str = "png", scale: float = 1.0,
+                    transparent: bool = False, bg: str = "") -> List[bytes]:
+        """Render several diagrams concurrently, up to ``max_concurrency`` at a time.
+
+        Returns:
+            The encoded images, in input order
+
+        Raises:
+            ExportServerError: If one of the exports fails
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self.export, xml, format, scale, transparent, bg)
+                       for xml in xmls]
+            return [future.result() for future in futures]
+
+    def _post(self, fields: Dict[str, str]) -> bytes:
+        """POST a form, retrying transient failures with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            retry_after = None  # type: Optional[float]
+            with self._slots:
+                try:
+                    response = self.session.post(self.url, data=fields,
+                                                 timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = ExportServerError(f"Export server unavailable: {e}")
+                else:
+                    if response.status_code == 200:
+                        return response.content
+                    error = ExportServerError(
+                        f"Export server returned HTTP {response.status_code}",
+                        response.status_code)
+                    if response.status_code not in RETRY_STATUSES:
+                        raise error
+                    retry_after = _retry_after(response)
+            if attempt < self.retries:
+                # Sleep outside the slot so other requests can proceed
+                delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+                time.sleep(min(max(delay, retry_after or 0), self.max_backoff))
+        raise error
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Return the delay requested by a ``Retry-After`` header in seconds, if any."""
+    try:
+        delay = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+    return delay if math.isfinite(delay) and delay >= 0 else None
@@ -0,0 +1,363 @@
+"""Orthogonal edge routing around node rectangles."""
+
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .diagram import Diagram
+from .geometry import plain
+from .spatial import SpatialIndex
+from .styles import parse_style
+
+Point = Tuple[float, float]
+Rect = Tuple[float, float, float, float]
+
+# Extra cost of a bend, in units of length
+BEND_PENALTY = 20
+
+# Overweighting the A* estimate trades a few percent of path length for a
+# much smaller search
+HEURISTIC_WEIGHT = 1.2
+
+# Z-shaped paths tried before falling back to the grid search
+MAX_CHANNELS = 8
+
+
+def route_edges(diagram: Union[Diagram, Dict[str, Any]],
+                edge_ids: Optional[Iterable[str]] = None,
+                margin: float = 10) -> int:
+    """Compute orthogonal paths around nodes and store them as edge waypoints.
+
+    Each routed edge gets a ``points`` list of ``[x, y]`` bend points, which
+    the SVG export draws and the XML export writes as ``mxPoint`` waypoints.
+
+    Args:
+        diagram: The diagram whose edges to route
+        edge_ids: The edges to route (defaults to every edge with
+            ``edgeStyle=orthogonalEdgeStyle``)
+        margin: Minimum clearance between a path and the nodes it avoids
+
+    Returns:
+        The number of edges routed
+
+    Raises:
+        KeyError: If one of ``edge_ids`` is not an edge of the diagram
+    """
+    diagram = Diagram.from_dict(diagram)
+    if edge_ids is None:
+        edges = [edge for edge in diagram.edges
+                 if parse_style(edge.get("style") or "").orthogonal]
+    else:
+        edges = []
+        for edge_id in edge_ids:
+            edge = diagram.get_cell(edge_id)
+            if edge is None or edge.get("type") != "edge":
+                raise KeyError(f"No edge with ID {edge_id!r}")
+            edges.append(edge)
+
+    index = diagram.spatial
+    routed = {}  # type: Dict[str, Dict[str, Any]]
+    for edge in edges:
+        source = diagram.get_node(edge["source"])
+        target = diagram.get_node(edge["target"])
+        if source is None or target is None or source is target:
+            continue
+        points = route_edge(source, target, index, margin)
+        routed[edge["id"]] = {"points": [[plain(float(x)), plain(float(y))]
+                                         for x, y in points]}
+    if routed:
+        # One edit, so a single undo reverts the whole routing
+        diagram.update_cells(routed)
+    return len(routed)
+
+
+def route_edge(source: Dict[str, Any], target: Dict[str, Any],
+               index: SpatialIndex, margin: float = 10) -> List[Point]:
+    """Return the bend points of an orthogonal path from ``source`` to ``target``.
+
+    The path leaves the side of the source facing the target and enters
+    the opposite side of the target. Straight and Z-shaped paths are tried
+    first; if all of them hit a node, the shortest path with few bends is
+    searched on the grid formed by the obstacle boundaries.
+
+    Args:
+        source: The source node cell
+        target: The target node cell
+        index: Spatial index of all nodes, by node ID
+        margin: Minimum clearance between the path and other nodes
+
+    Returns:
+        The bend points, excluding the two end points
+    """
+    source_rect = _rect(source)
+    target_rect = _rect(target)
+    vertical, start, end, start_stub, end_stub = _ports(source_rect, target_rect,
+                                                        margin)
+    ignore = (source["id"], target["id"])
+
+    for points in _candidates(vertical, start, end, start_stub, end_stub,
+                              index, margin, ignore):
+        if _clear([start] + points + [end], index, margin, ignore):
+            return points
+
+    # Search windows of increasing size around the two nodes
+    window = _union(_inflate(source_rect, margin), _inflate(target_rect, margin))
+    grow = 4 * margin + max(source_rect[2] - source_rect[0],
+                            source_rect[3] - source_rect[1])
+    for _ in range(4):
+        window = _inflate(window, grow)
+        path = _search(start_stub, end_stub, window, source_rect, target_rect,
+                       index, margin, ignore)
+        if path is not None:
+            points = _simplify([start] + path + [end])[1:-1]
+            return points or [((start[0] + end[0]) / 2, (start[1] + end[1]) / 2)]
+        grow *= 2
+
+    # Nothing found: fall back to the plain dogleg
+    return _dogleg(vertical, start, end)
+
+
+def attach(node: Dict[str, Any], toward: Point) -> Point:
+    """Return where an orthogonal segment towards ``toward`` meets the node's border."""
+    x0, y0, x1, y1 = _rect(node)
+    x, y = toward
+    if x0 <= x <= x1:
+        return (x, y1 if y >= (y0 + y1) / 2 else y0)
+    if y0 <= y <= y1:
+        return (x1 if x >= (x0 + x1) / 2 else x0, y)
+    return ((x0 + x1) / 2, y1 if y >= (y0 + y1) / 2 else y0)
+
+
+# ----------------------------------------------------------------------
+# Candidate paths
+# ----------------------------------------------------------------------
+
+def _ports(source: Rect, target: Rect, margin: float):
+    """Choose the sides the path leaves and enters by.
+
+    Returns:
+        (vertical, start, end, start_stub, end_stub), where the stubs are
+        the end points moved ``margin`` away from their node
+    """
+    gaps = (
+        (target[1] - source[3], "down"),
+        (source[1] - target[3], "up"),
+        (target[0] - source[2], "right"),
+        (source[0] - target[2], "left"),
+    )
+    direction = max(gaps, key=lambda gap: gap[0])[1]
+    source_x = (source[0] + source[2]) / 2
+    source_y = (source[1] + source[3]) / 2
+    target_x = (target[0] + target[2]) / 2
+    target_y = (target[1] + target[3]) / 2
+    if direction == "down":
+        start, end = (source_x, source[3]), (target_x, target[1])
+        return (True, start, end, (start[0], start[1] + margin),
+                (end[0], end[1] - margin))
+    if direction == "up":
+        start, end = (source_x, source[1]), (target_x, target[3])
+        return (True, start, end, (start[0], start[1] - margin),
+                (end[0], end[1] + margin))
+    if direction == "right":
+        start, end = (source[2], source_y), (target[0], target_y)
+        return (False, start, end, (start[0] + margin, start[1]),
+                (end[0] - margin, end[1]))
+    start, end = (source[0], source_y), (target[2], target_y)
+    return (False, start, end, (start[0] - margin, start[1]),
+            (end[0] + margin, end[1]))
+
+
+def _candidates(vertical: bool, start: Point, end: Point,
+                start_stub: Point, end_stub: Point, index: SpatialIndex,
+                margin: float, ignore: Sequence[str]) -> Iterable[List[Point]]:
+    """Yield straight and Z-shaped bend point lists, most natural first."""
+    axis = 1 if vertical else 0
+    if start[1 - axis] == end[1 - axis]:
+        # Straight: keep one waypoint so the aligned sides are used
+        yield [((start[0] + end[0]) / 2, (start[1] + end[1]) / 2)]
+
+    # Channels: the middle, then just beside each node between the two ends
+    low, high = sorted((start_stub[axis], end_stub[axis]))
+    middle = (start[axis] + end[axis]) / 2
+    channels = {middle: None, start_stub[axis]: None, end_stub[axis]: None}
+    region = _union((start[0], start[1], start[0], start[1]),
+                    (end[0], end[1], end[0], end[1]))
+    for node_id in index.query_rect(*region):
+        if node_id in ignore:
+            continue
+        rect = index.rect(node_id)
+        for value in (rect[axis] - margin, rect[axis + 2] + margin):
+            if low <= value <= high:
+                channels[value] = None
+
+    # The grid search handles crowded cases better than a long channel list
+    nearest = sorted(channels, key=lambda value: abs(value - middle))
+    for channel in nearest[:MAX_CHANNELS]:
+        if vertical:
+            yield [(start[0], channel), (end[0], channel)]
+        else:
+            yield [(channel, start[1]), (channel, end[1])]
+
+
+def _dogleg(vertical: bool, start: Point, end: Point) -> List[Point]:
+    if vertical:
+        middle = (start[1] + end[1]) / 2
+        return [(start[0], middle), (end[0], middle)]
+    middle = (start[0] + end[0]) / 2
+    return [(middle, start[1]), (middle, end[1])]
+
+
+def _clear(path: Sequence[Point], index: SpatialIndex, margin: float,
+           ignore: Sequence[str]) -> bool:
+    """Whether no segment of the path comes closer than ``margin`` to a node."""
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        min_x, max_x = sorted((x0, x1))
+        min_y, max_y = sorted((y0, y1))
+        for node_id in index.query_rect(min_x - margin, min_y - margin,
+                                        max_x + margin, max_y + margin):
+            if node_id in ignore:
+                continue
+            rx0, ry0, rx1, ry1 = index.rect(node_id)
+            # Touching the margin is allowed, entering it is not
+            if (rx0 - margin < max_x and min_x < rx1 + margin and
+                    ry0 - margin < max_y and min_y < ry1 + margin):
+                return False
+    return True
+
+
+# ----------------------------------------------------------------------
+# Grid search
+# ----------------------------------------------------------------------
+
+def _search(start: Point, end: Point, window: Rect, source: Rect, target: Rect,
+            index: SpatialIndex, margin: float,
+            ignore: Sequence[str]) -> Optional[List[Point]]:
+    """Find a path between two stub points with A* on a sparse orthogonal grid.
+
+    The grid lines are the boundaries of the (margin-inflated) obstacles in
+    the window plus the coordinates of the end points. Between two adjacent
+    grid lines nothing changes, so each grid segment is either entirely free
+    or entirely inside an obstacle.
+    """
+    obstacles = [_inflate(index.rect(node_id), margin)
+                 for node_id in index.query_rect(*window) if node_id not in ignore]
+    # The end nodes are obstacles too, except for the stubs leaving them
+    obstacles.append(_inflate(source, margin))
+    obstacles.append(_inflate(target, margin))
+
+    xs = sorted({window[0], window[2], start[0], end[0]} |
+                {value for rect in obstacles for value in (rect[0], rect[2])
+                 if window[0] <= value <= window[2]})
+    ys = sorted({window[1], window[3], start[1], end[1]} |
+                {value for rect in obstacles for value in (rect[1], rect[3])
+                 if window[1] <= value <= window[3]})
+    width, height = len(xs), len(ys)
+
+    # Grid points are numbered row by row: point = row * width + column.
+    # right[point] / down[point]: the segment to the next point to the
+    # right / below crosses an obstacle or leaves the grid. Stepping left or
+    # up off the grid reads the flags of the last column or row (through
+    # wrap-around or negative indexing), which are always set.
+    size = width * height
+    right = bytearray(size)
+    down = bytearray(size)
+    right[width - 1::width] = b"\x01" * height
+    down[size - width:] = b"\x01" * width
+    for x0, y0, x1, y1 in obstacles:
+        i0, i1 = bisect_left(xs, x0), bisect_left(xs, x1)
+        j0, j1 = bisect_left(ys, y0), bisect_left(ys, y1)
+        for j in range(bisect_right(ys, y0), j1):
+            right[j * width + i0:j * width + i1] = b"\x01" * (i1 - i0)
+        for i in range(bisect_right(xs, x0), i1):
+            down[j0 * width + i:j1 * width + i:width] = b"\x01" * (j1 - j0)
+
+    # A* over (point, direction) states, packed as point * 3 + direction,
+    # where direction is 0 = just started, 1 = horizontal, 2 = vertical
+    end_x, end_y = end
+    end_point = ys.index(end_y) * width + xs.index(end_x)
+    start_state = (ys.index(start[1]) * width + xs.index(start[0])) * 3
+    infinity = float("inf")
+    best = {}  # type: Dict[int, float]
+    parents = {}  # type: Dict[int, int]
+    best[start_state] = 0.0
+    # Ties go to the deepest state first, which heads straight for the goal
+    queue = [(0.0, 0.0, start_state)]
+    while queue:
+        _, cost, state = heapq.heappop(queue)
+        cost = -cost
+        if cost > best[state]:
+            continue
+        point, direction = divmod(state, 3)
+        if point == end_point:
+            return _trace(parents, state, xs, ys)
+        j, i = divmod(point, width)
+        x, y = xs[i], ys[j]
+        for next_point, next_direction, blocked in (
+                (point + 1, 1, right[point]), (point - 1, 1, right[point - 1]),
+                (point + width, 2, down[point]),
+                (point - width, 2, down[point - width])):
+            if blocked:
+                continue
+            next_j, next_i = divmod(next_point, width)
+            next_x, next_y = xs[next_i], ys[next_j]
+            next_cost = cost + abs(next_x - x) + abs(next_y - y)
+            if direction and direction != next_direction:
+                next_cost += BEND_PENALTY
+            next_state = next_point * 3 + next_direction
+            if next_cost < best.get(next_state, infinity):
+                best[next_state] = next_cost
+                parents[next_state] = state
+                # Remaining length plus the bends that are still unavoidable
+                dx, dy = abs(next_x - end_x), abs(next_y - end_y)
+                remaining = dx + dy
+                if ((dx and dy) or (dx and next_direction == 2)
+                        or (dy and next_direction == 1)):
+                    remaining += BEND_PENALTY
+                estimate = next_cost + HEURISTIC_WEIGHT * remaining
+                heapq.heappush(queue, (estimate, -next_cost, next_state))
+    return None
+
+
+def _trace(parents: Dict[int, int], state: int,
+           xs: List[float], ys: List[float]) -> List[Point]:
+    width = len(xs)
+    path = []
+    while True:
+        j, i = divmod(state // 3, width)
+        path.append((xs[i], ys[j]))
+        if state not in parents:
+            break
+        state = parents[state]
+    path.reverse()
+    return path
+
+
+# ----------------------------------------------------------------------
+# Geometry helpers
+# ----------------------------------------------------------------------
+
+def _rect(node: Dict[str, Any]) -> Rect:
+    return (node["x"], node["y"], node["x"] + node["width"], node["y"] + node["height"])
+
+
+def _inflate(rect: Rect, amount: float) -> Rect:
+    return (rect[0] - amount, rect[1] - amount, rect[2] + amount, rect[3] + amount)
+
+
+def _union(a: Rect, b: Rect) -> Rect:
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _simplify(path: List[Point]) -> List[Point]:
+    """Drop repeated points and the middle point of straight runs."""
+    result = []  # type: List[Point]
+    for point in path:
+        if result and point == result[-1]:
+            continue
+        if len(result) >= 2:
+            (ax, ay), (bx, by) = result[-2], result[-1]
+            if (ax == bx == point[0]) or (ay == by == point[1]):
+                result[-1] = point
+                continue
+        result.append(point)
+    return result
@@ -0,0 +1,308 @@
+"""Single-pass XML and .drawio serialization for diagrams."""
+
+import time
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple, Union
+
+from . import compression
+from .diagram import Diagram
+from .document import Document
+from .streams import write_fragments
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+GRAPH_MODEL_ATTRIBUTES = (
+    'dx="1326" dy="798" grid="1" gridSize="10" guides="1" tooltips="1" '
+    'connect="1" arrows="1" fold="1" page="1" pageScale="1" '
+    'pageWidth="850" pageHeight="1100"'
+)
+
+INDENT = "  "
+
+
+def escape_attribute(value: Any) -> str:
+    """Escape a value for use inside a double-quoted XML attribute."""
+    value = str(value)
+    if "&" in value:
+        value = value.replace("&", "&amp;")
+    if "<" in value:
+        value = value.replace("<", "&lt;")
+    if ">" in value:
+        value = value.replace(">", "&gt;")
+    if '"' in value:
+        value = value.replace('"', "&quot;")
+    if "\n" in value:
+        value = value.replace("\n", "&#10;")
+    if "\r" in value:
+        value = value.replace("\r", "&#13;")
+    if "\t" in value:
+        value = value.replace("\t", "&#09;")
+    return value
+
+
+def iter_root(diagram: Union[Diagram, Dict[str, Any]],
+              pretty: bool = False,
+              level: int = 0,
+              fragments: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """Yield the ``<root>`` element holding the diagram cells.
+
+    Args:
+        diagram: The diagram to serialize
+        pretty: Indent nested elements and put each on its own line
+        level: Indentation level of the ``<root>`` element in pretty mode
+        fragments: The cells already serialized by ``cell_fragment`` (at
+            ``level + 1``), emitted instead of serializing ``diagram``
+
+    Yields:
+        Consecutive fragments of the element, one per cell
+    """
+    if pretty:
+        pad = INDENT * level
+        cell_pad = pad + INDENT
+        newline = "\n"
+    else:
+        pad = cell_pad = newline = ""
+
+    yield f'{pad}<root>{newline}'
+    yield f'{cell_pad}<mxCell id="0"/>{newline}'
+    yield f'{cell_pad}<mxCell id="1" parent="0"/>{newline}'
+    if fragments is None:
+        for cell in diagram["cells"]:
+            yield _cell_xml(cell, pretty, cell_pad)
+    else:
+        yield from fragments
+    yield f'{pad}</root>{newline}'
+
+
+def cell_fragment(cell: Dict[str, Any], pretty: bool = False, level: int = 0) -> str:
+    """Return the ``<mxCell>`` element of one cell as ``iter_root`` emits it.
+
+    Args:
+        cell: The node or edge cell dict
+        pretty: Indent nested elements and put each on its own line
+        level: Indentation level of the element in pretty mode
+
+    Returns:
+        The element, or an empty string for cells that are neither nodes
+        nor edges
+    """
+    return _cell_xml(cell, pretty, INDENT * level if pretty else "")
+
+
+def _cell_xml(cell: Dict[str, Any], pretty: bool, cell_pad: str) -> str:
+    if pretty:
+        child_pad = cell_pad + INDENT
+        newline = "\n"
+    else:
+        child_pad = newline = ""
+    cell_type = cell["type"]
+    if cell_type == "node":
+        return (
+            f'{cell_pad}<mxCell id="{escape_attribute(cell["id"])}" '
+            f'value="{escape_attribute(cell["label"])}" '
+            f'style="{escape_attribute(cell["style"])}" '
+            f'parent="1" vertex="1">{newline}'
+            f'{child_pad}<mxGeometry x="{cell["x"]}" y="{cell["y"]}" '
+            f'width="{cell["width"]}" height="{cell["height"]}" '
+            f'as="geometry"/>{newline}'
+            f'{cell_pad}</mxCell>{newline}'
+        )
+    if cell_type == "edge":
+        label = cell.get("label")
+        value = f'value="{escape_attribute(label)}" ' if label else ""
+        points = cell.get("points")
+        if points:
+            # Waypoints of a routed edge
+            array_pad = child_pad + INDENT if pretty else ""
+            point_pad = array_pad + INDENT if pretty else ""
+            geometry = "".join(
+                [f'{child_pad}<mxGeometry relative="1" as="geometry">{newline}'
+                 f'{array_pad}<Array as="points">{newline}']
+                + [f'{point_pad}<mxPoint x="{x}" y="{y}"/>{newline}' for x, y in points]
+                + [f'{array_pad}</Array>{newline}{child_pad}</mxGeometry>{newline}']
+            )
+        else:
+            geometry = f'{child_pad}<mxGeometry relative="1" as="geometry"/>{newline}'
+        # Dangling edges have no source or target terminal
+        ends = "".join(f'{end}="{escape_attribute(cell[end])}" '
+                       for end in ("source", "target") if cell.get(end) is not None)
+        return (
+            f'{cell_pad}<mxCell id="{escape_attribute(cell["id"])}" {value}'
+            f'style="{escape_attribute(cell["style"])}" parent="1" '
+            f'{ends}edge="1">{newline}'
+            f'{geometry}'
+            f'{cell_pad}</mxCell>{newline}'
+        )
+    return ""
+
+
+def iter_graph_model(diagram: Union[Diagram, Dict[str, Any]],
+                     pretty: bool = False,
+                     level: int = 0,
+                     fragments: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """Yield the ``<mxGraphModel>`` element for a diagram.
+
+    Args:
+        diagram: The diagram to serialize
+        pretty: Indent nested elements and put each on its own line
+        level: Indentation level of the element in pretty mode
+        fragments: Pre-serialized cells, see ``iter_root``
+
+    Yields:
+        Consecutive fragments of the element
+    """
+    pad = INDENT * level if pretty else ""
+    newline = "\n" if pretty else ""
+    yield f'{pad}<mxGraphModel {GRAPH_MODEL_ATTRIBUTES}>{newline}'
+    yield from iter_root(diagram, pretty, level + 1, fragments)
+    yield f'{pad}</mxGraphModel>{newline}'
+
+
+def iter_xml(diagram: Union[Diagram, Dict[str, Any]],
+             pretty: bool = False,
+             fragments: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """Yield a standalone mxGraphModel XML document for a diagram.
+
+    Args:
+        diagram: The diagram to serialize
+        pretty: Indent nested elements and put each on its own line
+        fragments: Pre-serialized cells (at level 2), see ``iter_root``
+
+    Yields:
+        Consecutive fragments of the document
+    """
+    yield XML_DECLARATION
+    yield from iter_graph_model(diagram, pretty, fragments=fragments)
+
+
+def iter_drawio(diagram: Union[Diagram, Dict[str, Any]],
+                pretty: bool = False,
+                modified: Optional[int] = None,
+                compressed: bool = False,
+                fragments: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """Yield a .drawio (``<mxfile>``) document for a diagram.
+
+    Args:
+        diagram: The diagram to serialize
+        pretty: Indent nested elements and put each on its own line
+        modified: Modification timestamp to record (defaults to now)
+        compressed: Store the page as a deflated, base64-encoded payload
+            the way draw.io does
+        fragments: Pre-serialized cells (at level 4 in pretty mode, never
+            indented when compressed), see ``iter_root``
+
+    Yields:
+        Consecutive fragments of the document
+    """
+    content = diagram  # type: Union[Diagram, Dict[str, Any], str]
+    if fragments is not None:
+        indent = pretty and not compressed
+        content = "".join(iter_graph_model(diagram, indent, 2 if indent else 0,
+                                           fragments))
+    page = ("diagram-id", diagram.get("title", "Diagram"), content)
+    yield from iter_mxfile([page], pretty, modified, compressed)
+
+
+def iter_document(document: Document,
+                  pretty: bool = False,
+                  modified: Optional[int] = None,
+                  compressed: bool = False) -> Iterator[str]:
+    """Yield a multi-page .drawio document.
+
+    Pages that were read from a file and never accessed are copied from
+    their raw content without being parsed, only re-encoded if they are
+    stored compressed and ``compressed`` is not set, or the other way round.
+
+    Args:
+        document: The document to serialize
+        pretty: Indent nested elements and put each on its own line (pages
+            copied from their raw content keep their own layout)
+        modified: Modification timestamp to record (defaults to now)
+        compressed: Store pages as deflated, base64-encoded payloads the way
+            draw.io does
+
+    Yields:
+        Consecutive fragments of the document
+    """
+    pages = ((page.id, page.name,
+              page.source if page.source is not None else page.diagram)
+             for page in document)
+    yield from iter_mxfile(pages, pretty, modified, compressed)
+
+
+def iter_mxfile(pages: Iterable[Tuple[str, str,
+                                      Union[Diagram, Dict[str, Any], bytes, str]]],
+                pretty: bool = False,
+                modified: Optional[int] = None,
+                compressed: bool = False) -> Iterator[str]:
+    """Yield an ``<mxfile>`` document with one ``<diagram>`` element per page.
+
+    Args:
+        pages: ``(id, name, content)`` of each page, where the content is a
+            diagram, the raw bytes of a ``<diagram>`` element's content or
+            an already serialized ``<mxGraphModel>`` element (indented for
+            level 2 in pretty mode, unindented when compressed)
+        pretty: Indent nested elements and put each on its own line
+        modified: Modification timestamp to record (defaults to now)
+        compressed: Store diagram pages as deflated, base64-encoded payloads
+
+    Yields:
+        Consecutive fragments of the document
+    """
+    if modified is None:
+        modified = int(time.time())
+    newline = "\n" if pretty else ""
+    pad = INDENT if pretty else ""
+    yield XML_DECLARATION
+    yield (
+        f'<mxfile host="app.diagrams.net" modified="{modified}" '
+        f'agent="Draw.io API Client" version="21.1.2" type="device">{newline}'
+    )
+    for page_id, name, content in pages:
+        start = (f'{pad}<diagram id="{escape_attribute(page_id)}" '
+                 f'name="{escape_attribute(name)}">')
+        if isinstance(content, bytes):
+            raw = content.decode("utf-8")
+            yield start
+            if not raw.strip() or _is_compressed(raw) == compressed:
+                yield raw
+            elif compressed:
+                yield from compression.compress_fragments([raw.strip()])
+            else:
+                yield compression.decompress(raw.strip())
+            yield f'</diagram>{newline}'
+        elif compressed:
+            model = [content] if isinstance(content, str) else iter_graph_model(content)
+            yield start
+            yield from compression.compress_fragments(model)
+            yield f'</diagram>{newline}'
+        else:
+            yield f'{start}{newline}'
+            if isinstance(content, str):
+                yield content
+            else:
+                yield from iter_graph_model(content, pretty, level=2)
+            yield f'{pad}</diagram>{newline}'
+    yield '</mxfile>'
+
+
+def _is_compressed(raw: str) -> bool:
+    """Whether raw ``<diagram>`` content is a compressed payload rather than XML."""
+    return not raw.lstrip().startswith("<")
+
+
+def write_xml(diagram: Union[Diagram, Dict[str, Any]], stream: IO,
+              pretty: bool = False) -> None:
+    """Write a standalone mxGraphModel XML document to a stream."""
+    write_fragments(iter_xml(diagram, pretty), stream)
+
+
+def write_drawio(diagram: Union[Diagram, Dict[str, Any]], stream: IO,
+                 pretty: bool = False, compressed: bool = False) -> None:
+    """Write a .drawio document to a stream."""
+    write_fragments(iter_drawio(diagram, pretty, compressed=compressed), stream)
+
+
+def write_document(document: Document, stream: IO,
+                   pretty: bool = False, compressed: bool = False) -> None:
+    """Write a multi-page .drawio document to a stream."""
+    write_fragments(iter_document(document, pretty, compressed=compressed), stream)
@@ -0,0 +1,389 @@
+"""HTTP rendering service backed by a pool of pre-forked render workers."""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import loader, raster
+from .client import DrawioAPIClient
+from .diagram import Diagram
+
+CONTENT_TYPES = {
+    "svg": "image/svg+xml",
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "pdf": "application/pdf",
+}
+
+# Extra seconds the request thread waits for a worker past the deadline
+# before giving up on it (workers normally enforce the deadline themselves)
+TIMEOUT_GRACE = 1.0
+
+# Start method of pools replacing a broken one, started while the server
+# has request threads that forked children must not copy
+if "forkserver" in multiprocessing.get_all_start_methods():
+    RESTART_METHOD = "forkserver"
+else:
+    RESTART_METHOD = "spawn"
+
+
+class ServerBusy(RuntimeError):
+    """The render queue is full."""
+
+
+class RenderTimeout(RuntimeError):
+    """A render did not finish before its deadline."""
+
+
+class RenderServer(ThreadingHTTPServer):
+    """Renders diagrams posted over HTTP to SVG, PNG, JPEG or PDF.
+
+    Endpoints:
+        ``POST /render/<format>`` (or ``/render?format=<format>``) with a
+        diagram JSON document (as produced by ``export_diagram``) or
+        ``.drawio``/mxGraphModel XML as the body. ``scale``, ``transparent``
+        and ``bg`` query parameters tune raster output. The draw.io export
+        server's form API (``format``, ``xml``, ... form fields) is accepted
+        too, so a ``RemoteExporter`` can use this server.
+
+        ``GET /health`` reports the pool size and the number of queued
+        renders.
+
+    Request threads only read and write sockets; parsing and rendering run
+    in a process pool forked at start-up, whose workers import CairoSVG and
+    render a small diagram once so the first real request is not slowed
+    down by imports and font loading. At most ``workers + queue_size``
+    renders are accepted at a time; further requests are refused at once
+    with ``503`` and a ``Retry-After`` header rather than piling up. A
+    render that misses its deadline, including time spent queued, is
+    answered with ``504``. If a worker dies, the pool is replaced by one
+    started with ``forkserver`` (``spawn`` where unavailable), since
+    forking the then multi-threaded server is unsafe.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ("127.0.0.1", 8000),
+                 workers: Optional[int] = None,
+                 queue_size: int = 32,
+                 timeout: float = 30.0,
+                 max_body: int = 16 * 1024 * 1024,
+                 client: Optional[DrawioAPIClient] = None,
+                 quiet: bool = False):
+        """Start the worker pool and bind the server.
+
+        Args:
+            address: The (host, port) to listen on; port 0 picks a free port
+            workers: Number of render processes (defaults to the CPU count)
+            queue_size: Renders that may wait for a free worker
+            timeout: Seconds a request may take from arrival to rendered image
+            max_body: Largest accepted request body in bytes
+            client: Client whose settings (``cache``, ``exporter``) the
+                workers render with
+            quiet: Don't log requests to stderr
+        """
+        if queue_size < 0:
+            raise ValueError("queue_size must not be negative")
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.render_timeout = timeout
+        self.max_body = max_body
+        self.quiet = quiet
+        self._client = client or DrawioAPIClient()
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._restart_lock = threading.Lock()
+        # Fork the workers before the listening socket exists
+        self._pool = self._start_pool()
+        super().__init__(address, RenderHandler)
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        host, port = self.socket.getsockname()[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def pending(self) -> int:
+        """Renders currently queued or running."""
+        return self._pending
+
+    def render(self, body: bytes, format: str = "svg", transparent: bool = False,
+               scale: float = 1.0, bg: str = "") -> bytes:
+        """Render a diagram document in the worker pool.
+
+        Args:
+            body: Diagram JSON or .drawio/mxGraphModel XML
+            format: Image format (svg, png, jpg, pdf)
+            transparent: Whether the background should be transparent (png only)
+            scale: Scale factor for the output image (1.0 = 100%)
+            bg: Background color (e.g. '#ffffff')
+
+        Returns:
+            The encoded image
+
+        Raises:
+            ServerBusy: If the queue is full
+            RenderTimeout: If the render misses the deadline
+            ValueError: If the document or options are invalid
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ServerBusy("Render queue is full")
+        with self._lock:
+            self._pending += 1
+        deadline = time.time() + self.render_timeout
+        try:
+            pool = self._pool
+            future = pool.submit(_render, body, format, transparent, scale, bg,
+                                 deadline)
+        except BrokenProcessPool:
+            self._release()
+            self._restart_pool(pool)
+            raise
+        # The slot stays taken until the worker is done, even if we stop waiting
+        future.add_done_callback(lambda _: self._release())
+        try:
+            return future.result(timeout=self.render_timeout + TIMEOUT_GRACE)
+        except FutureTimeout:
+            future.cancel()
+            raise RenderTimeout(f"Render took longer than {self.render_timeout:g}s")
+        except BrokenProcessPool:
+            # A worker died (e.g. crashed in the cairo library); start over
+            self._restart_pool(pool)
+            raise
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _start_pool(self, start_method: str = "fork") -> ProcessPoolExecutor:
+        context = None
+        if start_method in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context(start_method)
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(self._client,))
+        # Submitting one task per worker at once starts every process now
+        warmups = [pool.submit(_warm) for _ in range(self.workers)]
+        for warmup in warmups:
+            warmup.result()
+        return pool
+
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> None:
+        with self._restart_lock:
+            if self._pool is broken:
+                self._pool = self._start_pool(RESTART_METHOD)
+        broken.shutdown(wait=False)
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """Request handler of ``RenderServer``."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # Headers and body go out in separate writes; don't let Nagle's
+    # algorithm hold the body back waiting for a delayed ACK
+    disable_nagle_algorithm = True
+    server: RenderServer
+
+    def do_GET(self) -> None:
+        if urllib.parse.urlsplit(self.path).path.rstrip("/") != "/health":
+            self._send_error(404, "Not found")
+            return
+        status = {"workers": self.server.workers, "queue_size": self.server.queue_size,
+                  "pending": self.server.pending}
+        self._send(200, json.dumps(status).encode("utf-8"), "application/json")
+
+    def do_POST(self) -> None:
+        url = urllib.parse.urlsplit(self.path)
+        parts = url.path.strip("/").split("/")
+        if parts[0] not in ("", "render") or len(parts) > 2:
+            self._send_error(404, "Not found")
+            return
+        length = self._content_length()
+        if length is None:
+            return
+        body = self.rfile.read(length)
+
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type == "application/x-www-form-urlencoded":
+            fields = urllib.parse.parse_qs(body.decode("utf-8"))
+            params.update((k, v[-1]) for k, v in fields.items())
+            body = params.pop("xml", "").encode("utf-8")
+        if len(parts) == 2:
+            params["format"] = parts[1]
+        format = params.get("format", "svg").lower()
+        if format not in CONTENT_TYPES:
+            self._send_error(400, f"Unsupported image format: {format}")
+            return
+        try:
+            scale = float(params.get("scale", 1.0))
+        except ValueError:
+            self._send_error(400, "Invalid scale")
+            return
+        transparent = params.get("transparent", "").lower() in ("1", "true", "yes")
+
+        try:
+            image = self.server.render(body, format, transparent, scale,
+                                       params.get("bg", ""))
+        except ServerBusy as e:
+            self._send_error(503, str(e), {"Retry-After": "1"})
+        except RenderTimeout as e:
+            self._send_error(504, str(e))
+        except (ValueError, KeyError, TypeError, ET.ParseError) as e:
+            self._send_error(400, f"Invalid diagram: {e}")
+        except ImportError as e:
+            self._send_error(501, str(e))
+        except Exception as e:
+            self._send_error(500, f"{type(e).__name__}: {e}")
+        else:
+            self._send(200, image, CONTENT_TYPES[format])
+
+    def _content_length(self) -> Optional[int]:
+        """Return the validated body length, or send an error and return None.
+
+        Without a valid length the rest of the request can't be found, so
+        these errors also close the connection.
+        """
+        close = {"Connection": "close"}
+        value = self.headers.get("Content-Length")
+        if value is None:
+            self._send_error(411, "Content-Length required", close)
+            return None
+        value = value.strip()
+        if not (value.isascii() and value.isdigit()):
+            self._send_error(400, "Invalid Content-Length", close)
+            return None
+        length = int(value)
+        if length > self.server.max_body:
+            self._send_error(413, "Request body too large "
+                             f"(limit {self.server.max_body} bytes)", close)
+            return None
+        return length
+
+    def _send(self, status: int, body: bytes, content_type: str,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, message: str,
+                    headers: Optional[Dict[str, str]] = None) -> None:
+        self._send(status, message.encode("utf-8"), "text/plain; charset=utf-8",
+                   headers)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, **kwargs: Any) -> None:
+    """Run a ``RenderServer`` until interrupted.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        **kwargs: Further ``RenderServer`` options
+    """
+    with RenderServer((host, port), **kwargs) as server:
+        print(f"Rendering diagrams at {server.url} with {server.workers} workers")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point: ``python -m drawio_api.server``."""
+    parser = argparse.ArgumentParser(description="Serve diagram rendering over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="render processes (default: CPU count)")
+    parser.add_argument("--queue-size", type=int, default=32,
+                        help="renders that may wait for a worker before requests "
+                             "are refused")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="seconds allowed per request")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, workers=args.workers, queue_size=args.queue_size,
+          timeout=args.timeout)
+
+
+_worker_client = None  # type: Any
+
+
+def _init_worker(client: DrawioAPIClient) -> None:
+    global _worker_client
+    _worker_client = client
+    # Ctrl+C is handled by the server process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _warm() -> int:
+    """Render a small diagram once so imports, fonts and caches are loaded."""
+    diagram = _worker_client.create_diagram("Warm-up")
+    _worker_client.add_node(diagram, "Warm-up", 0, 0)
+    formats = ["svg"] + (["png"] if raster.CAIROSVG_AVAILABLE else [])
+    for format in formats:
+        _worker_client.render_image(diagram, format)
+    return os.getpid()
+
+
+def _render(body: bytes, format: str, transparent: bool, scale: float, bg: str,
+            deadline: float) -> bytes:
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        # Expired while queued; don't spend a worker on it
+        raise RenderTimeout("Render expired while queued")
+    alarm = hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, remaining)
+    try:
+        return _worker_client.render_image(_parse(body), format, transparent, scale, bg)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _on_alarm(signum: int, frame: Any) -> None:
+    raise RenderTimeout("Render took too long")
+
+
+def _parse(body: bytes) -> Diagram:
+    """Read diagram JSON or .drawio/mxGraphModel XML."""
+    data = body.lstrip()
+    if data.startswith(b"{"):
+        diagram = json.loads(data.decode("utf-8"))
+        if not isinstance(diagram, dict) or not isinstance(diagram.get("cells"), list):
+            raise ValueError("JSON diagrams need a 'cells' list")
+        return Diagram.from_dict(diagram)
+    if data.startswith(b"<"):
+        return loader.load_diagram(io.BytesIO(data), title="Diagram")
+    raise ValueError("Expected diagram JSON or XML")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Spatial index of node rectangles for fast region queries."""
+
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Rect = Tuple[float, float, float, float]
+
+
+class SpatialIndex:
+    """Rectangles bucketed in a uniform grid.
+
+    Every rectangle is registered in each grid cell it overlaps, so a query
+    only looks at the rectangles in the cells the query region touches.
+    Diagram nodes have similar sizes, which makes a uniform grid about as
+    selective as a tree while keeping inserts and removals O(1).
+    """
+
+    def __init__(self, cell_size: float = 200.0):
+        """Initialize an empty index.
+
+        Args:
+            cell_size: Edge length of the grid cells
+        """
+        self.cell_size = float(cell_size)
+        self._rects = {}  # type: Dict[str, Rect]
+        self._buckets = {}  # type: Dict[Tuple[int, int], Dict[str, None]]
+
+    @classmethod
+    def from_nodes(cls, nodes: Iterable[Dict[str, Any]],
+                   cell_size: Optional[float] = None) -> "SpatialIndex":
+        """Build an index of node cells.
+
+        Args:
+            nodes: Node cell dicts with ``id``, ``x``, ``y``, ``width`` and ``height``
+            cell_size: Grid cell size (defaults to twice the mean node size)
+
+        Returns:
+            The index, with node IDs as item IDs
+        """
+        nodes = list(nodes)
+        if cell_size is None:
+            sizes = [max(node["width"], node["height"]) for node in nodes]
+            cell_size = 2 * sum(sizes) / len(sizes) if sizes else 200.0
+        index = cls(max(cell_size, 1.0))
+        for node in nodes:
+            index.insert(node["id"], node["x"], node["y"],
+                         node["width"], node["height"])
+        return index
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._rects
+
+    def rect(self, item_id: str) -> Rect:
+        """Return the (min_x, min_y, max_x, max_y) rectangle of an item."""
+        return self._rects[item_id]
+
+    def insert(self, item_id: str, x: float, y: float,
+               width: float, height: float) -> None:
+        """Add an item, or move it if it is already indexed."""
+        if item_id in self._rects:
+            self.remove(item_id)
+        rect = (x, y, x + width, y + height)
+        self._rects[item_id] = rect
+        for key in self._cells(rect):
+            self._buckets.setdefault(key, {})[item_id] = None
+
+    def remove(self, item_id: str) -> None:
+        """Remove an item.
+
+        Raises:
+            KeyError: If the item is not indexed
+        """
+        rect = self._rects.pop(item_id)
+        for key in self._cells(rect):
+            bucket = self._buckets[key]
+            del bucket[item_id]
+            if not bucket:
+                del self._buckets[key]
+
+    def query_rect(self, min_x: float, min_y: float,
+                   max_x: float, max_y: float) -> List[str]:
+        """Return the IDs of items intersecting a rectangle (edges included)."""
+        found = {}  # type: Dict[str, None]
+        rects = self._rects
+        for key in self._cells((min_x, min_y, max_x, max_y), occupied_only=True):
+            bucket = self._buckets.get(key)
+            if not bucket:
+                continue
+            for item_id in bucket:
+                if item_id in found:
+                    continue
+                x0, y0, x1, y1 = rects[item_id]
+                if x0 <= max_x and min_x <= x1 and y0 <= max_y and min_y <= y1:
+                    found[item_id] = None
+        return list(found)
+
+    def query_point(self, x: float, y: float) -> List[str]:
+        """Return the IDs of items containing the point (x, y) (edges included)."""
+        size = self.cell_size
+        bucket = self._buckets.get((math.floor(x / size), math.floor(y / size)))
+        if not bucket:
+            return []
+        rects = self._rects
+        found = []
+        for item_id in bucket:
+            x0, y0, x1, y1 = rects[item_id]
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                found.append(item_id)
+        return found
+
+    def nearest(self, x: float, y: float, k: int = 1,
+                max_distance: Optional[float] = None) -> List[Tuple[float, str]]:
+        """Return the ``k`` items closest to the point (x, y).
+
+        The distance to an item is the distance to the nearest point of its
+        rectangle, so items containing the point are at distance 0. Grid
+        cells are visited in rings around the point until no unvisited
+        item can be closer than the ``k`` found so far.
+
+        Args:
+            x: X coordinate of the point
+            y: Y coordinate of the point
+            k: Number of items to return
+            max_distance: Ignore items farther away than this
+
+        Returns:
+            (distance, item ID) pairs, closest first
+        """
+        if k <= 0 or not self._rects:
+            return []
+        limit = float("inf") if max_distance is None else max_distance
+        size = self.cell_size
+        column, row = math.floor(x / size), math.floor(y / size)
+        # Distance from the point to the border of its own grid cell
+        inner = min(x - column * size, (column + 1) * size - x,
+                    y - row * size, (row + 1) * size - y)
+        buckets = self._buckets
+        best = []  # type: List[Tuple[float, str]]  # max-heap of the k closest, negated
+        seen = set()
+
+        def consider(item_id: str) -> None:
+            distance = self._distance(item_id, x, y)
+            if distance > limit:
+                return
+            if len(best) < k:
+                heapq.heappush(best, (-distance, item_id))
+            elif distance < -best[0][0]:
+                heapq.heapreplace(best, (-distance, item_id))
+
+        ring = 0
+        while True:
+            if (2 * ring + 1) ** 2 > 4 * len(buckets) + 16:
+                # The rings cover more cells than are occupied: check the rest directly
+                for item_id in self._rects:
+                    if item_id not in seen:
+                        consider(item_id)
+                break
+            for key in _ring(column, row, ring):
+                for item_id in buckets.get(key, ()):
+                    if item_id not in seen:
+                        seen.add(item_id)
+                        consider(item_id)
+            # Items outside the visited rings are at least this far away
+            reach = inner + ring * size
+            if reach >= limit or (len(best) == k and -best[0][0] <= reach):
+                break
+            ring += 1
+        return sorted((-distance, item_id) for distance, item_id in best)
+
+    def _distance(self, item_id: str, x: float, y: float) -> float:
+        x0, y0, x1, y1 = self._rects[item_id]
+        dx = x0 - x if x < x0 else x - x1 if x > x1 else 0.0
+        dy = y0 - y if y < y0 else y - y1 if y > y1 else 0.0
+        return math.hypot(dx, dy)
+
+    def _cells(self, rect: Rect,
+               occupied_only: bool = False) -> Iterable[Tuple[int, int]]:
+        """Return the keys of the grid cells a rectangle overlaps."""
+        size = self.cell_size
+        min_x, min_y, max_x, max_y = rect
+        columns = range(math.floor(min_x / size), math.floor(max_x / size) + 1)
+        rows = range(math.floor(min_y / size), math.floor(max_y / size) + 1)
+        if occupied_only and len(columns) * len(rows) > 4 * len(self._buckets) + 16:
+            # A huge region: scanning the occupied cells is cheaper
+            return [key for key in self._buckets
+                    if key[0] in columns and key[1] in rows]
+        return [(column, row) for column in columns for row in rows]
+
+
+def _ring(column: int, row: int, radius: int) -> Iterable[Tuple[int, int]]:
+    """Return the grid cells at Chebyshev distance ``radius`` from a cell."""
+    if radius == 0:
+        return [(column, row)]
+    top, bottom = row - radius, row + radius
+    keys = [(c, top) for c in range(column - radius, column + radius + 1)]
+    keys += [(c, bottom) for c in range(column - radius, column + radius + 1)]
+    for r in range(top + 1, bottom):
+        keys.append((column - radius, r))
+        keys.append((column + radius, r))
+    return keys
@@ -0,0 +1,47 @@
+"""Helpers for writing generated documents to streams."""
+
+import io
+from typing import Any, Callable, IO, Iterable, Iterator
+
+# Buffered output is flushed to the stream once it grows past this size
+FLUSH_SIZE = 64 * 1024
+
+
+def write_fragments(fragments: Iterable[str], stream: IO) -> None:
+    """Write document fragments to a writable stream in bounded chunks.
+
+    Fragments are buffered and flushed in chunks of about ``FLUSH_SIZE``
+    characters, so memory use does not grow with the size of the document.
+
+    Args:
+        fragments: The document, piece by piece
+        stream: A text or binary stream (file, socket file, ``io.BytesIO``...)
+    """
+    write = stream_writer(stream)
+    for chunk in iter_chunks(fragments):
+        write(chunk)
+
+
+def iter_chunks(fragments: Iterable[str]) -> Iterator[str]:
+    """Join small fragments into chunks of about ``FLUSH_SIZE`` characters."""
+    buffer = []
+    buffered = 0
+    for fragment in fragments:
+        buffer.append(fragment)
+        buffered += len(fragment)
+        if buffered >= FLUSH_SIZE:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_writer(stream: IO) -> Callable[[str], Any]:
+    """Return a callable writing text to ``stream``, encoding it if needed."""
+    if isinstance(stream, io.TextIOBase):
+        return stream.write
+    if (isinstance(stream, (io.RawIOBase, io.BufferedIOBase))
+            or "b" in getattr(stream, "mode", "")):
+        return lambda text: stream.write(text.encode("utf-8"))
+    return stream.write
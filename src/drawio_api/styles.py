@@ -0,0 +1,70 @@
+"""Parsing of draw.io style strings into interned, immutable style objects."""
+
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+# Shapes the exporters know how to draw, in order of precedence
+SHAPES = ("rhombus", "ellipse", "cylinder")
+
+
+class Style(NamedTuple):
+    """A parsed draw.io style string.
+
+    Attributes that are not set in the style string are None; exporters
+    apply their own defaults (which differ between nodes and edges).
+    """
+
+    shape: str
+    fill: Optional[str]
+    stroke: Optional[str]
+    font_color: Optional[str]
+    edge_style: Optional[str]
+    rounded: bool
+    properties: Mapping[str, str]
+
+    @property
+    def orthogonal(self) -> bool:
+        """Whether edges with this style are routed orthogonally."""
+        return self.edge_style == "orthogonalEdgeStyle"
+
+
+@lru_cache(maxsize=4096)
+def parse_style(style: str) -> Style:
+    """Parse a style string such as ``"rounded=1;fillColor=#dae8fc;"``.
+
+    Results are memoized, so every cell sharing a style string shares one
+    ``Style`` object and the string is parsed only once.
+
+    Args:
+        style: The draw.io style string
+
+    Returns:
+        The parsed, immutable style
+    """
+    properties = {}
+    names = []
+    for part in style.split(";"):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            properties[key] = value
+        elif part:
+            # Bare tokens such as "ellipse" or "rhombus" name the shape
+            names.append(part)
+    names.append(properties.get("shape", ""))
+
+    shape = "rect"
+    for candidate in SHAPES:
+        if any(candidate in name for name in names):
+            shape = candidate
+            break
+
+    return Style(
+        shape=shape,
+        fill=properties.get("fillColor"),
+        stroke=properties.get("strokeColor"),
+        font_color=properties.get("fontColor"),
+        edge_style=properties.get("edgeStyle"),
+        rounded=properties.get("rounded") != "0",
+        properties=MappingProxyType(properties),
+    )
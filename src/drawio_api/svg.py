@@ -0,0 +1,244 @@
+"""Streaming SVG rendering for diagrams."""
+
+from typing import Any, Dict, IO, Iterable, Iterator, Optional, Tuple, Union
+
+from .diagram import Diagram
+from .routing import attach
+from .streams import write_fragments
+from .styles import parse_style
+
+# Margin added around the node bounds of a rendered diagram, so strokes,
+# labels and edge waypoints just outside the node boxes are not clipped
+PADDING = 50
+
+
+def iter_svg(diagram: Union[Diagram, Dict[str, Any]],
+             bounds: Tuple[float, float, float, float],
+             fragments: Optional[Iterable[str]] = None) -> Iterator[str]:
+    """Yield the SVG document for a diagram piece by piece.
+
+    Args:
+        diagram: The diagram to render
+        bounds: The (min_x, min_y, max_x, max_y) viewport of the document
+        fragments: The node elements followed by the edge elements, as
+            returned by ``node_fragment`` and ``edge_fragment``, emitted
+            instead of rendering the cells of ``diagram``
+
+    Yields:
+        Consecutive fragments of the SVG document
+    """
+    diagram = Diagram.from_dict(diagram)
+    min_x, min_y, max_x, max_y = bounds
+    width = max_x - min_x
+    height = max_y - min_y
+
+    # Start SVG file with the right size and arrow marker definition
+    yield f"""<?xml version="1.0" encoding="UTF-8"?>
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:xlink="http://www.w3.org/1999/xlink"
+     width="{width}" height="{height}"
+     viewBox="{min_x} {min_y} {width} {height}">
+
+    <defs>
+        <marker id="arrow" markerWidth="10" markerHeight="10" refX="9" refY="3"
+                orient="auto" markerUnits="strokeWidth">
+            <path d="M0,0 L0,6 L9,3 z" fill="#000"/>
+        </marker>
+    </defs>
+
+    <!-- White background -->
+    <rect x="{min_x}" y="{min_y}" width="{width}" height="{height}" fill="white"/>
+"""
+
+    if fragments is not None:
+        yield from fragments
+        yield "</svg>"
+        return
+
+    for cell in diagram.nodes:
+        yield from _iter_node(cell)
+
+    for cell in diagram.edges:
+        source_node = diagram.get_node(cell["source"])
+        target_node = diagram.get_node(cell["target"])
+        if source_node and target_node:
+            yield from _iter_edge(cell, source_node, target_node)
+
+    yield "</svg>"
+
+
+def node_fragment(cell: Dict[str, Any]) -> str:
+    """Return the SVG elements of one node as ``iter_svg`` renders them."""
+    return "".join(_iter_node(cell))
+
+
+def edge_fragment(cell: Dict[str, Any], diagram: Diagram) -> str:
+    """Return the SVG elements of one edge, or "" if one of its ends is missing."""
+    source_node = diagram.get_node(cell["source"])
+    target_node = diagram.get_node(cell["target"])
+    if source_node and target_node:
+        return "".join(_iter_edge(cell, source_node, target_node))
+    return ""
+
+
+def write_svg(diagram: Union[Diagram, Dict[str, Any]],
+              bounds: Tuple[float, float, float, float],
+              stream: IO) -> None:
+    """Write the SVG document for a diagram to a writable stream.
+
+    Args:
+        diagram: The diagram to render
+        bounds: The (min_x, min_y, max_x, max_y) viewport of the document
+        stream: A text or binary stream (file, socket file, ``io.BytesIO``...)
+    """
+    write_fragments(iter_svg(diagram, bounds), stream)
+
+
+def _iter_node(cell: Dict[str, Any]) -> Iterator[str]:
+    x, y = cell["x"], cell["y"]
+    w, h = cell["width"], cell["height"]
+    label = cell["label"]
+
+    # Parsed styles are shared by every cell with the same style string
+    style = parse_style(cell["style"])
+    fill_color = style.fill or "#dae8fc"  # Default blue fill
+    stroke_color = style.stroke or "#6c8ebf"  # Default blue stroke
+
+    # Create the shape element
+    if style.shape == "rect":
+        rx = 6 if style.rounded else 0
+        yield (f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{rx}" '
+               f'fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n')
+    elif style.shape == "ellipse":
+        yield (f'<ellipse cx="{x + w/2}" cy="{y + h/2}" rx="{w/2}" ry="{h/2}" '
+               f'fill="{fill_color}" stroke="{stroke_color}" stroke-width="1"/>\n')
+    elif style.shape == "rhombus":
+        points = f"{x},{y+h/2} {x+w/2},{y} {x+w},{y+h/2} {x+w/2},{y+h}"
+        yield (f'<polygon points="{points}" fill="{fill_color}" '
+               f'stroke="{stroke_color}" stroke-width="1"/>\n')
+    elif style.shape == "cylinder":
+        # Draw the cylinder (database) shape using a group for better organization
+        # Height of the cylinder top part (proportional to height)
+        cylinder_height = min(h * 0.3, 20)
+        ellipse_rx = w / 2
+        ellipse_ry = cylinder_height / 2
+
+        yield '<g class="database-cylinder">\n'
+        # Body of the cylinder
+        yield (f'  <rect x="{x}" y="{y + ellipse_ry}" width="{w}" '
+               f'height="{h - 2*ellipse_ry}" fill="{fill_color}" '
+               f'stroke="{stroke_color}" stroke-width="1"/>\n')
+        # Top ellipse (cap) of cylinder
+        yield (f'  <ellipse cx="{x + ellipse_rx}" cy="{y + ellipse_ry}" '
+               f'rx="{ellipse_rx}" ry="{ellipse_ry}" fill="{fill_color}" '
+               f'stroke="{stroke_color}" stroke-width="1"/>\n')
+        # Bottom visible part - the front-facing half of the bottom ellipse
+        yield (f'  <path d="M {x} {y + h - ellipse_ry} '
+               f'Q {x + w/2} {y + h + ellipse_ry}, {x + w} {y + h - ellipse_ry}" '
+               f'fill="none" stroke="{stroke_color}" stroke-width="1"/>\n')
+        # Sides of the cylinder - vertical lines connecting ellipses
+        yield (f'  <line x1="{x}" y1="{y + ellipse_ry}" '
+               f'x2="{x}" y2="{y + h - ellipse_ry}" '
+               f'stroke="{stroke_color}" stroke-width="1"/>\n')
+        yield (f'  <line x1="{x + w}" y1="{y + ellipse_ry}" '
+               f'x2="{x + w}" y2="{y + h - ellipse_ry}" '
+               f'stroke="{stroke_color}" stroke-width="1"/>\n')
+        yield '</g>\n'
+
+    # Add text label
+    if "\n" in label:
+        lines = label.split("\n")
+        line_height = 16
+        y_offset = y + (h - (len(lines) * line_height)) / 2
+
+        for i, line in enumerate(lines):
+            text_y = y_offset + (i + 0.7) * line_height
+            yield (f'<text x="{x + w/2}" y="{text_y}" text-anchor="middle" '
+                   f'font-family="Arial" font-size="12">{line}</text>\n')
+    else:
+        yield (f'<text x="{x + w/2}" y="{y + h/2 + 5}" text-anchor="middle" '
+               f'font-family="Arial" font-size="12">{label}</text>\n')
+
+
+def _iter_edge(cell: Dict[str, Any],
+               source_node: Dict[str, Any],
+               target_node: Dict[str, Any]) -> Iterator[str]:
+    if cell.get("points"):
+        yield from _iter_routed_edge(cell, source_node, target_node)
+        return
+
+    # Calculate start and end points
+    source_x = source_node["x"] + source_node["width"] / 2
+    source_y = source_node["y"] + source_node["height"]
+
+    target_x = target_node["x"] + target_node["width"] / 2
+    target_y = target_node["y"]
+
+    style = parse_style(cell.get("style") or "")
+
+    # For orthogonal edges with bends
+    if style.orthogonal:
+        # Draw orthogonal line with intermediate point
+        mid_y = (source_y + target_y) / 2
+        path = (f"M {source_x} {source_y} L {source_x} {mid_y} "
+                f"L {target_x} {mid_y} L {target_x} {target_y}")
+
+        stroke_color = style.stroke or "#000000"  # Default black
+
+        yield (f'<path d="{path}" fill="none" stroke="{stroke_color}" '
+               f'stroke-width="1" marker-end="url(#arrow)"/>\n')
+
+        # Add label if present
+        if cell.get("label"):
+            # Position label at middle segment
+            label_x = (source_x + target_x) / 2
+            label_y = mid_y - 10
+
+            text_color = style.font_color or "#000000"  # Default black
+
+            yield (f'<text x="{label_x}" y="{label_y}" text-anchor="middle" '
+                   f'font-family="Arial" font-size="12" '
+                   f'fill="{text_color}">{cell["label"]}</text>\n')
+    else:
+        # Draw a straight line with an arrow
+        yield (f'<line x1="{source_x}" y1="{source_y}" '
+               f'x2="{target_x}" y2="{target_y}" '
+               f'stroke="black" stroke-width="1" marker-end="url(#arrow)"/>\n')
+
+        # Add label if present
+        if cell.get("label"):
+            # Position label along the line
+            label_x = (source_x + target_x) / 2
+            label_y = (source_y + target_y) / 2 - 10
+            yield (f'<text x="{label_x}" y="{label_y}" text-anchor="middle" '
+                   f'font-family="Arial" font-size="12">{cell["label"]}</text>\n')
+
+
+def _iter_routed_edge(cell: Dict[str, Any],
+                      source_node: Dict[str, Any],
+                      target_node: Dict[str, Any]) -> Iterator[str]:
+    # Draw a polyline through the waypoints, attached to the facing node sides
+    points = [tuple(point) for point in cell["points"]]
+    points = ([attach(source_node, points[0])] + points
+              + [attach(target_node, points[-1])])
+    path = "M " + " L ".join(f"{x} {y}" for x, y in points)
+
+    style = parse_style(cell.get("style") or "")
+    stroke_color = style.stroke or "#000000"  # Default black
+
+    yield (f'<path d="{path}" fill="none" stroke="{stroke_color}" '
+           f'stroke-width="1" marker-end="url(#arrow)"/>\n')
+
+    # Add label if present
+    if cell.get("label"):
+        # Position label at the middle segment
+        middle = len(points) // 2
+        (x0, y0), (x1, y1) = points[middle - 1], points[middle]
+        label_x = (x0 + x1) / 2
+        label_y = (y0 + y1) / 2 - 10
+
+        text_color = style.font_color or "#000000"  # Default black
+
+        yield (f'<text x="{label_x}" y="{label_y}" text-anchor="middle" '
+               f'font-family="Arial" font-size="12" '
+               f'fill="{text_color}">{cell["label"]}</text>\n')
@@ -0,0 +1,381 @@
+"""Viewport and tile-pyramid rendering for very large diagrams."""
+
+import json
+import math
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from typing import (Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple,
+                    Union)
+
+from . import batch, raster, svg
+from .diagram import Diagram
+from .spatial import SpatialIndex
+
+Rect = Tuple[float, float, float, float]
+# (zoom, column, row) of a tile, and the same followed by its rendered data
+Tile = Tuple[int, int, int]
+RenderedTile = Tuple[int, int, int, bytes]
+
+TILE_FORMATS = ("png", "jpg", "jpeg", "svg")
+
+# Extra margin around a viewport when culling, so strokes, arrow heads and
+# edge labels that stick out of a cell's rectangle are not cut off
+CULL_PADDING = 20
+
+# Tiles rendered per task sent to a worker process
+TILES_PER_TASK = 16
+
+
+class TilePyramid(NamedTuple):
+    """The zoom levels and tile grid covering a diagram.
+
+    At zoom level ``z`` the longer side of the diagram spans ``2 ** z``
+    tiles of ``tile_size`` pixels, like the XYZ scheme of web maps; tile
+    ``(0, 0)`` is the top-left one.
+    """
+
+    bounds: Rect
+    tile_size: int
+    min_zoom: int
+    max_zoom: int
+
+    @classmethod
+    def for_bounds(cls, bounds: Rect, tile_size: int = 256, min_zoom: int = 0,
+                   max_zoom: Optional[int] = None) -> "TilePyramid":
+        """Create the pyramid for a diagram area.
+
+        Args:
+            bounds: The (min_x, min_y, max_x, max_y) area to cover
+            tile_size: Width and height of a tile in pixels
+            min_zoom: The most zoomed-out level to render
+            max_zoom: The most zoomed-in level (defaults to the first level
+                rendering the diagram at 100% or more)
+        """
+        min_x, min_y, max_x, max_y = bounds
+        extent = max(max_x - min_x, max_y - min_y, 1)
+        if max_zoom is None:
+            max_zoom = max(0, math.ceil(math.log2(extent / tile_size)))
+        if not 0 <= min_zoom <= max_zoom:
+            raise ValueError(f"Invalid zoom range: {min_zoom}-{max_zoom}")
+        return cls((min_x, min_y, max_x, max_y), tile_size, min_zoom, max_zoom)
+
+    @property
+    def extent(self) -> float:
+        """Length of the longer side of the bounds, in diagram units."""
+        min_x, min_y, max_x, max_y = self.bounds
+        return max(max_x - min_x, max_y - min_y, 1)
+
+    def scale(self, zoom: int) -> float:
+        """Pixels per diagram unit at a zoom level."""
+        return self.tile_size * 2 ** zoom / self.extent
+
+    def tiles(self, zoom: int) -> Iterator[Tuple[int, int]]:
+        """Yield the (column, row) of every tile overlapping the bounds."""
+        min_x, min_y, max_x, max_y = self.bounds
+        tile_extent = self.extent / 2 ** zoom
+        columns = max(1, math.ceil((max_x - min_x) / tile_extent))
+        rows = max(1, math.ceil((max_y - min_y) / tile_extent))
+        for column in range(columns):
+            for row in range(rows):
+                yield column, row
+
+    def viewport(self, zoom: int, column: int, row: int) -> Rect:
+        """Return the diagram area shown by a tile."""
+        tile_extent = self.extent / 2 ** zoom
+        x = self.bounds[0] + column * tile_extent
+        y = self.bounds[1] + row * tile_extent
+        return (x, y, x + tile_extent, y + tile_extent)
+
+    def metadata(self, format: str) -> Dict[str, Any]:
+        """Describe the pyramid for tile viewers."""
+        return {
+            "format": format,
+            "tile_size": self.tile_size,
+            "min_zoom": self.min_zoom,
+            "max_zoom": self.max_zoom,
+            "bounds": list(self.bounds),
+        }
+
+
+class TileDirectory:
+    """Writes tiles as ``{zoom}/{column}/{row}.{format}`` plus ``metadata.json``."""
+
+    def __init__(self, path: str, format: str):
+        self.path = path
+        self.extension = "jpg" if format == "jpeg" else format
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, zoom: int, column: int, row: int, data: bytes) -> None:
+        """Store one tile."""
+        directory = os.path.join(self.path, str(zoom), str(column))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{row}.{self.extension}"), "wb") as f:
+            f.write(data)
+
+    def close(self, metadata: Dict[str, Any]) -> None:
+        """Write the pyramid metadata."""
+        with open(os.path.join(self.path, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+
+
+class MBTilesWriter:
+    """Writes tiles into a single SQLite file with the MBTiles schema.
+
+    As in MBTiles, rows are stored bottom-up (``tile_row`` 0 is the bottom
+    row of a zoom level).
+    """
+
+    def __init__(self, path: str, format: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS tiles (
+                zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER,
+                tile_data BLOB);
+            CREATE UNIQUE INDEX IF NOT EXISTS tile_index
+                ON tiles (zoom_level, tile_column, tile_row);
+        """)
+
+    def write(self, zoom: int, column: int, row: int, data: bytes) -> None:
+        """Store one tile."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+            (zoom, column, 2 ** zoom - 1 - row, sqlite3.Binary(data)))
+
+    def close(self, metadata: Dict[str, Any]) -> None:
+        """Write the pyramid metadata and commit."""
+        values = {
+            "format": metadata["format"],
+            "minzoom": metadata["min_zoom"],
+            "maxzoom": metadata["max_zoom"],
+            "bounds": ",".join(str(value) for value in metadata["bounds"]),
+            "tile_size": metadata["tile_size"],
+            "tiles": metadata["tiles"],
+        }
+        if "name" in metadata:
+            values["name"] = metadata["name"]
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO metadata VALUES (?, ?)",
+            [(name, str(value)) for name, value in values.items()])
+        self.connection.commit()
+        self.connection.close()
+
+
+def open_tile_sink(path: str, format: str) -> Union[TileDirectory, MBTilesWriter]:
+    """Return an MBTiles writer for ``*.mbtiles`` paths, else a tile directory."""
+    if path.lower().endswith(".mbtiles"):
+        return MBTilesWriter(path, format)
+    return TileDirectory(path, format)
+
+
+# ----------------------------------------------------------------------
+# Culling
+# ----------------------------------------------------------------------
+
+class Culler:
+    """Selects the cells of a diagram that can appear in a viewport."""
+
+    def __init__(self, diagram: Union[Diagram, Dict[str, Any]]):
+        self.diagram = Diagram.from_dict(diagram)
+        self.order = {cell["id"]: position
+                      for position, cell in enumerate(self.diagram["cells"])}
+        # Edges are indexed by the box around both end nodes and their waypoints
+        self.edges = SpatialIndex(self.diagram.spatial.cell_size)
+        for edge in self.diagram.edges:
+            box = _edge_box(self.diagram, edge)
+            if box is not None:
+                min_x, min_y, max_x, max_y = box
+                self.edges.insert(edge["id"], min_x, min_y,
+                                  max_x - min_x, max_y - min_y)
+
+    def cells(self, viewport: Rect,
+              padding: float = CULL_PADDING) -> List[Dict[str, Any]]:
+        """Return the cells to draw in a viewport, in document order.
+
+        The end nodes of visible edges are included even when they lie
+        outside the viewport, since the SVG renderer needs them to place
+        the edges.
+        """
+        min_x, min_y, max_x, max_y = viewport
+        area = (min_x - padding, min_y - padding, max_x + padding, max_y + padding)
+        diagram = self.diagram
+        cells = {node["id"]: node for node in diagram.query_rect(*area)}
+        edge_ids = self.edges.query_rect(*area)
+        for edge_id in edge_ids:
+            edge = diagram.get_cell(edge_id)
+            if edge is None:
+                continue
+            for end in (edge["source"], edge["target"]):
+                node = diagram.get_node(end) if end not in cells else None
+                if node is not None:
+                    cells[end] = node
+            cells[edge_id] = edge
+        order = self.order
+        return sorted(cells.values(), key=lambda cell: order[cell["id"]])
+
+    def svg(self, viewport: Rect) -> Optional[bytes]:
+        """Render the cells in a viewport to an SVG document, or None if it is empty."""
+        cells = self.cells(viewport)
+        if not cells:
+            return None
+        view = Diagram(title=self.diagram.get("title", "New Diagram"), cells=cells)
+        return "".join(svg.iter_svg(view, viewport)).encode("utf-8")
+
+
+def _edge_box(diagram: Diagram, edge: Dict[str, Any]) -> Optional[Rect]:
+    source = diagram.get_node(edge["source"])
+    target = diagram.get_node(edge["target"])
+    if source is None or target is None:
+        return None
+    xs = [source["x"], source["x"] + source["width"],
+          target["x"], target["x"] + target["width"]]
+    ys = [source["y"], source["y"] + source["height"],
+          target["y"], target["y"] + target["height"]]
+    for x, y in edge.get("points") or ():
+        xs.append(x)
+        ys.append(y)
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+
+def render_viewport(diagram: Union[Diagram, Dict[str, Any]], viewport: Rect,
+                    format: str = "png", scale: float = 1.0,
+                    transparent: bool = False, bg: str = "") -> bytes:
+    """Render only the part of a diagram inside a viewport.
+
+    Cells outside the viewport are culled before the SVG is generated, so
+    the cost depends on what is visible rather than on the diagram size.
+
+    Args:
+        diagram: The diagram to render
+        viewport: The (min_x, min_y, max_x, max_y) area to render
+        format: Image format (png, jpg, svg, pdf)
+        scale: Pixels per diagram unit
+        transparent: Whether the background should be transparent (png only)
+        bg: Background color (e.g. '#ffffff')
+
+    Returns:
+        The encoded image
+    """
+    svg_data = Culler(diagram).svg(viewport)
+    if svg_data is None:
+        svg_data = "".join(svg.iter_svg(Diagram(), viewport)).encode("utf-8")
+    if format.lower() == "svg":
+        return svg_data
+    return raster.render(svg_data, format, transparent, scale, bg)
+
+
+def render_tiles(diagram: Union[Diagram, Dict[str, Any]], output: str,
+                 format: str = "png", tile_size: int = 256,
+                 min_zoom: int = 0, max_zoom: Optional[int] = None,
+                 transparent: bool = False, bg: str = "",
+                 workers: Optional[int] = None) -> Dict[str, Any]:
+    """Render a diagram to a pyramid of fixed-size tiles.
+
+    Every tile only renders the cells overlapping it. Tiles without any
+    cells are not written; viewers should show them as background.
+
+    Args:
+        diagram: The diagram to render
+        output: A directory, or a ``.mbtiles`` file path
+        format: Tile format (png, jpg, svg)
+        tile_size: Width and height of a tile in pixels
+        min_zoom: The most zoomed-out level to render
+        max_zoom: The most zoomed-in level (defaults to the first level at
+            which the diagram is shown at 100% or more)
+        transparent: Whether the background should be transparent (png only)
+        bg: Background color (e.g. '#ffffff')
+        workers: Number of worker processes (defaults to the CPU count);
+            1 renders serially in the current process
+
+    Returns:
+        The pyramid metadata, including the number of ``tiles`` written
+
+    Raises:
+        ImportError: If CairoSVG is needed for the format but not installed
+        ValueError: If the format or zoom range is not supported
+    """
+    format = format.lower()
+    if format not in TILE_FORMATS:
+        raise ValueError(f"Unsupported tile format: {format}")
+    if format != "svg" and not raster.CAIROSVG_AVAILABLE:
+        raise ImportError("CairoSVG is required for raster export: "
+                          "pip install cairosvg")
+
+    diagram = Diagram.from_dict(diagram)
+    node_bounds = diagram.bounds()
+    if node_bounds is None:
+        bounds = (0, 0, tile_size, tile_size)  # type: Rect
+    else:
+        # Padded like the SVG exports, so the outermost strokes and labels fit
+        min_x, min_y, max_x, max_y = node_bounds
+        bounds = (min_x - svg.PADDING, min_y - svg.PADDING,
+                  max_x + svg.PADDING, max_y + svg.PADDING)
+    pyramid = TilePyramid.for_bounds(bounds, tile_size, min_zoom, max_zoom)
+    tiles = [(zoom, column, row)
+             for zoom in range(pyramid.min_zoom, pyramid.max_zoom + 1)
+             for column, row in pyramid.tiles(zoom)]
+    tasks = [tiles[start:start + TILES_PER_TASK]
+             for start in range(0, len(tiles), TILES_PER_TASK)]
+    options = (pyramid, format, transparent, bg)
+    workers = workers or os.cpu_count() or 1
+
+    sink = open_tile_sink(output, format)
+    written = 0
+    try:
+        for results in _run(diagram, options, tasks, workers):
+            for zoom, column, row, data in results:
+                sink.write(zoom, column, row, data)
+                written += 1
+    finally:
+        metadata = pyramid.metadata(format)
+        metadata["name"] = diagram.get("title", "New Diagram")
+        metadata["tiles"] = written
+        sink.close(metadata)
+    return metadata
+
+
+def _run(diagram: Diagram, options: tuple, tasks: List[List[Tile]],
+         workers: int) -> Iterable[List[RenderedTile]]:
+    """Render the tasks serially or across a process pool, yielding results in order."""
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker(diagram, options)
+        return map(_render_task, tasks)
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(batch.pack(diagram), options))
+    return _drain(executor, tasks)
+
+
+def _drain(executor: ProcessPoolExecutor,
+           tasks: List[List[Tile]]) -> Iterator[List[RenderedTile]]:
+    with executor:
+        yield from executor.map(_render_task, tasks)
+
+
+_worker_state = None  # type: Any
+
+
+def _init_worker(diagram: Union[Diagram, batch.Payload], options: tuple) -> None:
+    global _worker_state
+    if not isinstance(diagram, dict):
+        diagram = batch.unpack(diagram)
+    _worker_state = (Culler(diagram), options)
+
+
+def _render_task(tiles: List[Tile]) -> List[RenderedTile]:
+    culler, (pyramid, format, transparent, bg) = _worker_state
+    results = []
+    for zoom, column, row in tiles:
+        svg_data = culler.svg(pyramid.viewport(zoom, column, row))
+        if svg_data is None:
+            continue
+        if format == "svg":
+            data = svg_data
+        else:
+            data = raster.render(svg_data, format, transparent, pyramid.scale(zoom), bg)
+        results.append((zoom, column, row, data))
+    return results
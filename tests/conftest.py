@@ -0,0 +1,36 @@
+"""Shared fixtures for the test suite."""
+
+import io
+
+import pytest
+
+from src.drawio_api import raster
+
+
+class FakeCairoSVG:
+    """Stand-in for CairoSVG that records calls and returns fixed output."""
+
+    def __init__(self):
+        self.calls = []
+
+    def svg2png(self, bytestring=None, scale=1.0, background_color=None, **kwargs):
+        assert "url" not in kwargs and "write_to" not in kwargs
+        self.calls.append(("png", bytestring, scale, background_color))
+        if raster.PILLOW_AVAILABLE:
+            output = io.BytesIO()
+            image = raster.Image.new("RGBA", (4, 4), (255, 0, 0, 128))
+            image.save(output, format="PNG")
+            return output.getvalue()
+        return b"\x89PNG fake"
+
+    def svg2pdf(self, bytestring=None, scale=1.0, **kwargs):
+        self.calls.append(("pdf", bytestring, scale, None))
+        return b"%PDF fake"
+
+
+@pytest.fixture
+def fake_cairosvg(monkeypatch):
+    fake = FakeCairoSVG()
+    monkeypatch.setattr(raster, "cairosvg", fake, raising=False)
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", True)
+    return fake
@@ -0,0 +1,126 @@
+"""Tests for the asyncio client."""
+
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.drawio_api import raster
+from src.drawio_api.aio import AsyncDrawioAPIClient
+from src.drawio_api.client import DrawioAPIClient
+
+
+class FakeExporter:
+    """Records the thread each export runs on."""
+
+    def __init__(self):
+        self.threads = []
+
+    def export(self, xml, format="png", scale=1.0, transparent=False, bg=""):
+        self.threads.append(threading.current_thread().name)
+        return f"IMAGE:{format}".encode()
+
+
+def make_diagram(client):
+    diagram = client.create_diagram("Async")
+    client.add_node(diagram, "A", 0, 0)
+    return diagram
+
+
+def test_export_diagram_runs_on_executor():
+    """Test that exports return the synchronous results from the given executor."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="custom")
+
+    async def main():
+        async with AsyncDrawioAPIClient(client, executor=executor) as aclient:
+            return await asyncio.gather(aclient.export_diagram(diagram, "xml"),
+                                        aclient.export_diagram(diagram, "drawio"))
+
+    xml, drawio = asyncio.run(main())
+    assert xml == client.export_diagram(diagram, "xml")
+    assert drawio == client.export_diagram(diagram, "drawio")
+    # A caller-supplied executor stays usable
+    assert executor.submit(lambda: 1).result() == 1
+    executor.shutdown()
+
+
+def test_export_to_image_writes_files(fake_cairosvg, tmp_path):
+    """Test PNG, SVG and stream output."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    stream = io.BytesIO()
+
+    async def main():
+        async with AsyncDrawioAPIClient(client) as aclient:
+            return await asyncio.gather(
+                aclient.export_to_image(diagram, str(tmp_path / "a.png")),
+                aclient.export_to_image(diagram, str(tmp_path / "a.svg"), format="svg"),
+                aclient.export_to_image(diagram, format="pdf", stream=stream),
+                aclient.write_diagram(diagram, str(tmp_path / "a.drawio")))
+
+    png_path, svg_path, none, drawio_path = asyncio.run(main())
+    assert none is None and stream.getvalue() == b"%PDF fake"
+    with open(png_path, "rb") as f:
+        assert f.read() == client.render_image(diagram, "png")
+    with open(svg_path, "rb") as f:
+        assert f.read().startswith(b"<?xml")
+    with open(drawio_path, encoding="utf-8") as f:
+        assert f.read() == client.export_diagram(diagram, "drawio")
+
+
+def test_remote_exports_use_io_pool(monkeypatch, tmp_path):
+    """Test that export-server requests run on the I/O threads, not the render pool."""
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", False)
+    exporter = FakeExporter()
+    client = DrawioAPIClient(exporter=exporter)
+    diagram = make_diagram(client)
+
+    async def main():
+        async with AsyncDrawioAPIClient(client) as aclient:
+            image = await aclient.render_image(diagram, "jpg")
+            paths = await aclient.export_many(diagram,
+                                              [{"path": str(tmp_path / "b.pdf")}])
+            return image, paths
+
+    image, (path,) = asyncio.run(main())
+    assert image == b"IMAGE:jpg"
+    with open(path, "rb") as f:
+        assert f.read() == b"IMAGE:pdf"
+    assert all(name.startswith("drawio-io") for name in exporter.threads)
+
+
+def test_concurrency_is_limited():
+    """Test that no more than max_concurrency operations run at once."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    lock = threading.Lock()
+    state = {"running": 0, "max": 0}
+
+    def slow_export(*args):
+        with lock:
+            state["running"] += 1
+            state["max"] = max(state["max"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        return "ok"
+
+    client.export_diagram = slow_export
+    executor = ThreadPoolExecutor(max_workers=8)
+
+    async def main():
+        async with AsyncDrawioAPIClient(client, executor=executor,
+                                        max_concurrency=3) as aclient:
+            return await asyncio.gather(*(aclient.export_diagram(diagram)
+                                          for _ in range(12)))
+
+    assert asyncio.run(main()) == ["ok"] * 12
+    assert state["max"] == 3
+    executor.shutdown()
+    with pytest.raises(ValueError):
+        AsyncDrawioAPIClient(client, max_concurrency=0)
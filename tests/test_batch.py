@@ -0,0 +1,93 @@
+"""Tests for parallel batch export."""
+
+import os
+import pickle
+
+from src.drawio_api import batch
+from src.drawio_api.client import DrawioAPIClient
+
+
+def _make_diagram(client, index):
+    diagram = client.create_diagram(title=f"Diagram {index}")
+    for i in range(3):
+        diagram = client.add_node(diagram, f"Node {index}.{i}", i * 150, 0)
+    diagram = client.add_edge(diagram, "node_1", "node_2", "label")
+    return client.add_edge(diagram, "node_2", "node_3")
+
+
+def test_pack_round_trip_interns_styles():
+    """Test that payloads are compact and rebuild the same cells."""
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client, 0)
+
+    payload = batch.pack(diagram)
+    title, styles, nodes, edges = payload
+
+    assert len(styles) == 2
+    assert len(pickle.dumps(payload)) < len(pickle.dumps(dict(diagram)))
+    assert sorted(batch.unpack(payload)["cells"], key=lambda c: c["id"]) == \
+        sorted(diagram["cells"], key=lambda c: c["id"])
+
+
+def test_export_batch_in_process_pool(tmp_path):
+    """Test exporting across worker processes with per-item errors."""
+    client = DrawioAPIClient()
+    diagrams = [_make_diagram(client, i) for i in range(6)]
+    outputs = [str(tmp_path / f"d{i}.svg") for i in range(5)]
+    outputs.append([{"path": str(tmp_path / "bad.gif")}])
+
+    results = client.export_batch(diagrams, outputs, workers=2)
+
+    assert [r.position for r in results] == list(range(6))
+    assert all(r.ok for r in results[:5])
+    assert results[2].paths == [str(tmp_path / "d2.svg")]
+    assert "Node 2.1" in (tmp_path / "d2.svg").read_text()
+    assert not results[5].ok and results[5].error.startswith("ValueError")
+
+
+def test_export_batch_serial(tmp_path):
+    """Test that workers=1 exports in the current process."""
+    client = DrawioAPIClient()
+    results = client.export_batch([_make_diagram(client, 0)],
+                                  [str(tmp_path / "one.svg")], workers=1)
+
+    assert results[0].ok
+    assert (tmp_path / "one.svg").exists()
+
+
+def test_export_batch_reports_bad_inputs_per_item(tmp_path):
+    """Test that a malformed diagram or target fails alone, not the whole batch."""
+    client = DrawioAPIClient()
+    broken = {"title": "Broken", "cells": [{"id": "n", "type": "node"}]}
+    diagrams = [_make_diagram(client, 0), broken,
+                _make_diagram(client, 2), _make_diagram(client, 3)]
+    outputs = [str(tmp_path / "d0.svg"), str(tmp_path / "d1.svg"),
+               [{"format": "svg"}], str(tmp_path / "d3.svg")]
+
+    for workers in (1, 2):
+        results = client.export_batch(diagrams, outputs, workers=workers)
+        assert [r.position for r in results] == [0, 1, 2, 3]
+        assert [r.ok for r in results] == [True, False, False, True]
+        assert results[1].error.startswith("KeyError")
+        assert results[2].error == "ValueError: Batch export targets need a 'path'"
+
+
+class CrashingClient(DrawioAPIClient):
+    """A client whose worker process dies on the diagram titled "Crash"."""
+
+    def export_many(self, diagram, targets):
+        if diagram["title"] == "Crash":
+            os._exit(1)
+        return super().export_many(diagram, targets)
+
+
+def test_export_batch_reports_dead_workers_per_item(tmp_path):
+    """Test that a worker process dying is reported in the results instead of raised."""
+    client = CrashingClient()
+    diagrams = [_make_diagram(client, i) for i in range(4)]
+    diagrams[2]["title"] = "Crash"
+    outputs = [str(tmp_path / f"d{i}.svg") for i in range(4)]
+
+    results = client.export_batch(diagrams, outputs, workers=2)
+    assert [r.position for r in results] == [0, 1, 2, 3]
+    assert results[2].error.startswith("BrokenProcessPool")
@@ -0,0 +1,74 @@
+"""Tests for bulk node and edge insertion."""
+
+import pytest
+
+from src.drawio_api.client import DrawioAPIClient, DEFAULT_NODE_STYLE
+
+
+def test_add_nodes_matches_per_call_ids_and_cells():
+    """Test that bulk insertion assigns the IDs and cells add_node would."""
+    client = DrawioAPIClient()
+    expected = client.create_diagram()
+    client.add_node(expected, "Start", 0, 0)
+    client.add_node(expected, "End", 200, 0, 80, 40, "ellipse;")
+    client.add_edge(expected, "node_1", "node_2", "go")
+
+    diagram = client.create_diagram()
+    node_ids = client.add_nodes(diagram, [
+        {"label": "Start", "x": 0, "y": 0},
+        {"label": "End", "x": 200, "y": 0, "width": 80, "height": 40,
+         "style": "ellipse;"},
+    ])
+    edge_ids = client.add_edges(diagram, [(node_ids[0], node_ids[1], "go")])
+
+    assert node_ids == ["node_1", "node_2"]
+    assert edge_ids == ["edge_3"]
+    assert diagram["cells"] == expected["cells"]
+    assert diagram["modified"] is True
+    assert [edge["id"] for edge in diagram.outgoing("node_1")] == ["edge_3"]
+
+
+def test_add_nodes_from_numpy_columns():
+    """Test column mappings and structured arrays of NumPy values."""
+    np = pytest.importorskip("numpy")
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_node(diagram, "Existing", 0, 0)
+    diagram.bounds()
+
+    node_ids = client.add_nodes(diagram, {
+        "label": np.array(["a", "b", "c"]),
+        "x": np.array([10.0, 20.0, 30.0]),
+        "y": np.array([0.5, 1.0, 1.5]),
+    }, width=10, height=10)
+    assert node_ids == ["node_2", "node_3", "node_4"]
+    cell = diagram.get_node("node_3")
+    assert cell["label"] == "b"
+    assert type(cell["x"]) is int and cell["y"] == 1.0
+    assert cell["style"] == DEFAULT_NODE_STYLE
+    assert diagram.bounds() == (0, 0, 120, 60)
+
+    records = np.array([("d", 500, 500)],
+                       dtype=[("label", "U8"), ("x", "i8"), ("y", "i8")])
+    client.add_nodes(diagram, records)
+    assert diagram.bounds() == (0, 0, 620, 560)
+
+
+def test_add_nodes_skips_ids_in_use():
+    """Test that bulk IDs skip ones freed-up numbering would collide with."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_nodes(diagram, [("a", 0, 0), ("b", 0, 0), ("c", 0, 0)])
+    client.remove_cell(diagram, "node_1")
+    assert client.add_nodes(diagram, [("d", 0, 0), ("e", 0, 0)]) == ["node_4", "node_5"]
+
+
+def test_add_nodes_rejects_incomplete_records():
+    """Test that missing required columns are reported."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    with pytest.raises(ValueError, match="'y'"):
+        client.add_nodes(diagram, [{"label": "a", "x": 0}])
+    with pytest.raises(ValueError, match="same length"):
+        client.add_nodes(diagram, [("a", 0, 0), ("b", 0)])
+    assert diagram["cells"] == []
@@ -0,0 +1,86 @@
+"""Tests for the render cache."""
+
+import io
+import os
+import pickle
+
+from src.drawio_api.cache import RenderCache
+from src.drawio_api.client import DrawioAPIClient
+
+
+def _make_diagram(client, label="A"):
+    diagram = client.create_diagram()
+    diagram = client.add_node(diagram, label, 0, 0)
+    return client.add_node(diagram, "B", 0, 200)
+
+
+def test_memory_tier_is_size_bounded_lru():
+    """Test LRU eviction by size and the hit/miss counters."""
+    cache = RenderCache(max_memory_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"  # "a" is now the most recently used
+    cache.put("c", b"12345")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345"
+    assert cache.get("c") == b"12345"
+    assert cache.stats()["memory_bytes"] == 10
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_disk_tier_persists_and_evicts(tmp_path):
+    """Test that entries survive a new cache instance and old files are evicted."""
+    directory = str(tmp_path / "cache")
+    cache = RenderCache(max_memory_bytes=0, directory=directory, max_disk_bytes=25)
+    cache.put("aa1", b"x" * 10)
+    os.utime(cache._path("aa1"), (1, 1))
+    cache.put("bb2", b"y" * 10)
+    cache.put("cc3", b"z" * 10)
+
+    reopened = RenderCache(directory=directory)
+    assert reopened.get("aa1") is None
+    assert reopened.get("cc3") == b"z" * 10
+    assert reopened.copy_to("bb2", str(tmp_path / "out.bin"))
+    assert (tmp_path / "out.bin").read_bytes() == b"y" * 10
+    assert reopened.stats()["disk_hits"] == 2
+
+    restored = pickle.loads(pickle.dumps(reopened))
+    assert restored.get("cc3") == b"z" * 10
+
+
+def test_overwriting_a_disk_entry_keeps_the_size_exact(tmp_path):
+    """Test that rewriting a key replaces its size instead of adding to it."""
+    cache = RenderCache(max_memory_bytes=0, directory=str(tmp_path), max_disk_bytes=21)
+    cache.put("aa1", b"x" * 10)
+    cache.put("bb2", b"y" * 10)
+    cache.put("aa1", b"x" * 10)
+
+    # 20 bytes fit; counting the rewrite twice would evict down to 90%
+    assert cache._disk_bytes == cache._scan_disk_bytes() == 20
+    assert cache.get("bb2") == b"y" * 10
+
+
+def test_client_reuses_cached_exports(tmp_path, monkeypatch):
+    """Test that unchanged diagrams are served from the cache."""
+    cache = RenderCache(directory=str(tmp_path / "cache"))
+    client = DrawioAPIClient(cache=cache)
+    renders = []
+    original = client.calculate_diagram_size
+    monkeypatch.setattr(client, "calculate_diagram_size",
+                        lambda d: renders.append(1) or original(d))
+
+    first = client.export_to_image(_make_diagram(client), str(tmp_path / "a.svg"),
+                                   format="svg")
+    second = client.export_to_image(_make_diagram(client), str(tmp_path / "b.svg"),
+                                    format="svg")
+    stream = io.BytesIO()
+    client.export_many(_make_diagram(client), [{"stream": stream, "format": "svg"}])
+    client.export_to_image(_make_diagram(client, "changed"), str(tmp_path / "c.svg"),
+                           format="svg")
+
+    assert len(renders) == 2
+    assert open(first, "rb").read() == open(second, "rb").read() == stream.getvalue()
+    assert client.export_diagram(_make_diagram(client), "drawio") == \
+        client.export_diagram(_make_diagram(client), "drawio")
+    assert cache.stats()["misses"] == 3
@@ -0,0 +1,113 @@
+"""Tests for the command-line converter."""
+
+import json
+import os
+
+import pytest
+
+from src.drawio_api.cli import MANIFEST_NAME, main
+from src.drawio_api.client import DrawioAPIClient
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    client = DrawioAPIClient()
+    for i in range(3):
+        diagram = client.create_diagram(f"Diagram {i}")
+        client.add_node(diagram, f"Node {i}", 0, 0)
+        (tmp_path / f"json_{i}.json").write_text(
+            client.export_diagram(diagram, "json"))
+        (tmp_path / f"xml_{i}.drawio").write_text(
+            client.export_diagram(diagram, "drawio"))
+    return tmp_path
+
+
+def run(capsys, *argv):
+    status = main(["convert", *argv])
+    out, err = capsys.readouterr()
+    return status, out.splitlines()[-1] if out else "", err
+
+
+def test_converts_globs_to_several_formats(inputs, capsys):
+    """Test that every matched input is converted to every format."""
+    out = inputs / "out"
+    status, summary, _ = run(capsys, str(inputs / "*.json"),
+                             str(inputs / "xml_*.drawio"),
+                             "-f", "svg,xml", "-o", str(out), "-j", "2")
+    assert status == 0
+    assert summary.startswith("6 input(s): 12 output(s) written, 0 up to date, "
+                              "0 failed")
+    assert (out / "json_0.svg").read_bytes().startswith(b"<?xml")
+    assert "<mxGraphModel" in (out / "xml_2.xml").read_text()
+    manifest = json.loads((out / MANIFEST_NAME).read_text())
+    assert len(manifest) == 12
+
+
+def test_skips_up_to_date_outputs(inputs, capsys):
+    """Test the mtime and content-hash checks."""
+    source = inputs / "json_1.json"
+    args = (str(source), "-f", "svg")
+    written = "1 input(s): 1 output(s) written"
+    up_to_date = "1 input(s): 0 output(s) written, 1 up to date"
+    assert run(capsys, *args)[1].startswith(written)
+    assert run(capsys, *args)[1].startswith(up_to_date)
+
+    # A newer input with unchanged content is still up to date
+    stat = os.stat(source)
+    os.utime(inputs / "json_1.svg", (stat.st_atime, stat.st_mtime - 10))
+    assert run(capsys, *args)[1].startswith(up_to_date)
+    assert os.stat(inputs / "json_1.svg").st_mtime >= os.stat(source).st_mtime
+
+    # Changed content, changed options or --force rebuild the output
+    data = json.loads(source.read_text())
+    data["cells"][0]["label"] = "Changed"
+    source.write_text(json.dumps(data))
+    os.utime(inputs / "json_1.svg", (stat.st_atime, stat.st_mtime - 10))
+    assert run(capsys, *args)[1].startswith(written)
+    assert b"Changed" in (inputs / "json_1.svg").read_bytes()
+    assert run(capsys, str(source), "-f", "drawio")[1].startswith(written)
+    assert run(capsys, str(source), "-f", "drawio", "--pretty")[1].startswith(written)
+    assert run(capsys, *args, "--force")[1].startswith(written)
+
+
+def test_reports_failures(inputs, capsys):
+    """Test that broken inputs are reported without stopping the batch."""
+    (inputs / "broken.json").write_text("{not json")
+    status, summary, err = run(capsys, str(inputs / "*.json"), "-f", "svg", "-j", "1")
+    assert status == 1
+    assert "broken.json" in err
+    assert "3 output(s) written, 0 up to date, 1 failed" in summary
+
+
+def test_rejects_invalid_arguments(inputs, capsys):
+    """Test usage errors."""
+    with pytest.raises(SystemExit):
+        main(["convert", str(inputs / "json_0.json"), "-f", "gif"])
+    with pytest.raises(SystemExit):
+        main(["convert", str(inputs / "missing.json")])
+    with pytest.raises(SystemExit):
+        # json_0.json and json_0.drawio would both write out/json_0.svg
+        (inputs / "json_0.drawio").write_text((inputs / "xml_0.drawio").read_text())
+        main(["convert", str(inputs / "json_0.*"), "-o", str(inputs / "out")])
+    assert main([]) == 2
+
+
+def test_running_twice_ignores_own_outputs(tmp_path, capsys):
+    """Test that outputs written next to the inputs are not picked up as inputs."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram("Twice")
+    client.add_node(diagram, "Node", 0, 0)
+    (tmp_path / "a.json").write_text(client.export_diagram(diagram, "json"))
+    args = (str(tmp_path), "-f", "drawio,svg,xml")
+
+    status, summary, _ = run(capsys, *args)
+    assert status == 0
+    assert summary.startswith("1 input(s): 3 output(s) written")
+    status, summary, err = run(capsys, *args)
+    assert status == 0 and not err
+    assert summary.startswith("1 input(s): 0 output(s) written, 3 up to date, 0 failed")
+
+    # Naming an output explicitly still converts it
+    status, summary, _ = run(capsys, str(tmp_path / "a.drawio"), "-f", "svg", "-o",
+                             str(tmp_path / "out"))
+    assert status == 0 and summary.startswith("1 input(s): 1 output(s) written")
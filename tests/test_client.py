@@ -47,4 +47,39 @@ def test_add_edge():
     assert len(updated_diagram["cells"]) == 3
     assert updated_diagram["cells"][2]["source"] == node1_id
     assert updated_diagram["cells"][2]["target"] == node2_id
-    assert updated_diagram["cells"][2]["label"] == "Test Edge"
\ No newline at end of file
+    assert updated_diagram["cells"][2]["label"] == "Test Edge"
+
+
+def test_plain_dict_diagram_still_supported():
+    """Test that plain dict diagrams work with the client."""
+    client = DrawioAPIClient()
+    diagram = {"title": "Plain", "cells": [], "modified": False}
+
+    diagram = client.add_node(diagram, "Node 1", 0, 0)
+    diagram = client.add_node(diagram, "Node 2", 0, 200)
+    diagram = client.add_edge(diagram, "node_1", "node_2")
+
+    assert type(diagram) is dict
+    assert len(diagram["cells"]) == 3
+    assert "<mxCell id=\"edge_3\"" in client.export_diagram(diagram, "xml")
+
+
+def test_plain_dict_ids_stay_unique_after_removal():
+    """Test that plain dict diagrams don't reuse the ID of a remaining cell."""
+    client = DrawioAPIClient()
+    diagram = {"title": "Plain", "cells": [], "modified": False}
+    for i in range(3):
+        client.add_node(diagram, f"Node {i}", 0, i * 100)
+
+    client.remove_cell(diagram, "node_1")
+    client.add_node(diagram, "New", 0, 300)
+    client.add_nodes(diagram, [("Bulk", 0, 400)])
+    ids = [cell["id"] for cell in diagram["cells"]]
+    assert ids == ["node_2", "node_3", "node_4", "node_5"]
+
+    # Cells removed and appended by the caller are seen as well
+    diagram["cells"].pop(0)
+    diagram["cells"].append({"id": "node_6", "type": "node", "label": "Copy",
+                             "x": 0, "y": 0, "width": 120, "height": 60})
+    client.add_node(diagram, "Last", 0, 500)
+    assert diagram["cells"][-1]["id"] == "node_7"
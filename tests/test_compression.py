@@ -0,0 +1,31 @@
+"""Tests for draw.io page compression."""
+
+import urllib.parse
+
+from src.drawio_api import compression
+
+
+def test_compress_round_trip():
+    """Test that compress and decompress are inverses."""
+    xml_data = ('<mxGraphModel><root><mxCell id="0" value="50% &amp; &#10; ü"/>'
+                '</root></mxGraphModel>')
+    payload = compression.compress(xml_data)
+
+    assert payload.isascii()
+    assert compression.decompress(payload) == xml_data
+
+
+def test_streamed_payload_matches_single_shot():
+    """Test that compressing fragments gives the same payload as one string."""
+    cells = [f'<mxCell id="{i}"/>' for i in range(500)]
+    fragments = ["<mxGraphModel><root>"] + cells + ["</root></mxGraphModel>"]
+
+    streamed = "".join(compression.compress_fragments(fragments))
+    assert streamed == compression.compress("".join(fragments))
+
+
+def test_uri_encode_matches_encode_uri_component():
+    """Test percent-encoding against urllib with encodeURIComponent's safe set."""
+    text = "<a b=\"50%\">&amp; ü € %41 (x)!*'~</a>"
+
+    assert compression.uri_encode(text) == urllib.parse.quote(text, safe="!*'()")
@@ -0,0 +1,154 @@
+"""Tests for the indexed diagram model."""
+
+import pickle
+
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.diagram import Diagram
+
+
+def test_index_and_adjacency():
+    """Test id lookup, node/edge collections and adjacency lists."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    diagram = client.add_node(diagram, "A", 0, 0)
+    diagram = client.add_node(diagram, "B", 200, 0)
+    diagram = client.add_edge(diagram, "node_1", "node_2", "A to B")
+
+    assert isinstance(diagram, Diagram)
+    assert diagram.get_cell("node_2")["label"] == "B"
+    assert diagram.get_node("edge_3") is None
+    assert [n["id"] for n in diagram.nodes] == ["node_1", "node_2"]
+    assert [e["id"] for e in diagram.edges] == ["edge_3"]
+    assert [e["id"] for e in diagram.outgoing("node_1")] == ["edge_3"]
+    assert [e["id"] for e in diagram.incoming("node_2")] == ["edge_3"]
+    assert diagram.neighbors("node_2") == ["node_1"]
+
+
+def test_direct_cell_list_edits_are_picked_up():
+    """Test that cells appended to diagram["cells"] are indexed lazily."""
+    diagram = Diagram(title="Test")
+    diagram["cells"].append({"id": "n", "type": "node", "label": "N",
+                             "x": 0, "y": 0, "width": 10, "height": 10,
+                             "style": ""})
+    assert diagram.get_node("n")["label"] == "N"
+
+    diagram["cells"] = []
+    assert diagram.get_cell("n") is None
+
+
+def test_from_dict_shares_cells_and_pickles():
+    """Test wrapping a plain diagram dict and round-tripping via pickle."""
+    data = {"title": "Plain", "cells": [], "modified": False}
+    diagram = Diagram.from_dict(data)
+    diagram.add_cell({"id": "n", "type": "node"})
+
+    assert data["cells"] is diagram["cells"]
+    assert Diagram.from_dict(diagram) is diagram
+
+    restored = pickle.loads(pickle.dumps(diagram))
+    assert restored == diagram
+    assert restored.get_cell("n") == {"id": "n", "type": "node"}
+
+
+def test_bounds_maintained_incrementally(monkeypatch):
+    """Test that bounds follow adds/moves/removes and only recompute when needed."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_node(diagram, "A", 0, 0, 100, 100)
+    client.add_node(diagram, "B", 50, 50, 10, 10)
+    assert diagram.bounds() == (0, 0, 100, 100)
+
+    recomputed = []
+    compute = Diagram._compute_bounds
+    monkeypatch.setattr(Diagram, "_compute_bounds",
+                        lambda self: recomputed.append(1) or compute(self))
+
+    client.add_node(diagram, "C", 300, -20, 10, 10)
+    client.move_node(diagram, "node_2", 20, 20)  # interior: no recomputation
+    assert diagram.bounds() == (0, -20, 310, 100)
+    client.remove_cell(diagram, "node_2")
+    assert diagram.bounds() == (0, -20, 310, 100)
+    assert recomputed == []
+
+    client.remove_cell(diagram, "node_1")  # boundary: recomputed once, lazily
+    assert diagram.bounds() == (300, -20, 310, -10)
+    assert diagram.bounds() == (300, -20, 310, -10)
+    assert recomputed == [1]
+
+
+def test_exports_see_refreshed_geometry_edits():
+    """Test that the diagram size follows node dicts edited in place once refreshed."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_node(diagram, "A", 0, 0)
+    client.add_node(diagram, "B", 100, 100)
+    assert client.calculate_diagram_size(diagram) == (-140, -170, 360, 330)
+    assert [node["id"] for node in diagram.query_point(110, 110)] == ["node_2"]
+
+    diagram["cells"][1]["x"] = 3000
+    # The cached bounds are used until the edit is made known
+    assert client.calculate_diagram_size(diagram) == (-140, -170, 360, 330)
+    assert client.calculate_diagram_size(diagram, rescan=True) == (-50, -170, 3170, 330)
+    assert diagram.query_point(110, 110) == []
+
+    diagram["cells"][1]["x"] = 4000
+    diagram.refresh_geometry()
+    assert client.calculate_diagram_size(diagram) == (-50, -170, 4170, 330)
+    assert 'x="4000"' in client.render_image(diagram, "svg").decode()
+
+
+def test_remove_node_removes_connected_edges():
+    """Test that removing a node drops its edges and frees its ID."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_node(diagram, "A", 0, 0)
+    client.add_node(diagram, "B", 200, 0)
+    client.add_edge(diagram, "node_1", "node_2")
+    client.add_node(diagram, "C", 400, 0)
+
+    removed = diagram.remove_cell("node_2")
+    assert [cell["id"] for cell in removed] == ["node_2", "edge_3"]
+    assert [cell["id"] for cell in diagram["cells"]] == ["node_1", "node_4"]
+    assert diagram.outgoing("node_1") == []
+
+    client.add_node(diagram, "D", 600, 0)
+    client.add_node(diagram, "E", 800, 0)
+    assert [cell["id"] for cell in diagram["cells"]][-2:] == ["node_3", "node_5"]
+
+
+def test_change_journal():
+    """Test that changes_since collapses the changes made after a version."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_node(diagram, "A", 0, 0)
+    client.add_node(diagram, "B", 200, 0)
+    version = diagram.version
+    assert diagram.changes_since(version) == {}
+
+    client.add_edge(diagram, "node_1", "node_2")
+    diagram.move_node("node_1", 10, 10)
+    client.update_cell(diagram, "node_2", label="B2", width=50)
+    client.add_node(diagram, "C", 400, 0)
+    diagram.remove_cell("node_4")
+    assert diagram.changes_since(version) == {"edge_3": "added", "node_1": "updated",
+                                              "node_2": "updated"}
+    assert diagram.get_cell("node_2")["label"] == "B2"
+    assert diagram.query_point(260, 10) == []
+
+    version = diagram.version
+    diagram.remove_cell("node_2")
+    client.add_node(diagram, "B again", 0, 0)
+    diagram["cells"].append({"id": "direct", "type": "node", "label": "",
+                             "x": 0, "y": 0, "width": 1, "height": 1, "style": ""})
+    diagram.mark_updated("node_1")
+    assert diagram.changes_since(version) == {"node_2": "updated", "edge_3": "removed",
+                                              "direct": "added", "node_1": "updated"}
+
+    # Unknown changes can't be patched
+    version = diagram.version
+    diagram.translate(5, 5)
+    assert diagram.changes_since(version) is None
+    assert diagram.changes_since(diagram.version) == {}
+    version = diagram.version
+    diagram["cells"] = list(diagram["cells"])
+    assert diagram.changes_since(version) is None
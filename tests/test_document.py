@@ -0,0 +1,101 @@
+"""Tests for multi-page documents."""
+
+import io
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+def make_document(client):
+    document = client.create_document("Overview", "Details")
+    client.add_node(document["Overview"].diagram, "Start", 0, 0)
+    details = document["Details"].diagram
+    client.add_node(details, "A", 0, 0)
+    client.add_node(details, "B", 0, 200)
+    client.add_edge(details, "node_1", "node_2", "next")
+    return document
+
+
+def test_pages_round_trip_and_load_lazily():
+    """Test that every page survives a round trip and is parsed on first access only."""
+    client = DrawioAPIClient()
+    document = make_document(client)
+    document.add_page(diagram=client.create_diagram("Notes"))
+    data = client.export_document(document, pretty=True)
+    assert data.count("<diagram ") == 3
+
+    loaded = client.load_document(io.BytesIO(data.encode("utf-8")))
+    assert loaded.page_names() == ["Overview", "Details", "Notes"]
+    assert [page.id for page in loaded] == [page.id for page in document]
+    assert not any(page.loaded for page in loaded)
+
+    details = loaded["Details"].diagram
+    assert loaded["Details"].loaded and not loaded["Overview"].loaded
+    assert details["title"] == "Details"
+    assert details["cells"] == document["Details"].diagram["cells"]
+    assert loaded[2].diagram["cells"] == []
+
+
+def test_untouched_pages_are_copied_verbatim(tmp_path):
+    """Test that re-exporting only re-serializes the pages that were accessed."""
+    client = DrawioAPIClient()
+    path = tmp_path / "pages.drawio"
+    with open(path, "w", encoding="utf-8") as f:
+        client.write_document(make_document(client), f, compressed=True)
+
+    loaded = client.load_document(str(path))
+    overview_source = loaded["Overview"].source
+    assert overview_source and not overview_source.startswith(b"<")
+    client.add_node(loaded["Details"].diagram, "C", 0, 400)
+
+    data = client.export_document(loaded, compressed=True)
+    assert overview_source.decode() in data
+    reloaded = client.load_document(data.encode("utf-8"))
+    assert reloaded["Overview"].diagram["cells"] == loaded["Overview"].diagram["cells"]
+    labels = [cell["label"] for cell in reloaded["Details"].diagram.nodes]
+    assert labels == ["A", "B", "C"]
+
+
+def test_untouched_pages_follow_the_requested_encoding():
+    """Test that copied pages are re-encoded to match ``compressed`` either way."""
+    client = DrawioAPIClient()
+    packed = client.export_document(make_document(client), compressed=True)
+
+    loaded = client.load_document(packed.encode("utf-8"))
+    plain = client.export_document(loaded)
+    assert plain.count("<mxGraphModel") == 2
+    assert not any(page.loaded for page in loaded)
+
+    reloaded = client.load_document(plain.encode("utf-8"))
+    assert all(page.source.startswith(b"<") for page in reloaded)
+    assert client.export_document(reloaded, compressed=True).count("<mxGraphModel") == 0
+    expected = make_document(client)
+    for page in reloaded:
+        assert page.diagram["cells"] == expected[page.name].diagram["cells"]
+
+
+def test_pages_render_individually():
+    """Test that a single page can be exported and rendered on its own."""
+    client = DrawioAPIClient()
+    data = client.export_document(make_document(client))
+    loaded = client.load_document(data.encode("utf-8"))
+    svg = client.render_image(loaded["Details"].diagram, format="svg").decode()
+    assert ">A<" in svg and ">Start<" not in svg and not loaded["Overview"].loaded
+    xml = client.export_diagram(loaded["Details"].diagram, format="xml")
+    assert 'value="next"' in xml
+
+
+def test_single_page_files_and_documents():
+    """Test that .drawio and mxGraphModel files load as documents, pages removable."""
+    client = DrawioAPIClient()
+    diagram = client.add_node(client.create_diagram("Solo"), "X", 0, 0)
+    for data in (client.export_diagram(diagram, format="drawio"),
+                 client.export_diagram(diagram, format="xml")):
+        document = client.load_document(io.StringIO(data))
+        assert len(document) == 1
+        assert document[0].diagram["cells"] == diagram["cells"]
+    assert document.page_names() == ["Page-1"]
+
+    document = make_document(client)
+    document.remove_page("Overview")
+    assert document.page_names() == ["Details"]
+    assert document.add_page().id not in {page.id for page in document.pages[:-1]}
@@ -0,0 +1,78 @@
+"""Tests for the columnar geometry store."""
+
+import pytest
+
+from src.drawio_api import geometry
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.diagram import Diagram
+
+pytestmark = pytest.mark.skipif(not geometry.NUMPY_AVAILABLE,
+                                reason="NumPy not installed")
+
+
+def make_diagram():
+    client = DrawioAPIClient()
+    diagram = client.create_diagram("Geometry")
+    client.add_node(diagram, "A", x=0, y=0, width=100, height=50)
+    client.add_node(diagram, "B", x=200, y=100, width=50, height=50)
+    client.add_edge(diagram, "node_1", "node_2")
+    return client, diagram
+
+
+def test_store_bounds_match_cells():
+    """Test that vectorized bounds equal the cell extents."""
+    _, diagram = make_diagram()
+    assert diagram.bounds() == (0, 0, 250, 150)
+    assert isinstance(diagram.bounds()[2], int)
+
+
+def test_store_follows_added_and_moved_nodes():
+    """Test that an existing store tracks added and moved nodes."""
+    client, diagram = make_diagram()
+    diagram.bounds()  # build the store
+    client.add_node(diagram, "C", x=-50, y=300, width=10, height=10)
+    diagram.move_node("node_1", 500, 0)
+    assert diagram.bounds() == (-50, 0, 600, 310)
+    assert diagram.get_node("node_1")["x"] == 500
+
+
+def test_translate_and_scale_write_back_to_cells():
+    """Test that whole-diagram transforms update the cell dicts."""
+    _, diagram = make_diagram()
+    diagram.translate(10, -10)
+    node = diagram.get_node("node_2")
+    assert (node["x"], node["y"]) == (210, 90)
+    assert type(node["x"]) is int
+
+    diagram.scale(0.5, origin=(10, -10))
+    assert (node["x"], node["y"], node["width"]) == (110, 40, 25)
+    assert diagram.bounds() == (10, -10, 135, 65)
+
+
+def test_hit_test():
+    """Test point hit tests against node rectangles."""
+    _, diagram = make_diagram()
+    assert [cell["id"] for cell in diagram.hit_test(50, 25)] == ["node_1"]
+    assert [cell["id"] for cell in diagram.hit_test(225, 125)] == ["node_2"]
+    assert diagram.hit_test(150, 75) == []
+
+
+def test_store_remove_swaps_last_row():
+    """Test O(1) removal by moving the last row."""
+    store = geometry.GeometryStore(capacity=1)
+    for i in range(3):
+        store.add(f"n{i}", i * 10, 0, 5, 5)
+    store.remove("n0")
+    assert store.ids == ["n2", "n1"]
+    assert store.get("n2") == (20, 0, 5, 5)
+    assert store.bounds() == (10, 0, 25, 5)
+
+
+def test_refresh_after_direct_edit():
+    """Test that in-place cell edits are picked up after a refresh."""
+    client, diagram = make_diagram()
+    diagram.bounds()
+    diagram.get_node("node_2")["x"] = 1000
+    diagram.refresh_geometry()
+    assert client.calculate_diagram_size(diagram)[2] == 1100
+    assert Diagram.from_dict(dict(diagram)).bounds() == (0, 0, 1050, 150)
@@ -0,0 +1,92 @@
+"""Tests for transactional undo and redo."""
+
+import copy
+
+import pytest
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+@pytest.fixture
+def diagram():
+    client = DrawioAPIClient()
+    diagram = client.create_diagram("History")
+    ids = client.add_nodes(diagram, [(f"Node {i}", i * 150, 0, 120, 60)
+                                     for i in range(4)])
+    client.add_edges(diagram, list(zip(ids, ids[1:])),
+                     style="edgeStyle=orthogonalEdgeStyle;")
+    return diagram
+
+
+def test_transaction_undo_and_redo(diagram):
+    """Test that a transaction is undone and redone as a whole, indexes included."""
+    client = DrawioAPIClient()
+    history = diagram.enable_history()
+    before = copy.deepcopy(diagram["cells"])
+
+    history.begin()
+    client.remove_cell(diagram, "node_2")
+    client.add_node(diagram, "New", 500, 300)
+    client.update_cell(diagram, "edge_7", label="relabelled", points=[[0, 0]])
+    client.layout(diagram)
+    history.commit()
+    after = copy.deepcopy(diagram["cells"])
+
+    assert history.undo()
+    assert diagram["cells"] == before
+    assert [n["id"] for n in diagram.nodes] == ["node_1", "node_2", "node_3", "node_4"]
+    assert [e["id"] for e in diagram.outgoing("node_2")] == ["edge_6"]
+    assert "points" not in diagram.get_cell("edge_7")
+    assert diagram.get_cell("node_9") is None
+    assert diagram.bounds() == (0, 0, 570, 60)
+    assert [n["id"] for n in diagram.query_point(160, 10)] == ["node_2"]
+    assert not history.undo()
+
+    assert history.redo()
+    assert diagram["cells"] == after
+    assert diagram.get_cell("node_2") is None
+    assert not history.redo()
+
+
+def test_single_edits_depth_and_rollback(diagram):
+    """Test one undo step per edit outside a transaction, depth limit and rollback."""
+    history = diagram.enable_history(depth=2)
+    for x in (10, 20, 30):
+        diagram.move_node("node_1", x, 0)
+    history.undo()
+    history.undo()
+    assert diagram.get_node("node_1")["x"] == 10
+    assert not history.undo()
+
+    diagram.translate(5, 5)
+    assert not history.can_redo
+    with pytest.raises(KeyError):
+        with history.transaction():
+            diagram.move_node("node_1", 99, 99)
+            diagram.remove_cell("missing")
+    assert diagram.get_node("node_1")["x"] == 15
+    history.undo()
+    assert diagram.get_node("node_1")["x"] == 10
+
+    history.begin()
+    with pytest.raises(RuntimeError):
+        history.undo()
+    diagram["cells"] = []
+    assert not history.can_undo and not history.in_transaction
+
+
+def test_undo_keeps_incremental_exports_in_sync(diagram):
+    """Test that undone changes reach the cached output of incremental exports."""
+    full = DrawioAPIClient()
+    client = DrawioAPIClient(incremental=True)
+    history = diagram.enable_history()
+    expected = full.export_diagram(diagram, "xml")
+    assert client.export_diagram(diagram, "xml") == expected
+
+    with history.transaction():
+        client.route_edges(diagram)
+        client.remove_cell(diagram, "node_3")
+    assert client.export_diagram(diagram, "xml") == full.export_diagram(diagram, "xml")
+    history.undo()
+    assert client.export_diagram(diagram, "xml") == expected
+    assert client.render_image(diagram, "svg") == full.render_image(diagram, "svg")
@@ -0,0 +1,90 @@
+"""Tests for incremental re-export."""
+
+import pytest
+
+from src.drawio_api import incremental, serializer
+from src.drawio_api.client import DrawioAPIClient
+
+FORMATS = [("json", False, False), ("xml", False, False), ("xml", True, False),
+           ("drawio", False, False), ("drawio", True, False), ("drawio", False, True)]
+
+
+@pytest.fixture
+def diagram():
+    client = DrawioAPIClient()
+    diagram = client.create_diagram("Incremental")
+    ids = client.add_nodes(diagram, [(f"Node {i}", i * 150, 0, 120, 60)
+                                     for i in range(6)])
+    client.add_edges(diagram, list(zip(ids, ids[1:])),
+                     style="edgeStyle=orthogonalEdgeStyle;")
+    return diagram
+
+
+def assert_same_output(diagram):
+    full = DrawioAPIClient()
+    client = DrawioAPIClient(incremental=True)
+    for format, pretty, compressed in FORMATS:
+        if format == "drawio":
+            expected = "".join(serializer.iter_drawio(diagram, pretty, 1, compressed))
+            assert incremental.export_drawio(diagram, pretty, compressed, 1) == expected
+        else:
+            expected = full.export_diagram(diagram, format, pretty)
+            assert client.export_diagram(diagram, format, pretty) == expected
+    assert client.render_image(diagram, "svg") == full.render_image(diagram, "svg")
+
+
+def test_patched_output_matches_full_export(diagram):
+    """Test that every kind of change is spliced into the cached output."""
+    client = DrawioAPIClient()
+    assert_same_output(diagram)
+
+    client.move_node(diagram, "node_1", 40, 200)
+    client.update_cell(diagram, "node_3", label="<changed & escaped>", height=90)
+    client.update_cell(diagram, "edge_8", label="relabelled")
+    assert_same_output(diagram)
+
+    client.remove_cell(diagram, "node_2")
+    client.add_node(diagram, "New", 500, 300)
+    client.add_edge(diagram, "node_1", "node_6")
+    client.route_edges(diagram)
+    assert_same_output(diagram)
+
+    diagram.get_cell("node_4")["style"] = "ellipse;"
+    diagram.mark_updated("node_4")
+    diagram.translate(10, 10)
+    assert_same_output(diagram)
+
+
+def test_only_changed_cells_are_rendered(diagram):
+    """Test that a refresh renders the changed node and its edges only."""
+    rendered = []
+
+    def render(cell, diagram):
+        rendered.append(cell["id"])
+        return cell["id"]
+
+    cache = incremental.FragmentCache(render, incremental._connected_edges)
+    cache.refresh(diagram)
+    assert len(rendered) == 11
+
+    del rendered[:]
+    diagram.move_node("node_3", 0, 300)
+    fragments = cache.refresh(diagram)
+    assert sorted(rendered) == ["edge_8", "edge_9", "node_3"]
+    assert len(fragments) == 11
+
+    del rendered[:]
+    diagram.remove_cell("node_6")
+    assert rendered == [] and "edge_11" not in cache.refresh(diagram)
+
+
+def test_unreported_edits_need_mark_updated(diagram):
+    """Test that in-place edits only show up once they are reported."""
+    client = DrawioAPIClient(incremental=True)
+    client.export_diagram(diagram, "xml")
+    diagram.get_cell("node_1")["label"] = "Renamed"
+    assert "Renamed" not in client.export_diagram(diagram, "xml")
+    diagram.mark_updated("node_1")
+    assert "Renamed" in client.export_diagram(diagram, "xml")
+    with pytest.raises(ValueError):
+        client.export_diagram(diagram, "yaml")
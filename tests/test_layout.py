@@ -0,0 +1,126 @@
+"""Tests for the automatic layout engine."""
+
+import pytest
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+def build_graph(client, edges, node_count):
+    diagram = client.create_diagram("Layout")
+    node_ids = client.add_nodes(diagram, [(f"n{i}", 0, 0) for i in range(node_count)])
+    client.add_edges(diagram, [(node_ids[s], node_ids[t]) for s, t in edges])
+    return diagram, node_ids
+
+
+def overlaps(a, b):
+    return (a["x"] < b["x"] + b["width"] and b["x"] < a["x"] + a["width"] and
+            a["y"] < b["y"] + b["height"] and b["y"] < a["y"] + a["height"])
+
+
+def test_layered_layout_points_edges_down_without_overlaps():
+    """Test that TB layout puts every target below its source and no nodes overlap."""
+    client = DrawioAPIClient()
+    edges = [(0, 1), (0, 2), (1, 3), (2, 3), (3, 4), (0, 5), (5, 6), (6, 4), (1, 4)]
+    diagram, _ = build_graph(client, edges, 7)
+    client.layout(diagram, algorithm="layered", direction="TB")
+
+    for edge in diagram.edges:
+        source = diagram.get_node(edge["source"])
+        target = diagram.get_node(edge["target"])
+        assert source["y"] + source["height"] < target["y"]
+    nodes = list(diagram.nodes)
+    for i, a in enumerate(nodes):
+        for b in nodes[i + 1:]:
+            assert not overlaps(a, b)
+    assert all(type(node["x"]) is int for node in nodes)
+    assert diagram.bounds()[:2] == (0, 0)
+
+
+def test_layered_layout_handles_cycles_and_directions():
+    """Test that cycles are broken and LR/BT flip the flow axis."""
+    client = DrawioAPIClient()
+    diagram, node_ids = build_graph(client, [(0, 1), (1, 2), (2, 0)], 3)
+
+    client.layout(diagram, direction="LR")
+    xs = [diagram.get_node(node_id)["x"] for node_id in node_ids]
+    assert xs == sorted(xs) and len(set(xs)) == 3
+
+    client.layout(diagram, direction="BT")
+    ys = [diagram.get_node(node_id)["y"] for node_id in node_ids]
+    assert ys == sorted(ys, reverse=True)
+
+
+def test_long_edges_get_a_bounded_number_of_virtual_nodes():
+    """Test that a deep layering does not add a virtual node per crossed layer."""
+    from src.drawio_api import layout
+
+    # A chain of 100 nodes with an edge from each of the first 10 to the last
+    successors = [[i + 1] for i in range(99)] + [[]]
+    for i in range(10):
+        successors[i].append(99)
+    ranks = layout._assign_layers(successors)
+    layers, upper, lower, breadth = layout._split_long_edges(successors, ranks,
+                                                             [1] * 100)
+    assert len(breadth) - 100 == 10 * 2
+    assert all(len(upper[node]) == 1 for node in range(100, 120))
+
+    client = DrawioAPIClient()
+    diagram, node_ids = build_graph(client, [(i, i + 1) for i in range(99)] +
+                                    [(i, 99) for i in range(10)], 100)
+    client.layout(diagram, direction="TB")
+    ys = [diagram.get_node(node_id)["y"] for node_id in node_ids]
+    assert ys == sorted(ys) and len(set(ys)) == 100
+
+
+def test_layout_rejects_unknown_options():
+    """Test that unknown algorithms and directions raise ValueError."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    with pytest.raises(ValueError, match="algorithm"):
+        client.layout(diagram, algorithm="radial")
+    with pytest.raises(ValueError, match="direction"):
+        client.layout(diagram, direction="diagonal")
+
+
+def test_force_layout_is_deterministic_and_respects_pinned_nodes():
+    """Test seeding, pinned nodes and that edges pull their ends together."""
+    pytest.importorskip("numpy")
+    client = DrawioAPIClient()
+    ring = [(i, (i + 1) % 8) for i in range(8)]
+    diagram, node_ids = build_graph(client, ring + [(8, 9), (9, 10), (10, 11)], 12)
+    client.move_node(diagram, node_ids[0], 1000, 500)
+
+    client.layout(diagram, algorithm="force", pinned=[node_ids[0]], seed=7)
+    first = [(node["x"], node["y"]) for node in diagram.nodes]
+    assert first[0] == (1000, 500)
+    assert all(type(x) is int and type(y) is int for x, y in first)
+
+    client.layout(diagram, algorithm="force", pinned=[node_ids[0]], seed=7)
+    assert [(node["x"], node["y"]) for node in diagram.nodes] == first
+
+    def distance(a, b):
+        (ax, ay), (bx, by) = first[a], first[b]
+        return ((ax - bx) ** 2 + (ay - by) ** 2) ** 0.5
+
+    edge_lengths = [distance(a, b) for a, b in ring]
+    cross_lengths = [distance(a, b) for a in range(8) for b in range(8, 12)]
+    assert max(edge_lengths) < max(cross_lengths)
+
+    with pytest.raises(KeyError, match="node_99"):
+        client.layout(diagram, algorithm="force", pinned=["node_99"])
+    assert [(node["x"], node["y"]) for node in diagram.nodes] == first
+
+
+def test_barnes_hut_repulsion_matches_exact_sum():
+    """Test the quadtree approximation against the O(N^2) sum."""
+    np = pytest.importorskip("numpy")
+    from src.drawio_api import layout
+
+    points = np.random.default_rng(0).uniform(0, 1000, size=(300, 2))
+    approx = layout._repulsion(points, 100.0, 0.5)
+
+    delta = points[:, None, :] - points[None, :, :]
+    distance2 = (delta ** 2).sum(axis=-1)
+    np.fill_diagonal(distance2, np.inf)
+    exact = (delta * (100.0 / distance2)[..., None]).sum(axis=1)
+    assert np.linalg.norm(approx - exact) / np.linalg.norm(exact) < 0.01
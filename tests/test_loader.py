@@ -0,0 +1,130 @@
+"""Tests for loading .drawio and XML files."""
+
+import io
+import os
+
+import pytest
+
+from src.drawio_api.client import DrawioAPIClient
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_load_drawio_file():
+    """Test loading the flowchart shipped with the repository."""
+    client = DrawioAPIClient()
+    diagram = client.load_diagram(os.path.join(REPO_ROOT, "main_program_flow.drawio"))
+
+    assert diagram["title"] == "main.py Program Flow"
+    assert diagram["modified"] is False
+    node = diagram.get_node("node_3")
+    assert node["label"] == "Check if command line\narguments provided"
+    assert (node["x"], node["y"], node["width"], node["height"]) == (300, 220, 180, 60)
+    edge = next(iter(diagram.edges))
+    assert (edge["source"], edge["target"], edge["label"]) == ("node_1", "node_2", None)
+
+
+def test_export_load_round_trip():
+    """Test that exported XML and .drawio documents load back unchanged."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram(title="Round Trip")
+    diagram = client.add_node(diagram, "A & B", 10.5, 20)
+    diagram = client.add_node(diagram, "C", 200, 20, style="ellipse;")
+    diagram = client.add_edge(diagram, "node_1", "node_2", "go")
+
+    for format in ("xml", "drawio"):
+        data = client.export_diagram(diagram, format=format, pretty=True)
+        loaded = client.load_diagram(io.BytesIO(data.encode("utf-8")),
+                                     title="Round Trip")
+        assert loaded["cells"] == diagram["cells"]
+
+
+def test_user_objects_and_groups():
+    """Test wrapped cells and child geometry relative to a group."""
+    xml_data = b"""<mxGraphModel><root>
+      <mxCell id="0"/><mxCell id="1" parent="0"/>
+      <mxCell id="g" value="" style="group" parent="1" vertex="1">
+        <mxGeometry x="100" y="50" width="300" height="200" as="geometry"/>
+      </mxCell>
+      <UserObject label="Service" owner="team" id="s">
+        <mxCell style="rounded=1;" parent="g" vertex="1">
+          <mxGeometry x="10" y="20" width="80" height="40" as="geometry"/>
+        </mxCell>
+      </UserObject>
+    </root></mxGraphModel>"""
+    diagram = DrawioAPIClient().load_diagram(io.BytesIO(xml_data))
+
+    service = diagram.get_node("s")
+    assert service["label"] == "Service"
+    assert (service["x"], service["y"]) == (110, 70)
+
+
+def test_edge_label_children_fold_into_the_edge():
+    """Test that relative-geometry label vertices of an edge are not loaded as nodes."""
+    xml_data = b"""<mxGraphModel><root>
+      <mxCell id="0"/><mxCell id="1" parent="0"/>
+      <mxCell id="a" value="A" parent="1" vertex="1">
+        <mxGeometry x="0" y="0" width="80" height="40" as="geometry"/>
+      </mxCell>
+      <mxCell id="b" value="B" parent="1" vertex="1">
+        <mxGeometry x="200" y="0" width="80" height="40" as="geometry"/>
+      </mxCell>
+      <mxCell id="e" parent="1" source="a" target="b" edge="1">
+        <mxGeometry relative="1" as="geometry"/>
+      </mxCell>
+      <mxCell id="l" value="calls" style="edgeLabel;" parent="e" vertex="1"
+              connectable="0">
+        <mxGeometry x="-0.2" relative="1" as="geometry">
+          <mxPoint as="offset"/>
+        </mxGeometry>
+      </mxCell>
+    </root></mxGraphModel>"""
+    client = DrawioAPIClient()
+    diagram = client.load_diagram(io.BytesIO(xml_data))
+
+    assert [node["id"] for node in diagram.nodes] == ["a", "b"]
+    assert diagram.get_cell("e")["label"] == "calls"
+    assert diagram.bounds() == (0, 0, 280, 40)
+
+
+def test_dangling_edge_round_trip():
+    """Test that an edge without a target is not exported with target="None"."""
+    xml_data = b"""<mxGraphModel><root>
+      <mxCell id="0"/><mxCell id="1" parent="0"/>
+      <mxCell id="v" value="V" parent="1" vertex="1">
+        <mxGeometry x="0" y="0" width="80" height="40" as="geometry"/>
+      </mxCell>
+      <mxCell id="e" parent="1" source="v" edge="1">
+        <mxGeometry relative="1" as="geometry"/>
+      </mxCell>
+    </root></mxGraphModel>"""
+    client = DrawioAPIClient()
+    diagram = client.load_diagram(io.BytesIO(xml_data))
+
+    data = client.export_diagram(diagram, format="xml")
+    assert 'source="v" edge="1"' in data
+    assert "None" not in data
+    loaded = client.load_diagram(io.BytesIO(data.encode("utf-8")))
+    assert loaded["cells"] == diagram["cells"]
+    client.render_image(loaded, "svg")
+
+
+def test_compressed_round_trip():
+    """Test exporting a compressed .drawio file and loading it back."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram(title="Compressed")
+    for i in range(50):
+        diagram = client.add_node(diagram, f"Node {i} & more", i * 10, 0)
+    diagram = client.add_edge(diagram, "node_1", "node_50", "edge label")
+
+    plain = client.export_diagram(diagram, format="drawio")
+    packed = client.export_diagram(diagram, format="drawio", compressed=True)
+    assert "<mxCell" not in packed
+    assert len(packed) * 3 < len(plain)
+
+    loaded = client.load_diagram(io.StringIO(packed))
+    assert loaded["title"] == "Compressed"
+    assert loaded["cells"] == diagram["cells"]
+
+    with pytest.raises(ValueError):
+        client.export_diagram(diagram, format="xml", compressed=True)
@@ -0,0 +1,136 @@
+"""Tests for the in-memory raster pipeline."""
+
+import io
+import os
+
+import pytest
+
+from src.drawio_api import raster
+from src.drawio_api.client import DrawioAPIClient
+
+
+def _make_diagram(client):
+    diagram = client.create_diagram()
+    diagram = client.add_node(diagram, "A", 0, 0)
+    return client.add_node(diagram, "B", 0, 200)
+
+
+def test_render_image_in_memory(fake_cairosvg):
+    """Test rendering PNG and PDF bytes from an in-memory SVG."""
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client)
+
+    png = client.render_image(diagram, format="png", transparent=True, scale=2.0)
+    pdf = client.render_image(diagram, format="pdf")
+
+    assert png.startswith(b"\x89PNG")
+    assert pdf == b"%PDF fake"
+    kind, svg_data, scale, background = fake_cairosvg.calls[0]
+    assert svg_data.startswith(b"<?xml") and svg_data.endswith(b"</svg>")
+    assert (kind, scale, background) == ("png", 2.0, "transparent")
+    assert client.render_image(diagram, format="svg") == svg_data
+
+
+@pytest.mark.skipif(not raster.PILLOW_AVAILABLE, reason="Pillow not installed")
+def test_jpeg_export_writes_no_intermediate_files(fake_cairosvg, tmp_path):
+    """Test that JPEG export goes straight to the output file."""
+    client = DrawioAPIClient()
+    output_path = tmp_path / "diagram.jpg"
+
+    client.export_to_image(_make_diagram(client), str(output_path), format="jpg",
+                           bg="#000000")
+
+    assert os.listdir(tmp_path) == ["diagram.jpg"]
+    assert output_path.read_bytes().startswith(b"\xff\xd8")
+    assert fake_cairosvg.calls[0][3] == "#000000"
+
+
+def test_raster_export_to_stream(fake_cairosvg):
+    """Test writing a PDF to a binary stream."""
+    client = DrawioAPIClient()
+    stream = io.BytesIO()
+
+    diagram = _make_diagram(client)
+    assert client.export_to_image(diagram, format="pdf", stream=stream) is None
+    assert stream.getvalue() == b"%PDF fake"
+
+
+def test_render_requires_cairosvg(monkeypatch):
+    """Test the error raised when CairoSVG is missing."""
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", False)
+    with pytest.raises(ImportError):
+        raster.render(b"<svg/>", "png")
+    with pytest.raises(ValueError):
+        raster.render(b"<svg/>", "gif")
+
+
+def test_export_many_renders_once(fake_cairosvg, tmp_path, monkeypatch):
+    """Test fanning one render pass out to several targets."""
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client)
+    bounds_calls = []
+    original = client.calculate_diagram_size
+    monkeypatch.setattr(client, "calculate_diagram_size",
+                        lambda d: bounds_calls.append(1) or original(d))
+    stream = io.BytesIO()
+
+    paths = client.export_many(diagram, [
+        {"path": str(tmp_path / "a.svg")},
+        {"path": str(tmp_path / "a.png")},
+        {"path": str(tmp_path / "a.jpg")},
+        {"path": str(tmp_path / "t.png"), "transparent": True},
+        {"path": str(tmp_path / "big.png"), "scale": 2.0},
+        {"stream": stream, "format": "pdf"},
+    ])
+
+    assert paths[0] == str(tmp_path / "a.svg") and paths[-1] is None
+    assert len(bounds_calls) == 1
+    # a.png and a.jpg share one rasterization
+    assert [(kind, scale, bg) for kind, _, scale, bg in fake_cairosvg.calls] == [
+        ("png", 1.0, "#ffffff"), ("png", 1.0, "transparent"),
+        ("png", 2.0, "#ffffff"), ("pdf", 1.0, None)]
+    assert (tmp_path / "a.svg").read_bytes().endswith(b"</svg>")
+    assert stream.getvalue() == b"%PDF fake"
+
+
+def test_render_many_reuses_parsed_tree(monkeypatch):
+    """Test that the parsed SVG tree is shared between surfaces."""
+    parsed = []
+    surfaces = []
+
+    class Surface:
+        def __init__(self, tree, output, dpi, scale=1, background_color=None):
+            surfaces.append((type(self).__name__, tree, scale, background_color))
+            self.output = output
+
+        def finish(self):
+            self.output.write(type(self).__name__.encode())
+
+    class PNGSurface(Surface):
+        pass
+
+    class PDFSurface(Surface):
+        pass
+
+    class Parser:
+        @staticmethod
+        def Tree(bytestring):
+            parsed.append(bytestring)
+            return object()
+
+    class FakeModule:
+        parser = Parser
+        surface = type("surface", (), {"PNGSurface": PNGSurface,
+                                       "PDFSurface": PDFSurface})
+
+    monkeypatch.setattr(raster, "cairosvg", FakeModule, raising=False)
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", True)
+
+    images = raster.render_many(b"<svg/>", [("png", False, 1.0, ""),
+                                            ("PDF", False, 1.0, ""),
+                                            ("png", True, 3.0, ""),
+                                            ("svg", False, 1.0, "")])
+
+    assert images == [b"PNGSurface", b"PDFSurface", b"PNGSurface", b"<svg/>"]
+    assert parsed == [b"<svg/>"]
+    assert len({id(tree) for _, tree, _, _ in surfaces}) == 1
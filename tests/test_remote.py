@@ -0,0 +1,142 @@
+"""Tests for the pooled export-server backend, against a local stand-in server."""
+
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.drawio_api import raster
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.remote import ExportServerError, RemoteExporter
+
+
+class ExportHandler(BaseHTTPRequestHandler):
+    """Answers exports with ``IMAGE:<format>:<scale>`` once ``failures`` are used up."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers["Content-Length"])
+        fields = urllib.parse.parse_qs(self.rfile.read(length).decode("utf-8"))
+        with server.lock:
+            server.requests.append(fields)
+            server.ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.failures > 0
+            server.failures -= 1
+        try:
+            time.sleep(server.delay)
+            if fail:
+                body, status = b"busy", 503
+            else:
+                body = f"IMAGE:{fields['format'][0]}:{fields['scale'][0]}".encode()
+                status = 200
+            self.send_response(status)
+            if fail and server.retry_after is not None:
+                self.send_header("Retry-After", server.retry_after)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def export_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ExportHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.ports = set()
+    server.in_flight = server.max_in_flight = 0
+    server.failures = 0
+    server.delay = 0.0
+    server.retry_after = None
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_export_posts_diagram_xml(export_server):
+    """Test the form fields sent to the server and connection reuse."""
+    with RemoteExporter(export_server.url) as exporter:
+        image = exporter.export("<mxfile/>", "png", scale=2.0, transparent=True)
+        assert image == b"IMAGE:png:2.0"
+        assert exporter.export("<mxfile/>", "jpeg", bg="#000000") == b"IMAGE:jpg:1.0"
+    first, second = export_server.requests
+    assert first["xml"] == ["<mxfile/>"] and first["transparent"] == ["1"]
+    assert second["bg"] == ["#000000"] and "transparent" not in second
+    assert len(export_server.ports) == 1
+
+
+def test_retries_with_backoff(export_server):
+    """Test that transient failures are retried and persistent ones reported."""
+    export_server.failures = 2
+    exporter = RemoteExporter(export_server.url, retries=2, backoff=0.01)
+    assert exporter.export("<mxfile/>") == b"IMAGE:png:1.0"
+    assert len(export_server.requests) == 3
+
+    export_server.failures = 5
+    with pytest.raises(ExportServerError) as info:
+        RemoteExporter(export_server.url, retries=1, backoff=0.01).export("<mxfile/>")
+    assert info.value.status == 503
+    with pytest.raises(ValueError):
+        exporter.export("<mxfile/>", "gif")
+
+
+def test_retry_after_is_capped(export_server):
+    """Test that a huge Retry-After only delays a retry by max_backoff."""
+    export_server.failures = 1
+    export_server.retry_after = "3600"
+    exporter = RemoteExporter(export_server.url, retries=1, backoff=0.01,
+                              max_backoff=0.2)
+    start = time.perf_counter()
+    assert exporter.export("<mxfile/>") == b"IMAGE:png:1.0"
+    assert 0.2 <= time.perf_counter() - start < 2
+
+
+def test_timeouts_and_unreachable_servers(export_server):
+    """Test that slow and unreachable servers raise ExportServerError."""
+    export_server.delay = 0.5
+    with pytest.raises(ExportServerError, match="unavailable"):
+        RemoteExporter(export_server.url, timeout=0.1, retries=0).export("<mxfile/>")
+    with pytest.raises(ExportServerError):
+        RemoteExporter("http://127.0.0.1:9/", retries=0, timeout=1).export("<mxfile/>")
+
+
+def test_concurrency_is_limited(export_server):
+    """Test that no more than max_concurrency requests are in flight."""
+    export_server.delay = 0.05
+    exporter = RemoteExporter(export_server.url, max_concurrency=2)
+    images = exporter.export_many([f"<mxfile id='{i}'/>" for i in range(8)], "pdf")
+    assert images == [b"IMAGE:pdf:1.0"] * 8
+    assert export_server.max_in_flight == 2
+    assert len(export_server.ports) <= 2
+
+
+def test_client_uses_exporter_without_cairosvg(export_server, monkeypatch, tmp_path):
+    """Test PNG/PDF export through the server when CairoSVG is missing."""
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", False)
+    client = DrawioAPIClient(exporter=RemoteExporter(export_server.url))
+    diagram = client.add_node(client.create_diagram("Remote"), "A", 0, 0)
+
+    assert client.render_image(diagram, "pdf") == b"IMAGE:pdf:1.0"
+    path = client.export_to_image(diagram, str(tmp_path / "out.png"), scale=2.0)
+    with open(path, "rb") as f:
+        assert f.read() == b"IMAGE:png:2.0"
+    svg_path, png_path = client.export_many(diagram,
+                                            [{"path": str(tmp_path / "a.svg")},
+                                             {"path": str(tmp_path / "a.png")}])
+    with open(svg_path, "rb") as f:
+        assert f.read().startswith(b"<?xml")
+    assert 'name="Remote"' in export_server.requests[0]["xml"][0]
@@ -0,0 +1,91 @@
+"""Tests for orthogonal edge routing."""
+
+import io
+
+import pytest
+
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.routing import attach
+
+ORTHOGONAL = "edgeStyle=orthogonalEdgeStyle;endArrow=classic;html=1;"
+
+
+def routed_path(diagram, edge):
+    source = diagram.get_node(edge["source"])
+    target = diagram.get_node(edge["target"])
+    points = [tuple(point) for point in edge["points"]]
+    return [attach(source, points[0])] + points + [attach(target, points[-1])]
+
+
+def crosses(path, node):
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        if (min(x0, x1) < node["x"] + node["width"] and node["x"] < max(x0, x1) and
+                min(y0, y1) < node["y"] + node["height"] and node["y"] < max(y0, y1)):
+            return True
+    return False
+
+
+def blocked_diagram(client):
+    diagram = client.create_diagram("Routing")
+    client.add_nodes(diagram, [("A", 0, 0, 120, 60), ("Wall", -100, 150, 320, 60),
+                               ("B", 0, 300, 120, 60)])
+    client.add_edge(diagram, "node_1", "node_3", "through", style=ORTHOGONAL)
+    return diagram
+
+
+def test_route_edges_avoids_obstacles():
+    """Test that a routed edge detours around a node between its ends."""
+    client = DrawioAPIClient()
+    diagram = blocked_diagram(client)
+    client.route_edges(diagram)
+
+    edge = diagram.get_cell("edge_4")
+    path = routed_path(diagram, edge)
+    assert not crosses(path, diagram.get_node("node_2"))
+    assert path[0] == (60, 60) and path[-1] == (60, 300)
+    for (x0, y0), (x1, y1) in zip(path, path[1:]):
+        assert x0 == x1 or y0 == y1
+    assert diagram["modified"]
+
+
+def test_straight_route_keeps_one_waypoint():
+    """Test that aligned nodes get a straight route between their facing sides."""
+    client = DrawioAPIClient()
+    diagram = client.create_diagram()
+    client.add_nodes(diagram, [("A", 0, 0), ("B", 300, 0)])
+    client.add_edge(diagram, "node_1", "node_2", style=ORTHOGONAL)
+    client.route_edges(diagram)
+    path = routed_path(diagram, diagram.get_cell("edge_3"))
+    assert path == [(120, 30), (210, 30), (300, 30)]
+
+
+def test_route_edges_rejects_unknown_edges():
+    """Test that IDs that are not edges are named in a KeyError."""
+    client = DrawioAPIClient()
+    diagram = blocked_diagram(client)
+    with pytest.raises(KeyError, match="edge_9"):
+        client.route_edges(diagram, ["edge_4", "edge_9"])
+    with pytest.raises(KeyError, match="node_1"):
+        client.route_edges(diagram, ["node_1"])
+    assert "points" not in diagram.get_cell("edge_4")
+
+
+def test_waypoints_are_exported_and_loaded():
+    """Test that waypoints become mxPoints and SVG paths and survive a round trip."""
+    client = DrawioAPIClient()
+    diagram = blocked_diagram(client)
+    client.route_edges(diagram)
+    points = diagram.get_cell("edge_4")["points"]
+
+    xml = client.export_diagram(diagram, format="xml")
+    assert f'<mxPoint x="{points[0][0]}" y="{points[0][1]}"/>' in xml
+    for pretty in (False, True):
+        data = client.export_diagram(diagram, format="drawio", pretty=pretty)
+        loaded = client.load_diagram(io.BytesIO(data.encode("utf-8")), title="Routing")
+        assert loaded["cells"] == diagram["cells"]
+
+    stream = io.StringIO()
+    client.write_svg(diagram, stream)
+    points = routed_path(diagram, diagram.get_cell("edge_4"))
+    path = " L ".join(f"{x} {y}" for x, y in points)
+    assert f'd="M {path}"' in stream.getvalue()
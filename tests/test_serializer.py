@@ -0,0 +1,49 @@
+"""Tests for the XML and .drawio serializer."""
+
+import io
+import xml.etree.ElementTree as ET
+
+from src.drawio_api.client import DrawioAPIClient
+
+
+def _make_diagram(client):
+    diagram = client.create_diagram(title='Quotes "&" <tags>')
+    diagram = client.add_node(diagram, "Line 1\nA & B", 0, 0)
+    diagram = client.add_node(diagram, "Node 2", 200, 0)
+    diagram = client.add_edge(diagram, "node_1", "node_2", "yes")
+    diagram = client.add_edge(diagram, "node_2", "node_1")
+    return diagram
+
+
+def test_xml_export_is_well_formed():
+    """Test the structure and escaping of the compact XML export."""
+    client = DrawioAPIClient()
+    xml_data = client.export_diagram(_make_diagram(client), format="xml")
+
+    assert "\n  " not in xml_data
+    model = ET.fromstring(xml_data.encode("utf-8"))
+    cells = model.find("root").findall("mxCell")
+
+    assert [c.get("id") for c in cells] == ["0", "1", "node_1", "node_2",
+                                            "edge_3", "edge_4"]
+    assert cells[2].get("value") == "Line 1\nA & B"
+    assert cells[2].find("mxGeometry").get("width") == "120"
+    assert cells[4].get("value") == "yes"
+    assert cells[5].get("value") is None
+    assert cells[5].get("source") == "node_2"
+
+
+def test_drawio_export_pretty_and_stream():
+    """Test pretty .drawio output and writing it to a stream."""
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client)
+
+    pretty = client.export_diagram(diagram, format="drawio", pretty=True)
+    mxfile = ET.fromstring(pretty.encode("utf-8"))
+    assert mxfile.find("diagram").get("name") == 'Quotes "&" <tags>'
+    assert "\n      <root>\n        <mxCell id=\"0\"/>\n" in pretty
+
+    stream = io.BytesIO()
+    client.write_diagram(diagram, stream, format="drawio")
+    streamed = ET.fromstring(stream.getvalue())
+    assert len(streamed.find("diagram/mxGraphModel/root")) == 6
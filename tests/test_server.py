@@ -0,0 +1,160 @@
+"""Tests for the HTTP rendering service."""
+
+import http.client
+import json
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+from src.drawio_api import raster
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.remote import RemoteExporter
+from src.drawio_api.server import RenderServer
+
+
+def start(**kwargs):
+    server = RenderServer(("127.0.0.1", 0), quiet=True, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    return server
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def diagram():
+    client = DrawioAPIClient()
+    diagram = client.create_diagram("Served")
+    a = client.add_node(diagram, "A", 0, 0)["cells"][-1]["id"]
+    b = client.add_node(diagram, "B", 200, 0)["cells"][-1]["id"]
+    client.add_edge(diagram, a, b, "next")
+    return diagram
+
+
+@pytest.fixture
+def server(fake_cairosvg):
+    server = start(workers=1, timeout=5)
+    yield server
+    stop(server)
+
+
+def test_renders_json_and_xml(server, diagram):
+    """Test SVG and PNG output for JSON and .drawio request bodies."""
+    client = DrawioAPIClient()
+    body = client.export_diagram(diagram, "json")
+    response = requests.post(server.url + "render/svg", data=body,
+                             headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/svg+xml"
+    assert response.content == client.render_image(diagram, "svg")
+
+    drawio = client.export_diagram(diagram, "drawio")
+    response = requests.post(server.url + "render?format=png&scale=2", data=drawio)
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+
+    health = requests.get(server.url + "health").json()
+    assert health == {"workers": 1, "queue_size": 32, "pending": 0}
+
+
+def test_accepts_export_server_form_api(server, diagram, monkeypatch):
+    """Test that a RemoteExporter can render through the service."""
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", False)
+    client = DrawioAPIClient(exporter=RemoteExporter(server.url))
+    assert client.render_image(diagram, "pdf") == b"%PDF fake"
+
+
+def test_rejects_bad_requests(server):
+    """Test the error statuses for invalid input."""
+    render_svg = server.url + "render/svg"
+    assert requests.post(server.url + "render/gif", data="{}").status_code == 400
+    assert requests.post(render_svg, data="not a diagram").status_code == 400
+    assert requests.post(render_svg, data="<mxfile>").status_code == 400
+    assert requests.post(render_svg, data=json.dumps({"x": 1})).status_code == 400
+    assert requests.post(server.url + "other", data="{}").status_code == 404
+    assert requests.get(server.url + "render").status_code == 404
+
+
+def test_validates_content_length(fake_cairosvg):
+    """Test that a missing, malformed or oversized Content-Length gets an error."""
+    server = start(workers=1, timeout=5, max_body=1000)
+    try:
+        host, port = server.server_address[:2]
+        for headers, status in ((None, 411), ("-5", 400), ("12abc", 400),
+                                ("1001", 413)):
+            connection = http.client.HTTPConnection(host, port, timeout=5)
+            connection.putrequest("POST", "/render/svg")
+            if headers is not None:
+                connection.putheader("Content-Length", headers)
+            connection.endheaders()
+            response = connection.getresponse()
+            assert response.status == status
+            assert response.getheader("Connection") == "close"
+            connection.close()
+        response = requests.post(server.url + "render/svg", data="x" * 1001)
+        assert response.status_code == 413
+        assert requests.get(server.url + "health").status_code == 200
+    finally:
+        stop(server)
+
+
+def test_timeouts_and_backpressure(fake_cairosvg, diagram, monkeypatch):
+    """Test that slow renders time out and a full queue refuses requests."""
+    original = DrawioAPIClient.render_image
+
+    def slow_render(self, diagram, *args):
+        if diagram["title"] == "Slow":
+            time.sleep(2)
+        return original(self, diagram, *args)
+
+    # Patched before the workers are forked, so they inherit it
+    monkeypatch.setattr(DrawioAPIClient, "render_image", slow_render)
+    server = start(workers=1, queue_size=0, timeout=0.3)
+    try:
+        slow = dict(diagram, title="Slow")
+        results = []
+        thread = threading.Thread(target=lambda: results.append(
+            requests.post(server.url + "render/svg", data=json.dumps(slow))))
+        thread.start()
+        time.sleep(0.1)
+        busy = requests.post(server.url + "render/svg", data=json.dumps(diagram))
+        assert busy.status_code == 503 and busy.headers["Retry-After"] == "1"
+        thread.join()
+        assert results[0].status_code == 504
+
+        # The worker freed itself and serves new requests
+        response = requests.post(server.url + "render/svg", data=json.dumps(diagram))
+        assert response.status_code == 200
+    finally:
+        stop(server)
+
+
+def test_replaces_a_broken_pool_without_forking(fake_cairosvg, diagram, monkeypatch):
+    """Test that a dead worker fails its request and a fresh pool serves the rest."""
+    original = DrawioAPIClient.render_image
+
+    def crashing_render(self, diagram, *args):
+        if diagram["title"] == "Crash":
+            os._exit(1)
+        return original(self, diagram, *args)
+
+    # Inherited by the forked workers only; the replacement pool is not forked
+    monkeypatch.setattr(DrawioAPIClient, "render_image", crashing_render)
+    server = start(workers=1, timeout=30)
+    try:
+        crash = dict(diagram, title="Crash")
+        response = requests.post(server.url + "render/svg", data=json.dumps(crash))
+        assert response.status_code == 500 and "BrokenProcessPool" in response.text
+        assert server._pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+        response = requests.post(server.url + "render/svg", data=json.dumps(crash))
+        assert response.status_code == 200
+    finally:
+        stop(server)
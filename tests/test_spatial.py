@@ -0,0 +1,69 @@
+"""Tests for the spatial index and the diagram region queries."""
+
+import random
+
+from src.drawio_api.diagram import Diagram
+from src.drawio_api.spatial import SpatialIndex
+
+
+def node(node_id, x, y, width=100, height=50):
+    return {"id": node_id, "type": "node", "label": node_id, "x": x, "y": y,
+            "width": width, "height": height, "style": ""}
+
+
+def test_spatial_index_queries_and_updates():
+    """Test rectangle queries after inserts, moves and removals."""
+    index = SpatialIndex(cell_size=50)
+    index.insert("a", 0, 0, 10, 10)
+    index.insert("b", 100, 100, 300, 20)
+    assert sorted(index.query_rect(5, 5, 150, 150)) == ["a", "b"]
+    assert index.query_rect(20, 20, 90, 90) == []
+    assert index.query_rect(-1e9, -1e9, 1e9, 1e9) != []
+    assert index.query_point(350, 110) == ["b"]
+    assert index.query_point(50, 50) == []
+
+    index.insert("a", 500, 500, 10, 10)
+    assert index.query_rect(0, 0, 10, 10) == []
+    index.remove("b")
+    assert "b" not in index and len(index) == 1
+    assert index.query_rect(350, 110, 360, 115) == []
+
+
+def test_nearest_matches_brute_force():
+    """Test that ring search finds the same k nearest items as a full scan."""
+    rng = random.Random(3)
+    index = SpatialIndex(cell_size=80)
+    for i in range(500):
+        index.insert(f"n{i}", rng.uniform(-2000, 2000), rng.uniform(-2000, 2000),
+                     rng.uniform(5, 150), rng.uniform(5, 150))
+
+    for _ in range(50):
+        x, y = rng.uniform(-3000, 3000), rng.uniform(-3000, 3000)
+        expected = sorted((index._distance(item_id, x, y), item_id)
+                          for item_id in index._rects)
+        assert index.nearest(x, y, k=5) == expected[:5]
+        within = [pair for pair in expected if pair[0] <= 100]
+        assert index.nearest(x, y, k=1000, max_distance=100) == within
+
+    assert index.nearest(0, 0, k=0) == []
+    assert SpatialIndex().nearest(0, 0) == []
+
+
+def test_diagram_queries_follow_edits():
+    """Test that the diagram's spatial index tracks added, moved and removed nodes."""
+    diagram = Diagram(cells=[node("a", 0, 0), node("b", 300, 0), node("c", 0, 300)])
+    assert [cell["id"] for cell in diagram.query_point(50, 25)] == ["a"]
+    found = diagram.query_rect(0, 0, 300, 10)
+    assert sorted(cell["id"] for cell in found) == ["a", "b"]
+
+    diagram.add_cell(node("d", 20, 20))
+    diagram.add_cells([node("e", 1000, 1000), node("f", 1200, 1000)])
+    diagram.move_node("b", 2000, 2000)
+    assert sorted(cell["id"] for cell in diagram.query_point(50, 25)) == ["a", "d"]
+    assert diagram.query_rect(300, 0, 400, 50) == []
+
+    diagram.remove_cell("d")
+    diagram.translate(10, 0)
+    assert [cell["id"] for cell in diagram.query_point(5, 25)] == []
+    assert [cell["id"] for cell in diagram.nearest(1005, 1060, k=2)] == ["e", "f"]
+    assert [cell["id"] for cell in diagram.nearest(2110, 2050, max_distance=0)] == ["b"]
@@ -0,0 +1,43 @@
+"""Tests for the style parser."""
+
+import pytest
+
+from src.drawio_api.styles import parse_style
+
+
+def test_parse_style_fields():
+    """Test the attributes extracted from a style string."""
+    style = parse_style("ellipse;whiteSpace=wrap;fillColor=#d5e8d4;"
+                        "strokeColor=#82b366;fontColor=#009900;")
+
+    assert style.shape == "ellipse"
+    colors = (style.fill, style.stroke, style.font_color)
+    assert colors == ("#d5e8d4", "#82b366", "#009900")
+    assert style.rounded is True
+    assert style.properties["whiteSpace"] == "wrap"
+    assert parse_style("edgeStyle=orthogonalEdgeStyle;rounded=0;").orthogonal
+    assert parse_style("rounded=0;").rounded is False
+
+
+@pytest.mark.parametrize("style_string, shape", [
+    ("rounded=1;html=1;", "rect"),
+    ("rhombus;whiteSpace=wrap;", "rhombus"),
+    ("shape=cylinder3;boundedLbl=1;", "cylinder"),
+    ("shape=cylinder;rounded=0;", "cylinder"),
+    ("rounded=0;perimeter=ellipsePerimeter;", "rect"),
+])
+def test_parse_style_shapes(style_string, shape):
+    """Test shape detection from bare tokens and the shape property."""
+    assert parse_style(style_string).shape == shape
+
+
+def test_parse_style_is_interned_and_immutable():
+    """Test that equal style strings share one immutable object."""
+    first = parse_style("image;image=data:image/png,a=b;")
+
+    assert parse_style("image;image=data:image/png,a=b;") is first
+    assert first.properties["image"] == "data:image/png,a=b"
+    with pytest.raises(TypeError):
+        first.properties["image"] = "other"
+    with pytest.raises(AttributeError):
+        first.shape = "ellipse"
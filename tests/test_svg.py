@@ -0,0 +1,67 @@
+"""Tests for the streaming SVG writer."""
+
+import io
+
+import pytest
+
+from src.drawio_api import streams, svg
+from src.drawio_api.client import DrawioAPIClient
+
+
+def _make_diagram(client, count):
+    diagram = client.create_diagram()
+    for i in range(count):
+        diagram = client.add_node(diagram, f"Node {i}", i * 150, 0)
+    for i in range(count - 1):
+        diagram = client.add_edge(diagram, f"node_{i + 1}", f"node_{i + 2}")
+    return diagram
+
+
+def test_text_and_binary_streams_match():
+    """Test that text and binary streams receive the same document."""
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client, 5)
+
+    text_stream = io.StringIO()
+    binary_stream = io.BytesIO()
+    client.write_svg(diagram, text_stream)
+    client.write_svg(diagram, binary_stream)
+
+    document = text_stream.getvalue()
+    assert document.startswith("<?xml")
+    assert document.endswith("</svg>")
+    assert binary_stream.getvalue() == document.encode("utf-8")
+    bounds = client.calculate_diagram_size(diagram)
+    assert document == "".join(svg.iter_svg(diagram, bounds))
+
+
+def test_output_is_written_in_bounded_chunks(monkeypatch):
+    """Test that large documents are flushed incrementally."""
+    monkeypatch.setattr(streams, "FLUSH_SIZE", 1024)
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client, 200)
+
+    chunks = []
+
+    class Recorder(io.StringIO):
+        def write(self, text):
+            chunks.append(len(text))
+            return super().write(text)
+
+    client.write_svg(diagram, Recorder())
+
+    assert len(chunks) > 10
+    assert max(chunks) < 2048
+
+
+def test_export_to_image_stream():
+    """Test exporting SVG to a stream instead of a file."""
+    client = DrawioAPIClient()
+    diagram = _make_diagram(client, 2)
+    stream = io.BytesIO()
+
+    assert client.export_to_image(diagram, format="svg", stream=stream) is None
+    assert stream.getvalue().endswith(b"</svg>")
+
+    with pytest.raises(ValueError):
+        client.export_to_image(diagram, format="gif", stream=io.BytesIO())
@@ -0,0 +1,114 @@
+"""Tests for viewport culling and tile-pyramid export."""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from src.drawio_api import raster
+from src.drawio_api.client import DrawioAPIClient
+from src.drawio_api.tiles import TilePyramid
+
+
+def make_diagram(client):
+    diagram = client.create_diagram("Tiles")
+    client.add_nodes(diagram, [("North", 0, 0, 100, 50), ("Center", 450, 200, 100, 50),
+                               ("Far", 900, 450, 100, 50)])
+    client.add_edge(diagram, "node_1", "node_2", "link")
+    return diagram
+
+
+def test_pyramid_covers_bounds():
+    """Test zoom range, tile grid and tile viewports."""
+    pyramid = TilePyramid.for_bounds((0, 0, 1000, 500), tile_size=256)
+    assert (pyramid.min_zoom, pyramid.max_zoom) == (0, 2)
+    assert list(pyramid.tiles(0)) == [(0, 0)]
+    assert len(list(pyramid.tiles(2))) == 4 * 2
+    assert pyramid.viewport(2, 1, 1) == (250, 250, 500, 500)
+    assert pyramid.scale(2) == 256 * 4 / 1000
+    with pytest.raises(ValueError):
+        TilePyramid.for_bounds((0, 0, 10, 10), min_zoom=3, max_zoom=1)
+
+
+def test_viewport_renders_only_visible_cells():
+    """Test that cells outside the viewport are culled, except edge ends."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    corner = client.render_viewport(diagram, (0, 0, 200, 100), format="svg").decode()
+    assert ">North<" in corner and ">Center<" in corner and ">Far<" not in corner
+    assert 'viewBox="0 0 200 100"' in corner
+
+    far = client.render_viewport(diagram, (850, 400, 1000, 500), format="svg").decode()
+    assert ">Far<" in far and ">North<" not in far and "<line" not in far
+
+
+def test_export_tiles_to_directory(tmp_path):
+    """Test that a directory export writes non-empty tiles and metadata."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    output = str(tmp_path / "tiles")
+    metadata = client.export_tiles(diagram, output, format="svg", tile_size=256,
+                                   workers=1)
+
+    # The node bounds padded by 50 span 1100 units
+    assert (metadata["min_zoom"], metadata["max_zoom"]) == (0, 3)
+    written = [os.path.relpath(os.path.join(root, name), output)
+               for root, _, names in os.walk(output)
+               for name in names if name != "metadata.json"]
+    assert len(written) == metadata["tiles"]
+    assert "0/0/0.svg" in written
+    # At zoom 2 (275 units per tile) the empty top-right tile is skipped
+    assert "2/3/1.svg" in written and "2/3/0.svg" not in written
+    with open(os.path.join(output, "2", "3", "1.svg"), encoding="utf-8") as f:
+        assert ">Far<" in f.read()
+    with open(os.path.join(output, "metadata.json"), encoding="utf-8") as f:
+        assert json.load(f)["tiles"] == metadata["tiles"]
+
+
+def test_export_tiles_in_parallel_to_mbtiles(tmp_path):
+    """Test that pooled rendering into an MBTiles file matches a serial export."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    serial = client.export_tiles(diagram, str(tmp_path / "serial"), format="svg",
+                                 tile_size=64, workers=1)
+    path = str(tmp_path / "diagram.mbtiles")
+    metadata = client.export_tiles(diagram, path, format="svg", tile_size=64, workers=2)
+    assert metadata["tiles"] == serial["tiles"]
+
+    connection = sqlite3.connect(path)
+    try:
+        rows = connection.execute(
+            "SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles").fetchall()
+        values = dict(connection.execute("SELECT name, value FROM metadata"))
+    finally:
+        connection.close()
+    assert len(rows) == metadata["tiles"]
+    assert values["maxzoom"] == str(metadata["max_zoom"]) and values["name"] == "Tiles"
+    for zoom, column, flipped_row, data in rows:
+        row = 2 ** zoom - 1 - flipped_row
+        path = tmp_path / "serial" / str(zoom) / str(column) / f"{row}.svg"
+        with open(str(path), "rb") as f:
+            assert f.read() == data
+
+
+def test_png_tiles_are_scaled_per_zoom(fake_cairosvg, tmp_path):
+    """Test that raster tiles are rendered at the zoom level's scale."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    metadata = client.export_tiles(diagram, str(tmp_path), tile_size=256, max_zoom=1,
+                                   workers=1)
+    scales = sorted({scale for _, _, scale, _ in fake_cairosvg.calls})
+    assert scales == [256 / 1100, 512 / 1100]
+    assert len(fake_cairosvg.calls) == metadata["tiles"]
+
+
+def test_raster_tiles_require_cairosvg(monkeypatch, tmp_path):
+    """Test the format and dependency checks."""
+    client = DrawioAPIClient()
+    diagram = make_diagram(client)
+    with pytest.raises(ValueError, match="tile format"):
+        client.export_tiles(diagram, str(tmp_path), format="pdf")
+    monkeypatch.setattr(raster, "CAIROSVG_AVAILABLE", False)
+    with pytest.raises(ImportError):
+        client.export_tiles(diagram, str(tmp_path), format="png")